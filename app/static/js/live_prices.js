@@ -0,0 +1,65 @@
+// Applies live price updates from /api/stream/prices to the current page in place
+document.addEventListener('DOMContentLoaded', function() {
+    const root = document.querySelector('[data-live-prices]');
+    if (!root || !window.EventSource) {
+        return;
+    }
+
+    const RETRY_MS = 10000;
+
+    function formatAmount(value) {
+        return '₹' + Number(value).toFixed(2);
+    }
+
+    function setText(element, text) {
+        if (element && element.textContent !== text) {
+            element.textContent = text;
+        }
+    }
+
+    function updateHolding(holding) {
+        const row = document.querySelector('[data-holding="' + holding.asset_class + ':' + holding.key + '"]');
+        if (!row) {
+            return;
+        }
+        setText(row.querySelector('[data-field="current_price"]'), formatAmount(holding.current_price));
+        setText(row.querySelector('[data-field="current_value"]'), formatAmount(holding.current_value));
+
+        const pnlCell = row.querySelector('[data-field="unrealized_pnl"]');
+        if (pnlCell) {
+            const percent = holding.invested_value > 0 ? holding.unrealized_pnl / holding.invested_value * 100 : 0;
+            setText(pnlCell, formatAmount(holding.unrealized_pnl) + ' (' + percent.toFixed(2) + '%)');
+            pnlCell.className = holding.unrealized_pnl > 0 ? 'text-success' : (holding.unrealized_pnl < 0 ? 'text-danger' : '');
+        }
+    }
+
+    function updateTotals(totals) {
+        Object.keys(totals).forEach(function(field) {
+            setText(document.querySelector('[data-live="' + field + '"]'), formatAmount(totals[field]));
+        });
+    }
+
+    function connect() {
+        const source = new EventSource(root.dataset.livePrices);
+        source.addEventListener('snapshot', function(event) {
+            const data = JSON.parse(event.data);
+            data.holdings.forEach(updateHolding);
+            updateTotals(data.totals);
+        });
+        source.addEventListener('holdings', function(event) {
+            JSON.parse(event.data).forEach(updateHolding);
+        });
+        source.addEventListener('totals', function(event) {
+            updateTotals(JSON.parse(event.data));
+        });
+        source.addEventListener('error', function() {
+            // EventSource reconnects by itself after a stream ends, but gives up
+            // on an error status such as 503 when the server is at its stream limit
+            if (source.readyState === EventSource.CLOSED) {
+                setTimeout(connect, RETRY_MS + Math.random() * RETRY_MS);
+            }
+        });
+    }
+
+    connect();
+});
\ No newline at end of file
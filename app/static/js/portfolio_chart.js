@@ -0,0 +1,39 @@
+// Draws the portfolio value series from /api/portfolio/history on the dashboard
+document.addEventListener('DOMContentLoaded', function() {
+    const root = document.querySelector('[data-portfolio-history]');
+    if (!root || !window.fetch) {
+        return;
+    }
+
+    const width = 600;
+    const height = 200;
+
+    function points(values, low, high) {
+        const span = high - low || 1;
+        const step = values.length > 1 ? width / (values.length - 1) : 0;
+        return values.map(function(value, i) {
+            const y = height - (value - low) / span * height;
+            return (i * step).toFixed(1) + ',' + y.toFixed(1);
+        }).join(' ');
+    }
+
+    fetch(root.dataset.portfolioHistory)
+        .then(function(response) {
+            return response.ok ? response.json() : null;
+        })
+        .then(function(series) {
+            // A line needs at least two days
+            if (!series || series.date.length < 2) {
+                return;
+            }
+            const all = series.value.concat(series.invested);
+            const low = Math.min.apply(null, all);
+            const high = Math.max.apply(null, all);
+            root.querySelector('[data-series="value"]').setAttribute('points', points(series.value, low, high));
+            root.querySelector('[data-series="invested"]').setAttribute('points', points(series.invested, low, high));
+            root.querySelector('[data-field="performance_range"]').textContent =
+                series.date[0] + ' to ' + series.date[series.date.length - 1];
+            root.hidden = false;
+        })
+        .catch(function() {});
+});
\ No newline at end of file
@@ -0,0 +1,298 @@
+"""Concurrent quote and NAV fetching on an asyncio event loop.
+
+The engine owns one event loop running in a daemon thread and one pooled
+``httpx.AsyncClient``, so a worker can have hundreds of upstream requests in
+flight while its request threads only block on the results they need. Views
+stay synchronous and use the facade methods (``fetch_stock``,
+``fetch_stocks``, ``fetch_navs``), which submit coroutines to the loop and
+wait for them with a timeout. Concurrent requests for the same symbol share a
+single upstream call.
+
+Stock lookups are hedged by default (``QUOTE_HEDGE=0`` turns it off): the
+NSE and BSE quotes are requested at once and the first valid price wins by
+``QUOTE_EXCHANGE_PREFERENCE``. A less preferred exchange that answers first
+waits up to ``QUOTE_HEDGE_GRACE_MS`` for the preferred one. The losing
+requests are left to finish so their pooled connections stay reusable.
+"""
+import asyncio
+import os
+import threading
+
+import metrics
+
+try:
+    import httpx
+except ImportError:
+    # Without httpx callers fall back to the blocking lookups
+    httpx = None
+
+MAX_IN_FLIGHT = int(os.getenv("QUOTE_MAX_IN_FLIGHT", "200"))
+REQUEST_TIMEOUT = 10
+BATCH_TIMEOUT = 20
+
+# Overridable so benchmarks can point them at local stand-ins
+CHART_URL = os.getenv("YAHOO_CHART_URL", "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1d")
+OPTIONS_URL = os.getenv("YAHOO_OPTIONS_URL", "https://query2.finance.yahoo.com/v7/finance/options/{symbol}")
+MFAPI_URL = os.getenv("MFAPI_URL", "https://api.mfapi.in/mf/{code}")
+
+HEDGE = os.getenv("QUOTE_HEDGE", "1") != "0"
+HEDGE_GRACE = int(os.getenv("QUOTE_HEDGE_GRACE_MS", "200")) / 1000
+# Race the options endpoint alongside the exchanges instead of trying it last
+HEDGE_OPTIONS = os.getenv("QUOTE_HEDGE_OPTIONS", "0") == "1"
+
+EXCHANGE_SUFFIXES = {'NSE': 'NS', 'BSE': 'BO'}
+EXCHANGE_PREFERENCE = tuple(
+    exchange for exchange in (e.strip().upper() for e in os.getenv("QUOTE_EXCHANGE_PREFERENCE", "NSE,BSE").split(','))
+    if exchange in EXCHANGE_SUFFIXES) or ('NSE', 'BSE')
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+def base_symbol(ticker):
+    ticker = ticker.strip().upper()
+    if ticker.endswith('.NS') or ticker.endswith('.BO'):
+        return ticker[:-3]
+    return ticker
+
+
+def exchange_symbols(base_ticker):
+    # [(symbol, exchange)] in preference order
+    return [(f"{base_ticker}.{EXCHANGE_SUFFIXES[exchange]}", exchange) for exchange in EXCHANGE_PREFERENCE]
+
+
+def settle(results, count):
+    # results maps the rank of each finished lookup to its result (None when it
+    # failed). Returns (decided, rank): decided once no unfinished lookup could
+    # beat the best finished one; rank is None when nothing was valid
+    for rank in range(count):
+        if rank not in results:
+            return False, None
+        if results[rank]:
+            return True, rank
+    return True, None
+
+
+def best_so_far(results):
+    valid = [rank for rank, result in results.items() if result]
+    return min(valid) if valid else None
+
+
+class QuoteEngine:
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, timeout=REQUEST_TIMEOUT):
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._loop = None
+        self._client = None
+        self._pid = None
+        self._in_flight = {}
+
+    # Event loop plumbing
+
+    def _ensure_loop(self):
+        # Started lazily (and restarted in a forked child) so nothing runs before fork
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="quote-engine", daemon=True)
+            thread.start()
+            self._loop = loop
+            self._pid = os.getpid()
+            self._client = None
+            self._in_flight = {}
+            return loop
+
+    def _client_for_loop(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=HEADERS,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_in_flight,
+                                    max_keepalive_connections=min(self.max_in_flight, 50)))
+        return self._client
+
+    def warm(self):
+        # Starts this process's loop and client ahead of the first batch
+        async def create_client():
+            self._client_for_loop()
+        self.run(create_client())
+
+    def run(self, coro, timeout=BATCH_TIMEOUT):
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    def _shared(self, key, factory):
+        # Single-flight: callers asking for the same key await the same task
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return task
+
+    async def _get_json(self, url, provider):
+        with metrics.upstream(provider) as call:
+            response = await self._client_for_loop().get(url)
+            call.status(response.status_code)
+        if response.status_code != 200:
+            return None
+        return response.json()
+
+    # Upstream lookups
+
+    async def _chart_quote(self, symbol, exchange):
+        data = await self._get_json(CHART_URL.format(symbol=symbol), 'yahoo_chart')
+        results = ((data or {}).get('chart') or {}).get('result')
+        if not results:
+            return None
+        meta = results[0].get('meta') or {}
+        price = float(meta.get('regularMarketPrice') or 0)
+        if price <= 0:
+            return None
+        return {
+            'name': meta.get('shortName', meta.get('longName', symbol)),
+            'current_price': price,
+            'exchange': exchange,
+            'symbol': symbol
+        }
+
+    async def _options_quote(self, symbol):
+        data = await self._get_json(OPTIONS_URL.format(symbol=symbol), 'yahoo_options')
+        results = ((data or {}).get('optionChain') or {}).get('result')
+        if not results or 'quote' not in results[0]:
+            return None
+        quote = results[0]['quote']
+        price = float(quote.get('regularMarketPrice') or 0)
+        if price <= 0:
+            return None
+        return {
+            'name': quote.get('shortName', quote.get('longName', symbol)),
+            'current_price': price,
+            'exchange': 'NSE',
+            'symbol': symbol
+        }
+
+    @staticmethod
+    def _result(ticker, task):
+        try:
+            return task.result()
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Async quote error for {ticker}: {str(e)}")
+            return None
+
+    async def _first(self, ticker, lookups):
+        # One after the other until one answers
+        for lookup in lookups:
+            try:
+                result = await lookup()
+            except (httpx.HTTPError, ValueError) as e:
+                print(f"Async quote error for {ticker}: {str(e)}")
+                continue
+            if result:
+                return result
+        return None
+
+    async def _hedged(self, ticker, lookups):
+        # All at once; the best valid result by rank (the order of lookups)
+        loop = asyncio.get_running_loop()
+        tasks = [asyncio.ensure_future(lookup()) for lookup in lookups]
+        pending = set(tasks)
+        results = {}
+        deadline = None
+        try:
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break  # The grace period for a preferred exchange ran out
+                for task in done:
+                    results[tasks.index(task)] = self._result(ticker, task)
+                decided, rank = settle(results, len(tasks))
+                if decided:
+                    return results.get(rank)
+                if deadline is None and best_so_far(results) is not None:
+                    deadline = loop.time() + HEDGE_GRACE
+            return results.get(best_so_far(results))
+        finally:
+            for task in pending:
+                # Retrieve the losers' errors so they aren't reported as unhandled
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    # Upstream sources a stock lookup has tried once it returns None: the
+    # chart API on every exchange, then the options quote
+    stock_sources = ('yahoo_chart', 'yahoo_options')
+
+    async def _stock(self, ticker):
+        base_ticker = base_symbol(ticker)
+        lookups = [lambda symbol=symbol, exchange=exchange: self._chart_quote(symbol, exchange)
+                   for symbol, exchange in exchange_symbols(base_ticker)]
+        options = lambda: self._options_quote(f"{base_ticker}.NS")
+        if not HEDGE:
+            return await self._first(ticker, lookups + [options])
+        if HEDGE_OPTIONS:
+            return await self._hedged(ticker, lookups + [options])
+        return await self._hedged(ticker, lookups) or await self._first(ticker, [options])
+
+    async def _nav(self, scheme_code):
+        try:
+            fund_info = await self._get_json(MFAPI_URL.format(code=scheme_code), 'mfapi')
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Async NAV error for {scheme_code}: {str(e)}")
+            return None
+        if not fund_info or not fund_info.get('meta'):
+            return None
+        return {
+            'name': fund_info['meta'].get('scheme_name', f"Fund {scheme_code}"),
+            'current_nav': float(fund_info.get('data', [{}])[0].get('nav', 0))
+        }
+
+    async def stock(self, ticker):
+        ticker = ticker.strip().upper()
+        # Shielded so a caller timing out does not cancel the lookup for other waiters
+        return await asyncio.shield(self._shared(('stock', ticker), lambda: self._stock(ticker)))
+
+    async def nav(self, scheme_code):
+        return await asyncio.shield(self._shared(('nav', scheme_code), lambda: self._nav(scheme_code)))
+
+    async def _gather(self, fetch, keys, timeout):
+        # Whatever resolved within the timeout; slow or failed keys are left out
+        tasks = {asyncio.ensure_future(fetch(key)): key for key in dict.fromkeys(keys)}
+        if not tasks:
+            return {}
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        return {tasks[task]: task.result() for task in done
+                if task.exception() is None and task.result() is not None}
+
+    # Sync facade for WSGI views
+
+    def fetch_stock(self, ticker, timeout=BATCH_TIMEOUT):
+        return self.run(self.stock(ticker), timeout)
+
+    def fetch_nav(self, scheme_code, timeout=BATCH_TIMEOUT):
+        return self.run(self.nav(scheme_code), timeout)
+
+    def fetch_stocks(self, tickers, timeout=BATCH_TIMEOUT):
+        # {ticker: quote} for the tickers that resolved in time
+        tickers = [ticker.strip().upper() for ticker in tickers]
+        return self.run(self._gather(self.stock, tickers, timeout), timeout + 1)
+
+    def fetch_navs(self, scheme_codes, timeout=BATCH_TIMEOUT):
+        return self.run(self._gather(self.nav, scheme_codes, timeout), timeout + 1)
+
+
+_engine = None
+
+
+def get_engine():
+    # Shared engine, or None when httpx is not installed
+    global _engine
+    if httpx is None:
+        return None
+    if _engine is None:
+        _engine = QuoteEngine()
+    return _engine
\ No newline at end of file
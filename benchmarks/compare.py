@@ -0,0 +1,85 @@
+"""Compare two benchmark result files.
+
+    python -m benchmarks.compare benchmarks/results/OLD.json benchmarks/results/NEW.json
+    python -m benchmarks.compare RESULTS.json --targets app_vercel,app
+
+With two files every target is compared against itself across the runs
+(a regression between versions). With one file and ``--targets A,B`` the two
+deployments in that run are compared. Rows whose p95 or throughput moved by
+more than ``--threshold`` percent are flagged.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def index_rows(rows):
+    return {(row['scenario'], row['concurrency']): row for row in rows}
+
+
+def change(old, new):
+    if not old or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def compare_rows(base_rows, new_rows, threshold):
+    base, new = index_rows(base_rows), index_rows(new_rows)
+    lines = []
+    regressions = 0
+    for key in sorted(base.keys() & new.keys()):
+        a, b = base[key], new[key]
+        p95 = change(a['p95_ms'], b['p95_ms'])
+        rps = change(a['throughput_rps'], b['throughput_rps'])
+        slower = (p95 is not None and p95 > threshold) or (rps is not None and rps < -threshold)
+        regressions += slower
+        lines.append(f"{key[0]:<18}{key[1]:>6}"
+                     f"{a['throughput_rps']:>10}{b['throughput_rps']:>10}{_pct(rps):>9}"
+                     f"{a['p95_ms']:>10}{b['p95_ms']:>10}{_pct(p95):>9}"
+                     f"  {'REGRESSION' if slower else ''}")
+    return lines, regressions
+
+
+def _pct(value):
+    return '-' if value is None else f"{value:+.0f}%"
+
+
+def print_comparison(title, lines):
+    print(f"\n{title}")
+    print(f"{'scenario':<18}{'conc':>6}{'req/s A':>10}{'req/s B':>10}{'':>9}{'p95 A':>10}{'p95 B':>10}")
+    for line in lines:
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--targets', help="Two targets of one run to compare, e.g. app_vercel,app")
+    parser.add_argument('--threshold', type=float, default=10.0, help="Percent change that counts as a regression")
+    args = parser.parse_args(argv)
+
+    regressions = 0
+    if len(args.files) == 2:
+        old, new = load(args.files[0]), load(args.files[1])
+        for target in sorted(old['targets'].keys() & new['targets'].keys()):
+            lines, found = compare_rows(old['targets'][target], new['targets'][target], args.threshold)
+            print_comparison(f"{target}: A={old['revision']} B={new['revision']}", lines)
+            regressions += found
+    elif len(args.files) == 1 and args.targets:
+        run = load(args.files[0])
+        first, second = args.targets.split(',')
+        lines, regressions = compare_rows(run['targets'][first], run['targets'][second], args.threshold)
+        print_comparison(f"{run['revision']}: A={first} B={second}", lines)
+    else:
+        parser.error("pass two result files, or one file and --targets A,B")
+    # Non-zero exit so CI can fail on a regression
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
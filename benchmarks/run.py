@@ -0,0 +1,289 @@
+"""Load and latency benchmark against local upstream stand-ins.
+
+Starts the Yahoo, mfapi and Firebase stubs, seeds one user with a portfolio,
+serves each target deployment in its own process and drives every scenario
+at each concurrency level. Results (throughput, p50/p95/p99, status counts)
+are printed and saved to ``benchmarks/results/`` (not tracked by git) so runs
+can be compared with ``python -m benchmarks.compare``.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --targets app --concurrency 1,16,64 --requests 500
+    python -m benchmarks.run --yahoo latency_ms=150,jitter_ms=50,error_rate=0.02
+    python -m benchmarks.run --storage sqlite
+
+Fault specs (``--yahoo``, ``--mfapi``, ``--firebase``) take comma-separated
+``latency_ms``, ``jitter_ms``, ``error_rate`` and ``error_status`` values.
+With ``--storage sqlite`` holdings are read from a seeded local database and
+the Firebase stub only serves signing certificates.
+``fetch_stock_data`` is rate limited app-wide (one lookup per 3 seconds), so
+under load it mostly measures the 429 path.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from benchmarks.stubs import Faults, FirebaseStub, MfapiStub, YahooStub
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+TARGETS = ('app', 'app_vercel')
+PROJECT_ID = 'bench-project'
+USER_ID = 'bench-user'
+ACCOUNTS = {'bench@example.com': ('bench-password', USER_ID)}
+
+# name -> (method, path, query); the token and form fields are filled in per request
+SCENARIOS = {
+    'dashboard': ('GET', '/dashboard', {}),
+    'stocks': ('GET', '/stocks', {}),
+    'mutual_funds': ('GET', '/mutual_funds', {}),
+    'get_stock_info': ('POST', '/get_stock_info', {}),
+    'fetch_stock_data': ('POST', '/api/fetch_stock_data', {}),
+    'history': ('GET', '/api/history/BENCH1', {'range': '5y', 'points': 300}),
+}
+
+# Numbers the symbols POST scenarios look up, unique across the whole run
+_symbol_numbers = itertools.count()
+
+
+def seed_tree(stock_count, fund_count):
+    stocks = {
+        f"BENCH{i}": {'symbol': f"BENCH{i}.NS", 'name': f"Bench {i}", 'quantity': 10 + i,
+                      'purchase_price': 100.0 + i, 'exchange': 'NSE'}
+        for i in range(stock_count)
+    }
+    funds = {
+        str(100000 + i): {'name': f"Stub Fund {100000 + i}", 'units': 50.0 + i, 'purchase_nav': 20.0}
+        for i in range(fund_count)
+    }
+    return {'users': {USER_ID: {'stocks': stocks, 'mutual_funds': funds}}}
+
+
+def seed_sqlite(tree):
+    from storage import SQLiteStore
+    path = os.path.join(tempfile.mkdtemp(prefix='bench-'), 'portfolio.db')
+    store = SQLiteStore(path)
+    for user_id, sections in tree['users'].items():
+        for asset_class, holdings in sections.items():
+            for key, aggregate in holdings.items():
+                store.set_holding(user_id, asset_class, key, aggregate, None)
+    return path
+
+
+def app_environment(yahoo_url, mfapi_url, firebase_url, sqlite_path=None):
+    env = dict(os.environ)
+    env.update({
+        'FIREBASE_API_KEY': 'bench', 'FIREBASE_AUTH_DOMAIN': 'bench.local',
+        'FIREBASE_PROJECT_ID': PROJECT_ID, 'FIREBASE_STORAGE_BUCKET': 'bench',
+        'FIREBASE_MESSAGING_SENDER_ID': '0', 'FIREBASE_APP_ID': 'bench',
+        'FIREBASE_DATABASE_URL': firebase_url,
+        'FIREBASE_CERTS_URL': f"{firebase_url}/certs",
+        'FIREBASE_AUTH_URL': f"{firebase_url}/v1",
+        'YAHOO_CHART_URL': f"{yahoo_url}/v8/finance/chart/{{symbol}}",
+        'YAHOO_OPTIONS_URL': f"{yahoo_url}/v7/finance/options/{{symbol}}",
+        'YAHOO_HISTORY_URL': f"{yahoo_url}/v8/finance/chart/{{symbol}}",
+        'HISTORY_DB': os.path.join(tempfile.mkdtemp(prefix='bench-'), 'history.db'),
+        'MFAPI_URL': f"{mfapi_url}/mf/{{code}}",
+        # yfinance talks to Yahoo directly and can't be redirected to the stub
+        'YFINANCE_FALLBACK': '0',
+        'PYTHONPATH': ROOT,
+    })
+    env.pop('METRICS_DIR', None)
+    if sqlite_path:
+        env.update({'STORAGE_BACKEND': 'sqlite', 'SQLITE_PATH': sqlite_path})
+    else:
+        env.pop('STORAGE_BACKEND', None)
+    return env
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_target(module, env, timeout=60):
+    port = free_port()
+    process = subprocess.Popen([sys.executable, '-m', 'benchmarks.serve', module, str(port)],
+                               cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{module} exited with status {process.returncode}")
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{module} did not become healthy within {timeout}s")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, statuses, elapsed):
+    ordered = sorted(latencies)
+    ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        'requests': len(ordered),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(ordered) / elapsed, 1) if elapsed else None,
+        'p50_ms': ms(percentile(ordered, 0.50)),
+        'p95_ms': ms(percentile(ordered, 0.95)),
+        'p99_ms': ms(percentile(ordered, 0.99)),
+        'max_ms': ms(ordered[-1] if ordered else None),
+        'statuses': dict(sorted(Counter(statuses).items(), key=lambda item: str(item[0]))),
+    }
+
+
+def drive(base_url, scenario, token, concurrency, total):
+    method, path, query = SCENARIOS[scenario]
+    local = threading.local()
+
+    def one(_):
+        # Keep-alive session per worker thread, like a browser tab
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        n = next(_symbol_numbers)
+        if method == 'GET':
+            call = lambda: session.get(f"{base_url}{path}", params={'token': token, **query},
+                                       allow_redirects=False, timeout=60)
+        else:
+            # A fresh symbol per request so quote lookups go upstream
+            call = lambda: session.post(f"{base_url}{path}", data={'ticker': f"LOAD{n}.NS", 'token': token},
+                                        allow_redirects=False, timeout=60)
+        started = time.perf_counter()
+        try:
+            status = call().status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+    return summarize([o[0] for o in outcomes], [o[1] for o in outcomes], elapsed)
+
+
+def git_revision():
+    try:
+        sha = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+        dirty = subprocess.call(['git', 'diff', '--quiet', 'HEAD'], cwd=ROOT) != 0
+        return sha + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_table(target, rows):
+    print(f"\n{target}")
+    print(f"{'scenario':<18}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses")
+    for row in rows:
+        print(f"{row['scenario']:<18}{row['concurrency']:>6}{row['throughput_rps']:>10}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}  {row['statuses']}")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--targets', default=','.join(TARGETS), help="Comma-separated: app, app_vercel")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--concurrency', default='1,8,32', help="Comma-separated concurrency levels")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per scenario and level")
+    parser.add_argument('--warmup', type=int, default=5, help="Unmeasured requests per scenario first")
+    parser.add_argument('--stocks', type=int, default=25, help="Stock holdings in the seeded portfolio")
+    parser.add_argument('--funds', type=int, default=10, help="Mutual fund holdings in the seeded portfolio")
+    parser.add_argument('--yahoo', default='latency_ms=80,jitter_ms=20', help="Faults for the Yahoo stub")
+    parser.add_argument('--mfapi', default='latency_ms=120,jitter_ms=30', help="Faults for the mfapi stub")
+    parser.add_argument('--firebase', default='latency_ms=40,jitter_ms=10', help="Faults for the Firebase stub")
+    parser.add_argument('--storage', choices=('firebase', 'sqlite'), default='firebase',
+                        help="Where the app reads holdings from")
+    parser.add_argument('--label', default='', help="Free-form note stored with the results")
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/<time>-<rev>.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    targets = [t for t in args.targets.split(',') if t]
+    scenarios = [s for s in args.scenarios.split(',') if s]
+    levels = [int(c) for c in args.concurrency.split(',') if c]
+    unknown = [t for t in targets if t not in TARGETS] + [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Unknown target or scenario: {', '.join(unknown)}")
+
+    faults = {name: Faults.parse(spec) for name, spec in
+              (('yahoo', args.yahoo), ('mfapi', args.mfapi), ('firebase', args.firebase))}
+    yahoo = YahooStub(faults['yahoo'])
+    mfapi = MfapiStub(faults['mfapi'])
+    tree = seed_tree(args.stocks, args.funds)
+    firebase = FirebaseStub(PROJECT_ID, tree, faults['firebase'], ACCOUNTS)
+    sqlite_path = seed_sqlite(tree) if args.storage == 'sqlite' else None
+    env = app_environment(yahoo.start(), mfapi.start(), firebase.start(), sqlite_path)
+    token = firebase.mint(USER_ID)
+
+    results = {
+        'revision': git_revision(),
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'label': args.label,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {
+            'requests': args.requests, 'warmup': args.warmup, 'concurrency': levels,
+            'stocks': args.stocks, 'funds': args.funds, 'storage': args.storage,
+            'faults': {name: f.describe() for name, f in faults.items()},
+        },
+        'targets': {},
+    }
+    try:
+        for target in targets:
+            # A fresh process per target so neither inherits the other's warm caches
+            process, base_url = start_target(target, env)
+            rows = []
+            try:
+                for scenario in scenarios:
+                    if args.warmup:
+                        drive(base_url, scenario, token, 1, args.warmup)
+                    for concurrency in levels:
+                        row = drive(base_url, scenario, token, concurrency, args.requests)
+                        rows.append({'scenario': scenario, 'concurrency': concurrency, **row})
+            finally:
+                process.terminate()
+                process.wait()
+            results['targets'][target] = rows
+            print_table(target, rows)
+    finally:
+        for stub in (yahoo, mfapi, firebase):
+            stub.stop()
+
+    path = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{results['revision']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved {path}")
+    return path
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,26 @@
+"""Serve one deployment's WSGI app for a benchmark run.
+
+    python -m benchmarks.serve app 8101        # full profile (app.py)
+    python -m benchmarks.serve app_vercel 8102 # lean profile (app_vercel.py)
+
+Upstream URLs are taken from the environment ``benchmarks.run`` sets.
+"""
+import importlib
+import logging
+import sys
+
+from werkzeug.serving import make_server
+
+
+def main(argv):
+    module_name, port = argv[0], int(argv[1])
+    # Per-request log lines would dominate the run's own cost
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    logging.getLogger("timing").disabled = True
+    app = importlib.import_module(module_name).app
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
\ No newline at end of file
@@ -0,0 +1,290 @@
+"""Local stand-ins for the upstream APIs the app calls.
+
+Each stub is a threaded HTTP server with its own ``Faults`` (added latency,
+jitter and a share of error responses), so one upstream can be made slow or
+flaky while the others stay fast:
+
+* ``YahooStub``: ``/v8/finance/chart/<symbol>`` (a quote, or daily bars when
+  ``period1``/``period2`` are given) and ``/v7/finance/options/<symbol>``
+* ``MfapiStub``: ``/mf/<scheme_code>``
+* ``FirebaseStub``: RTDB REST (``GET/PUT/PATCH/POST /<path>.json``, including
+  ``shallow=true`` and ETag/``if-match`` conditional writes), the token signing certificates at ``/certs`` and the Auth
+  ``/v1/accounts:signInWithPassword`` and ``/v1/accounts:lookup`` calls. It
+  mints RS256 ID tokens those certificates verify.
+
+Prices are derived from the symbol, so runs are repeatable. Symbols starting
+with ``ZZ`` are unknown to every endpoint.
+"""
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class Faults:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_status=500):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    @classmethod
+    def parse(cls, spec):
+        # "latency_ms=200,jitter_ms=50,error_rate=0.05,error_status=429"
+        values = {}
+        for item in filter(None, (spec or '').split(',')):
+            key, _, value = item.partition('=')
+            values[key.strip()] = int(value) if key.strip() == 'error_status' else float(value)
+        return cls(**values)
+
+    def apply(self):
+        # Sleeps for the injected latency; returns an error status to send, or None
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if self.error_rate and random.random() < self.error_rate:
+            return self.error_status
+        return None
+
+    def describe(self):
+        return dict(vars(self))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this, keep-alive
+    # clients wait on delayed ACKs for every response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        error = self.server.faults.apply()
+        if error:
+            status, payload, headers = error, {'error': 'injected'}, {}
+        else:
+            status, payload, headers = self.server.stub.handle(
+                self.command, url.path, parse_qs(url.query), body, self.headers)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_PUT = do_PATCH = do_POST = do_DELETE = _dispatch
+
+
+class StubServer:
+    def __init__(self, faults=None):
+        self.faults = faults or Faults()
+        self.httpd = None
+
+    def start(self, host='127.0.0.1', port=0):
+        ThreadingHTTPServer.request_queue_size = 1024
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self.httpd.faults = self.faults
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self.url
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+    def handle(self, method, path, query, body, headers):
+        raise NotImplementedError
+
+
+def stub_price(symbol):
+    digest = hashlib.sha1(symbol.split('.')[0].encode()).digest()
+    return round(50 + int.from_bytes(digest[:4], 'big') % 500000 / 100, 2)
+
+
+def stub_bars(symbol, period1, period2):
+    # Weekday bars stamped at 09:15 IST, a deterministic walk around stub_price
+    timestamps, closes = [], []
+    day = datetime.fromtimestamp(period1, timezone.utc).date()
+    last = datetime.fromtimestamp(period2 - 1, timezone.utc).date()
+    base = stub_price(symbol)
+    while day <= last:
+        if day.weekday() < 5:
+            stamp = int(datetime(day.year, day.month, day.day, 3, 45, tzinfo=timezone.utc).timestamp())
+            timestamps.append(stamp)
+            wobble = int(hashlib.sha1(f"{symbol}{day}".encode()).hexdigest()[:6], 16) % 1000 / 1000
+            closes.append(round(base * (0.9 + 0.2 * wobble), 2))
+        day += timedelta(days=1)
+    return {
+        'meta': {'symbol': symbol, 'gmtoffset': 19800, 'regularMarketPrice': base},
+        'timestamp': timestamps,
+        'indicators': {'quote': [{
+            'open': closes, 'close': closes,
+            'high': [round(c * 1.01, 2) for c in closes],
+            'low': [round(c * 0.99, 2) for c in closes],
+            'volume': [100000] * len(closes),
+        }]}
+    }
+
+
+class YahooStub(StubServer):
+    def handle(self, method, path, query, body, headers):
+        parts = path.strip('/').split('/')
+        symbol = parts[-1] if parts else ''
+        known = symbol and not symbol.startswith('ZZ')
+        if path.startswith('/v8/finance/chart/') and 'period1' in query:
+            result = [stub_bars(symbol, int(query['period1'][0]), int(query['period2'][0]))] if known else None
+            return 200, {'chart': {'result': result, 'error': None}}, {}
+        if path.startswith('/v8/finance/chart/'):
+            result = [{'meta': {'regularMarketPrice': stub_price(symbol), 'shortName': f"{symbol} Ltd"}}] if known else None
+            return 200, {'chart': {'result': result, 'error': None}}, {}
+        if path.startswith('/v7/finance/options/'):
+            result = [{'quote': {'regularMarketPrice': stub_price(symbol), 'shortName': f"{symbol} Ltd"}}] if known else []
+            return 200, {'optionChain': {'result': result, 'error': None}}, {}
+        return 404, {'error': 'not found'}, {}
+
+
+class MfapiStub(StubServer):
+    def handle(self, method, path, query, body, headers):
+        code = path.rstrip('/').rsplit('/', 1)[-1]
+        if not path.startswith('/mf/') or not code.isdigit():
+            return 200, {}, {}
+        return 200, {
+            'meta': {'scheme_code': int(code), 'scheme_name': f"Stub Fund {code}"},
+            'data': [{'date': datetime.now().strftime('%d-%m-%Y'), 'nav': f"{stub_price(code) / 10:.4f}"}]
+        }, {}
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _etag(node):
+    return hashlib.sha1(json.dumps(node, sort_keys=True).encode()).hexdigest()
+
+
+class FirebaseStub(StubServer):
+    KEY_ID = 'bench-key'
+
+    def __init__(self, project_id, tree=None, faults=None, accounts=None):
+        super().__init__(faults)
+        # Imported here so the other stubs work without cryptography
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding, rsa
+        from cryptography.x509.oid import NameOID
+
+        self.project_id = project_id
+        self.tree = tree or {}
+        self.accounts = accounts or {}  # email -> (password, uid)
+        self._lock = threading.Lock()
+        self._key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self._padding = padding.PKCS1v15()
+        self._hash = hashes.SHA256()
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'bench')])
+        now = datetime.now(timezone.utc)
+        cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name)
+                .public_key(self._key.public_key()).serial_number(1)
+                .not_valid_before(now - timedelta(days=1)).not_valid_after(now + timedelta(days=1))
+                .sign(self._key, hashes.SHA256()))
+        self.certificate = cert.public_bytes(serialization.Encoding.PEM).decode()
+
+    def mint(self, uid, lifetime=3600):
+        now = int(time.time())
+        header = {'alg': 'RS256', 'kid': self.KEY_ID, 'typ': 'JWT'}
+        claims = {
+            'iss': f"https://securetoken.google.com/{self.project_id}",
+            'aud': self.project_id,
+            'sub': uid, 'user_id': uid,
+            'iat': now, 'auth_time': now, 'exp': now + lifetime
+        }
+        signing_input = f"{_b64(json.dumps(header).encode())}.{_b64(json.dumps(claims).encode())}"
+        signature = self._key.sign(signing_input.encode(), self._padding, self._hash)
+        return f"{signing_input}.{_b64(signature)}"
+
+    def _node(self, parts, create=False):
+        node = self.tree
+        for part in parts:
+            if not isinstance(node, dict) or (part not in node and not create):
+                return None
+            node = node.setdefault(part, {}) if create else node[part]
+        return node
+
+    def _write(self, parts, value):
+        if not parts:
+            self.tree = value if isinstance(value, dict) else {}
+            return
+        parent = self._node(parts[:-1], create=True)
+        if value is None:
+            parent.pop(parts[-1], None)
+        else:
+            parent[parts[-1]] = value
+
+    def _auth(self, action, payload):
+        if action == 'signInWithPassword':
+            password, uid = self.accounts.get(payload.get('email'), (None, None))
+            if uid is None or password != payload.get('password'):
+                return 400, {'error': {'code': 400, 'message': 'INVALID_LOGIN_CREDENTIALS'}}, {}
+            return 200, {'localId': uid, 'email': payload['email'], 'idToken': self.mint(uid),
+                         'refreshToken': 'bench', 'expiresIn': '3600'}, {}
+        if action == 'lookup':
+            try:
+                claims = json.loads(base64.urlsafe_b64decode(payload['idToken'].split('.')[1] + '=='))
+            except (KeyError, IndexError, ValueError):
+                return 400, {'error': {'code': 400, 'message': 'INVALID_ID_TOKEN'}}, {}
+            return 200, {'users': [{'localId': claims['sub']}]}, {}
+        return 404, {'error': {'code': 404, 'message': 'NOT_FOUND'}}, {}
+
+    def handle(self, method, path, query, body, headers):
+        if path == '/certs':
+            return 200, {self.KEY_ID: self.certificate}, {'Cache-Control': 'public, max-age=3600'}
+        if path.startswith('/v1/accounts:'):
+            return self._auth(path[len('/v1/accounts:'):], json.loads(body or b'{}'))
+        if not path.endswith('.json'):
+            return 404, {'error': 'not found'}, {}
+        parts = [part for part in path[:-len('.json')].split('/') if part]
+        payload = json.loads(body) if body else None
+        with self._lock:
+            if method == 'GET':
+                node = self._node(parts)
+                if headers.get('X-Firebase-ETag') == 'true':
+                    return 200, node, {'ETag': _etag(node)}
+                if query.get('shallow') == ['true'] and isinstance(node, dict):
+                    node = {key: True for key in node}
+                return 200, node, {}
+            if method == 'PUT':
+                etag = headers.get('if-match')
+                if etag is not None and etag != _etag(self._node(parts)):
+                    return 412, self._node(parts), {'ETag': _etag(self._node(parts))}
+                self._write(parts, payload)
+                return 200, payload, {}
+            if method == 'PATCH':
+                # Multi-location update: every key is a path relative to this node
+                for key, value in (payload or {}).items():
+                    self._write(parts + [p for p in key.split('/') if p], value)
+                return 200, payload, {}
+            if method == 'POST':
+                name = f"-bench{time.time_ns()}"
+                self._write(parts + [name], payload)
+                return 200, {'name': name}, {}
+            if method == 'DELETE':
+                self._write(parts, None)
+                return 200, None, {}
+        return 405, {'error': 'method not allowed'}, {}
\ No newline at end of file
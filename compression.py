@@ -0,0 +1,175 @@
+"""WSGI middleware that gzip- or brotli-compresses dynamic responses.
+
+The encoding is negotiated from ``Accept-Encoding`` (q-values honoured,
+brotli preferred on a tie; brotli needs the ``brotli`` package). Only text
+types are compressed (HTML, JSON, CSS/JS, CSV, XML, SVG), so images,
+archives and anything already carrying a ``Content-Encoding``, such as the
+precompressed static assets, pass through untouched.
+
+Responses with a known length are compressed in one go once they reach
+``COMPRESSION_MIN_SIZE`` bytes. Streamed responses (the stocks page,
+exports) are compressed chunk by chunk with a flush after each one, so the
+browser can render every chunk as soon as it arrives. Server-sent events are
+left alone: their small, long-lived chunks gain nothing and some proxies
+buffer compressed streams.
+"""
+import itertools
+import os
+import zlib
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:
+    # Without brotli only gzip is offered
+    brotli = None
+
+MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml',
+                      'application/x-ndjson', 'image/svg+xml')
+SKIPPED_TYPES = ('text/event-stream',)
+
+# Statuses without a body, or with a partial one
+UNCOMPRESSED_STATUSES = (204, 206, 304)
+
+
+def choose_encoding(accept_encoding):
+    # 'br', 'gzip' or None for an Accept-Encoding header value
+    if not accept_encoding:
+        return None
+    accepted = parse_accept_header(accept_encoding)
+    offers = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_quality = None, 0
+    for encoding in offers:
+        quality = accepted[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type):
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    return mimetype.startswith(COMPRESSIBLE_TYPES) and not mimetype.startswith(SKIPPED_TYPES)
+
+
+class Compressor:
+    # Incremental gzip/brotli stream; flush() emits everything fed so far
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data):
+        if self.encoding == 'br':
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def flush(self):
+        if self.encoding == 'br':
+            return self._brotli.flush()
+        return self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def add_vary(headers):
+    vary = headers.get('Vary')
+    if not vary:
+        headers['Vary'] = 'Accept-Encoding'
+    elif 'accept-encoding' not in vary.lower():
+        headers['Vary'] = f"{vary}, Accept-Encoding"
+
+
+def compress(encoding, data):
+    compressor = Compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+class CompressedStream:
+    # A streamed body compressed chunk by chunk. Flushing after every chunk
+    # costs a few bytes each but never holds back what the app has produced.
+    def __init__(self, app_iter, written, encoding):
+        self.app_iter = app_iter
+        self.written = written
+        self.encoding = encoding
+
+    def __iter__(self):
+        compressor = Compressor(self.encoding)
+        for data in itertools.chain(self.written, self.app_iter):
+            if data:
+                yield compressor.compress(data) + compressor.flush()
+        yield compressor.finish()
+
+    def close(self):
+        # Passed on even if iteration never started, so the app's
+        # close callbacks (timing logs, request contexts) still run
+        if hasattr(self.app_iter, 'close'):
+            self.app_iter.close()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, min_size=MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    def __call__(self, environ, start_response):
+        encoding = None if environ.get('REQUEST_METHOD') == 'HEAD' \
+            else choose_encoding(environ.get('HTTP_ACCEPT_ENCODING'))
+        captured = {'written': []}
+
+        def capture(status, headers, exc_info=None):
+            # Held back until the headers show whether compression applies;
+            # like Flask, the app must call this before returning its body
+            captured['response'] = (status, Headers(headers), exc_info)
+            return captured['written'].append
+
+        app_iter = self.app(environ, capture)
+        status, headers, exc_info = captured['response']
+        written = captured['written']
+        length = headers.get('Content-Length', type=int)
+        if self._eligible(status, headers):
+            add_vary(headers)
+            if encoding is not None and (length is None or length >= self.min_size):
+                return self._compressed(app_iter, written, encoding, status, headers, exc_info, start_response)
+
+        write = start_response(status, headers.to_wsgi_list(), exc_info)
+        for data in written:
+            write(data)
+        return app_iter
+
+    def _compressed(self, app_iter, written, encoding, status, headers, exc_info, start_response):
+        headers['Content-Encoding'] = encoding
+        headers.remove('Accept-Ranges')
+        etag = headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            # The compressed bytes differ, so the validator can only be weak;
+            # views compare If-None-Match weakly, as RFC 9110 asks
+            headers['ETag'] = f"W/{etag}"
+        if headers.get('Content-Length') is None:
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return CompressedStream(app_iter, written, encoding)
+        try:
+            body = b''.join(written) + b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        body = compress(encoding, body)
+        headers['Content-Length'] = str(len(body))
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return [body]
+
+    def _eligible(self, status, headers):
+        return (int(status.split(' ', 1)[0]) not in UNCOMPRESSED_STATUSES
+                and 'Content-Encoding' not in headers
+                and 'no-transform' not in headers.get('Cache-Control', '')
+                and is_compressible(headers.get('Content-Type')))
\ No newline at end of file
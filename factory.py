@@ -0,0 +1,124 @@
+"""Application factory shared by every deployment.
+
+``create_app(profile)`` builds the one Flask app with one of two profiles:
+
+* ``lean`` (Vercel): imports nothing but Flask up front. Views are bound
+  lazily, so the first request to any route imports ``views`` and its
+  dependencies. Firebase and yfinance load on first use, and nothing runs in
+  the background.
+* ``full`` (gunicorn): imports the views and initializes Firebase while the
+  app is built. It also preloads yfinance, the token signing keys, the market
+  calendar and the compiled templates, and lets the live price hub refresh
+  subscribed quotes in the background. Under gunicorn this happens once in
+  the master (see ``gunicorn.conf.py``) and ``warm_worker`` runs in each
+  forked worker, which also starts the job that finalizes each trading
+  day's portfolio snapshots.
+
+The profile defaults to ``APP_PROFILE``, then to ``lean`` on Vercel and
+``full`` elsewhere.
+"""
+import os
+
+from dotenv import load_dotenv
+from flask import Flask
+from werkzeug.utils import cached_property, import_string
+
+import compression
+import metrics
+import server_timing
+import static_assets
+from routes import ROUTES, FULL_ROUTES, LEAN_ROUTES
+
+PROFILES = ('lean', 'full')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_FOLDER = os.path.join(BASE_DIR, 'app', 'templates')
+STATIC_FOLDER = os.path.join(BASE_DIR, 'app', 'static')
+
+
+class LazyView:
+    # Imports the view function on its first call
+    def __init__(self, import_name):
+        self.__module__, self.__name__ = import_name.rsplit('.', 1)
+        self.import_name = import_name
+
+    @cached_property
+    def view(self):
+        return import_string(self.import_name)
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+
+def default_profile():
+    return os.getenv("APP_PROFILE") or ('lean' if os.getenv("VERCEL") else 'full')
+
+
+def register_routes(app, lazy):
+    extra = FULL_ROUTES if app.config['PROFILE'] == 'full' else LEAN_ROUTES
+    # One view object per endpoint; several rules may share it
+    views = {}
+    for rule, endpoint, methods in ROUTES + extra:
+        if endpoint not in views:
+            import_name = f"views.{endpoint}"
+            views[endpoint] = LazyView(import_name) if lazy else import_string(import_name)
+        app.add_url_rule(rule, endpoint, view_func=views[endpoint], methods=methods)
+
+
+def create_app(profile=None):
+    profile = profile or default_profile()
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown app profile: {profile}")
+
+    # Load environment variables
+    load_dotenv()
+
+    app = Flask(__name__,
+                template_folder=TEMPLATE_FOLDER,
+                static_folder=STATIC_FOLDER)
+
+    # Use a fixed secret key for production
+    app.secret_key = os.getenv("SECRET_KEY") or os.urandom(24)
+    app.config['PROFILE'] = profile
+    # Pages subscribe to /api/stream/prices for in-place price updates
+    app.config['LIVE_PRICES'] = profile == 'full'
+
+    register_routes(app, lazy=profile == 'lean')
+    # Fingerprinted static URLs; the full profile compresses every asset now
+    static_assets.init_app(app, preload=profile == 'full')
+    server_timing.init_app(app)
+    metrics.init_app(app)
+    if os.getenv("COMPRESSION", "1") != "0":
+        app.wsgi_app = compression.CompressionMiddleware(app.wsgi_app)
+
+    if profile == 'full':
+        import firebase_app
+        import firebase_tokens
+        import market_calendar
+        import quotes
+        firebase_app.init()
+        firebase_tokens.preload_signing_keys()
+        quotes.preload()
+        quotes.start_refreshers()
+        # Read-only data a preloading server shares with its forked workers
+        market_calendar.get_calendar()
+        for name in app.jinja_env.list_templates():
+            app.jinja_env.get_template(name)
+
+    return app
+
+
+def warm_worker():
+    # Per-process connections a forked worker opens before taking traffic
+    import firebase_app
+    import firebase_rest
+    import quotes
+    import snapshots
+    if firebase_app.db is not None:
+        firebase_rest.warm(firebase_app.db.url)
+    if quotes.quote_engine is not None:
+        try:
+            quotes.quote_engine.warm()
+        except Exception as e:
+            print(f"Quote engine warm-up error: {str(e)}")
+    snapshots.start_finalizer()
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""Firebase client handles shared by every view.
+
+The full profile initializes Firebase while the app is created; the lean
+profile leaves it to the first request that needs it. If initialization fails
+the handles stay None and the views report the database as unavailable.
+The handles are ``firebase_rest`` clients, which share one connection pool.
+"""
+import os
+
+# Check if Firebase environment variables are set
+REQUIRED_ENV_VARS = [
+    "FIREBASE_API_KEY",
+    "FIREBASE_AUTH_DOMAIN",
+    "FIREBASE_PROJECT_ID",
+    "FIREBASE_STORAGE_BUCKET",
+    "FIREBASE_MESSAGING_SENDER_ID",
+    "FIREBASE_APP_ID",
+    "FIREBASE_DATABASE_URL"
+]
+
+auth = None
+db = None
+_initialized = False
+
+
+def init():
+    global auth, db, _initialized
+    if _initialized:
+        return
+    _initialized = True
+
+    missing_vars = [var for var in REQUIRED_ENV_VARS if not os.getenv(var)]
+    if missing_vars:
+        print(f"ERROR: Missing required environment variables: {', '.join(missing_vars)}")
+        print("Please set these variables in your Vercel project settings.")
+
+    try:
+        import firebase_rest
+        auth = firebase_rest.Auth(os.environ["FIREBASE_API_KEY"])
+        db = firebase_rest.Database(os.environ["FIREBASE_DATABASE_URL"])
+    except Exception as e:
+        print(f"Firebase initialization error: {e}")
+
+
+def get_auth():
+    init()
+    return auth
+
+
+def get_db():
+    init()
+    return db
\ No newline at end of file
@@ -0,0 +1,244 @@
+"""Minimal Firebase Auth and Realtime Database REST client.
+
+Covers just the calls the app makes. Every call goes through one pooled
+keep-alive ``requests.Session`` per process with connect and read timeouts. Failed connections and 429/5xx answers are retried a
+bounded number of times with backoff; only idempotent methods are retried
+after a request was sent. PUT is not among them, because a conditional PUT
+that is resent after it was applied comes back as a conflict. References are immutable (``child()`` returns a new
+one), so a single ``Database`` is safe to share across threads.
+
+Settings come from the environment: ``FIREBASE_POOL_SIZE``,
+``FIREBASE_CONNECT_TIMEOUT``, ``FIREBASE_READ_TIMEOUT``, ``FIREBASE_RETRIES``,
+and ``FIREBASE_AUTH_URL`` to point Auth calls somewhere other than Google
+(the database URL already comes from ``FIREBASE_DATABASE_URL``).
+"""
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+AUTH_URL = os.getenv("FIREBASE_AUTH_URL", "https://identitytoolkit.googleapis.com/v1")
+POOL_SIZE = int(os.getenv("FIREBASE_POOL_SIZE", "32"))
+TIMEOUT = (float(os.getenv("FIREBASE_CONNECT_TIMEOUT", "3.05")), float(os.getenv("FIREBASE_READ_TIMEOUT", "10")))
+RETRIES = int(os.getenv("FIREBASE_RETRIES", "2"))
+
+PUSH_CHARS = '-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz'
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+class FirebaseError(requests.HTTPError):
+    # args[1] is the response body, so callers can show Firebase's error message
+    pass
+
+
+def get_session():
+    # One pool per process; a forked worker builds its own
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _session_lock:
+            if _session is None or _session_pid != os.getpid():
+                retry = Retry(total=RETRIES, connect=RETRIES, read=RETRIES, status=RETRIES,
+                              backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504),
+                              allowed_methods=frozenset(['GET', 'PATCH', 'DELETE']),
+                              raise_on_status=False, respect_retry_after_header=True)
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session, _session_pid = session, os.getpid()
+    return _session
+
+
+def warm(url):
+    # Opens a pooled connection to url's host so the first real call skips the
+    # TCP and TLS handshakes; the answer itself (often a 401) doesn't matter
+    try:
+        get_session().get(f"{url.rstrip('/')}/.json", params={'shallow': 'true'}, timeout=TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Firebase warm-up error: {str(e)}")
+
+
+def _request(method, url, **kwargs):
+    response = get_session().request(method, url, timeout=TIMEOUT, **kwargs)
+    try:
+        response.raise_for_status()
+    except requests.HTTPError as e:
+        raise FirebaseError(e, response.text, response=response)
+    return response
+
+
+class Auth:
+    def __init__(self, api_key, base_url=AUTH_URL):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+
+    def _call(self, method, payload):
+        return _request('POST', f"{self.base_url}/accounts:{method}", params={'key': self.api_key},
+                        json=payload).json()
+
+    def sign_in_with_email_and_password(self, email, password):
+        # Returns localId, idToken, refreshToken and expiresIn
+        return self._call('signInWithPassword', {'email': email, 'password': password, 'returnSecureToken': True})
+
+    def get_account_info(self, id_token):
+        return self._call('lookup', {'idToken': id_token})
+
+
+class Response:
+    def __init__(self, value):
+        self.value = value
+
+    def val(self):
+        return self.value
+
+
+class Reference:
+    def __init__(self, database, path=(), query=None):
+        self.database = database
+        self.path = tuple(path)
+        self.query = dict(query or {})
+
+    def child(self, *parts):
+        path = list(self.path)
+        for part in parts:
+            path.extend(p for p in str(part).split('/') if p)
+        return Reference(self.database, path, self.query)
+
+    def _with(self, **query):
+        return Reference(self.database, self.path, {**self.query, **query})
+
+    # Queries: the server filters, the client restores the order
+
+    def shallow(self):
+        return self._with(shallow='true')
+
+    def order_by_key(self):
+        return self._with(orderBy='"$key"')
+
+    def order_by_value(self):
+        return self._with(orderBy='"$value"')
+
+    def order_by_child(self, name):
+        return self._with(orderBy=json.dumps(name))
+
+    def start_at(self, value):
+        return self._with(startAt=json.dumps(value))
+
+    def end_at(self, value):
+        return self._with(endAt=json.dumps(value))
+
+    def equal_to(self, value):
+        return self._with(equalTo=json.dumps(value))
+
+    def limit_to_first(self, count):
+        return self._with(limitToFirst=int(count))
+
+    def limit_to_last(self, count):
+        return self._with(limitToLast=int(count))
+
+    def _url(self):
+        return f"{self.database.url}/{'/'.join(self.path)}.json"
+
+    def _params(self, token, query=None):
+        params = dict(query or {})
+        if token:
+            params['auth'] = token
+        return params
+
+    def get(self, token=None):
+        value = _request('GET', self._url(), params=self._params(token, self.query)).json()
+        if isinstance(value, dict):
+            if self.query.get('shallow'):
+                value = list(value)
+            elif 'orderBy' in self.query:
+                value = dict(_ordered(value, json.loads(self.query['orderBy'])))
+        return Response(value)
+
+    def get_with_etag(self, token=None):
+        # (value, etag) for a later set_if_match
+        response = _request('GET', self._url(), params=self._params(token),
+                            headers={'X-Firebase-ETag': 'true'})
+        return response.json(), response.headers.get('ETag')
+
+    def set(self, data, token=None):
+        return _request('PUT', self._url(), params=self._params(token), json=data).json()
+
+    def set_if_match(self, data, etag, token=None):
+        # Writes only if the location still has etag; False if it changed since
+        try:
+            _request('PUT', self._url(), params=self._params(token), json=data, headers={'if-match': etag})
+        except FirebaseError as e:
+            if e.response is not None and e.response.status_code == 412:
+                return False
+            raise
+        return True
+
+    def update(self, data, token=None):
+        # Keys may be paths below this reference ("a/b/c"); every location is
+        # written atomically in one request
+        return _request('PATCH', self._url(), params=self._params(token), json=data).json()
+
+    def push(self, data, token=None):
+        return _request('POST', self._url(), params=self._params(token), json=data).json()
+
+    def remove(self, token=None):
+        _request('DELETE', self._url(), params=self._params(token))
+
+
+def _ordered(value, order_by):
+    if order_by == '$key':
+        return sorted(value.items(), key=lambda item: item[0])
+    if order_by == '$value':
+        return sorted(value.items(), key=lambda item: _sort_key(item[1]))
+    return sorted(value.items(), key=lambda item: _sort_key(
+        item[1].get(order_by) if isinstance(item[1], dict) else None))
+
+
+def _sort_key(value):
+    # RTDB order: missing/null, false, true, numbers, strings, objects
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    return (4, 0)
+
+
+class Database(Reference):
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self._push_lock = threading.Lock()
+        self._last_push_time = 0
+        self._last_random = []
+        super().__init__(self)
+
+    def generate_key(self):
+        # Firebase push id: 8 chars of milliseconds then 12 random chars,
+        # incremented within the same millisecond so ids stay ordered
+        with self._push_lock:
+            now = int(time.time() * 1000)
+            if now == self._last_push_time:
+                for i in reversed(range(12)):
+                    if self._last_random[i] < 63:
+                        self._last_random[i] += 1
+                        break
+                    self._last_random[i] = 0
+            else:
+                self._last_random = [random.randrange(64) for _ in range(12)]
+            self._last_push_time = now
+            stamp = ''
+            for _ in range(8):
+                stamp = PUSH_CHARS[now % 64] + stamp
+                now //= 64
+            return stamp + ''.join(PUSH_CHARS[i] for i in self._last_random)
\ No newline at end of file
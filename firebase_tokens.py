@@ -0,0 +1,156 @@
+"""Local verification of Firebase ID tokens.
+
+Firebase ID tokens are RS256 JWTs signed with Google's rotating
+``securetoken`` keys. Instead of calling ``get_account_info`` on every request
+we verify the signature against the published certificates, which are cached
+for as long as their ``Cache-Control: max-age`` allows, and remember verified
+claims until the token itself expires.
+"""
+import base64
+import json
+import os
+import re
+import threading
+import time
+
+import requests
+
+try:
+    from cryptography import x509
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+except ImportError:
+    x509 = None
+
+CERTS_URL = os.getenv(
+    "FIREBASE_CERTS_URL",
+    "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+)
+DEFAULT_KEYS_MAX_AGE = 3600  # Used when the certificate response has no max-age
+CLOCK_SKEW = 60  # Seconds of leeway for iat/auth_time checks
+MAX_CACHED_TOKENS = 10000
+MIN_FORCED_REFRESH = 60  # Unknown key ids can't trigger refetches more often than this
+
+
+class TokenError(Exception):
+    pass
+
+
+def _b64decode(segment):
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+def fetch_signing_keys(url=CERTS_URL):
+    # Returns ({kid: pem_certificate}, max_age_seconds)
+    response = requests.get(url, timeout=10)
+    response.raise_for_status()
+    match = re.search(r'max-age=(\d+)', response.headers.get('Cache-Control', ''))
+    max_age = int(match.group(1)) if match else DEFAULT_KEYS_MAX_AGE
+    return response.json(), max_age
+
+
+class TokenVerifier:
+    def __init__(self, project_id, key_source=fetch_signing_keys, clock=time.time):
+        self.project_id = project_id
+        self.issuer = f"https://securetoken.google.com/{project_id}"
+        self.key_source = key_source
+        self.clock = clock
+        self._keys = {}
+        self._keys_expire_at = 0
+        self._fetched_at = 0
+        self._claims = {}
+        self._lock = threading.Lock()
+
+    def _keys_stale(self, now, force):
+        if now >= self._keys_expire_at:
+            return True
+        return force and now - self._fetched_at >= MIN_FORCED_REFRESH
+
+    def _public_keys(self, force=False):
+        now = self.clock()
+        if not self._keys_stale(now, force):
+            return self._keys
+        with self._lock:
+            if self._keys_stale(now, force):
+                certs, max_age = self.key_source()
+                self._keys = {
+                    kid: x509.load_pem_x509_certificate(pem.encode()).public_key()
+                    for kid, pem in certs.items()
+                }
+                self._fetched_at = now
+                self._keys_expire_at = now + max_age
+        return self._keys
+
+    def verify(self, token):
+        now = self.clock()
+        cached = self._claims.get(token)
+        if cached and cached['exp'] > now:
+            return cached
+
+        try:
+            header_segment, payload_segment, signature_segment = token.split('.')
+            header = json.loads(_b64decode(header_segment))
+            claims = json.loads(_b64decode(payload_segment))
+            signature = _b64decode(signature_segment)
+        except (ValueError, AttributeError) as e:
+            raise TokenError(f"Malformed ID token: {e}")
+
+        if header.get('alg') != 'RS256':
+            raise TokenError(f"Unexpected token algorithm: {header.get('alg')}")
+
+        kid = header.get('kid')
+        keys = self._public_keys()
+        if kid not in keys:
+            # Keys may have rotated before our cached copy expired
+            keys = self._public_keys(force=True)
+        if kid not in keys:
+            raise TokenError("ID token signed with an unknown key")
+
+        try:
+            keys[kid].verify(signature, f"{header_segment}.{payload_segment}".encode(),
+                             padding.PKCS1v15(), hashes.SHA256())
+        except InvalidSignature:
+            raise TokenError("Invalid ID token signature")
+
+        if claims.get('aud') != self.project_id:
+            raise TokenError("ID token has the wrong audience")
+        if claims.get('iss') != self.issuer:
+            raise TokenError("ID token has the wrong issuer")
+        if not claims.get('sub'):
+            raise TokenError("ID token has no subject")
+        if claims.get('exp', 0) <= now:
+            raise TokenError("ID token has expired")
+        if claims.get('iat', 0) > now + CLOCK_SKEW or claims.get('auth_time', 0) > now + CLOCK_SKEW:
+            raise TokenError("ID token issued in the future")
+
+        # Pruning iterates the cache, so no other thread may add to it meanwhile
+        with self._lock:
+            if len(self._claims) >= MAX_CACHED_TOKENS:
+                self._claims = {t: c for t, c in self._claims.items() if c['exp'] > now}
+                if len(self._claims) >= MAX_CACHED_TOKENS:
+                    self._claims.clear()
+            self._claims[token] = claims
+        return claims
+
+
+_verifier = None
+
+
+def get_verifier():
+    # None when verification can't run locally (no cryptography or project id)
+    global _verifier
+    if _verifier is None and x509 is not None and os.getenv("FIREBASE_PROJECT_ID"):
+        _verifier = TokenVerifier(os.getenv("FIREBASE_PROJECT_ID"))
+    return _verifier
+
+
+def preload_signing_keys():
+    # Fetch the signing keys before the first request; failures are retried on demand
+    verifier = get_verifier()
+    if verifier is None:
+        return
+    try:
+        verifier._public_keys()
+    except Exception as e:
+        print(f"Signing key preload error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""Gunicorn settings for the full profile: ``gunicorn wsgi:app`` reads this file.
+
+With ``preload_app`` the master imports the app once: views, yfinance and
+pandas, the Firebase clients, signing keys, market calendar, compiled
+templates and compressed static assets are all built before forking. The
+master then calls ``gc.freeze()``, so collections in the workers never write
+to those objects and the pages stay shared copy-on-write. Each forked worker
+opens its own connection pools (``factory.warm_worker``) before it accepts
+requests.
+
+Workers report metrics through files in ``METRICS_DIR``. The directory is
+cleared when the server starts, so totals begin at zero for each run.
+"""
+import gc
+import glob
+import multiprocessing
+import os
+import tempfile
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(multiprocessing.cpu_count() * 2 + 1, 8))))
+# Threads let slow upstream calls and live price streams share a worker. An
+# open price stream keeps its thread but only waits on a queue, so idle
+# threads cost a stack each and no CPU
+worker_class = 'gthread'
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+preload_app = True
+
+# Set before the app (and metrics) is imported
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), "flaskkanu-metrics"))
+# Live price streams may hold at most half of a worker's threads (none with a
+# single thread), so pages and /health always have threads left: 16 streams
+# per worker by default, or workers * 16 per server
+os.environ.setdefault("PRICE_STREAM_MAX_CONNECTIONS", str(threads // 2 if threads > 1 else 0))
+
+
+def on_starting(server):
+    for path in glob.glob(os.path.join(os.environ["METRICS_DIR"], "metrics-*.json*")):
+        os.remove(path)
+
+
+def when_ready(server):
+    # Everything the preloaded app allocated moves to the permanent generation
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from factory import warm_worker
+    warm_worker()
\ No newline at end of file
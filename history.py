@@ -0,0 +1,271 @@
+"""Daily OHLC price history with a local cache and LTTB downsampling.
+
+Bars are kept in an SQLite file (``HISTORY_DB``) along with the date ranges
+already fetched for each symbol, so a request only goes upstream for the
+days it is missing and repeat views are served locally. Today's bar is still
+forming: it is refetched once it is older than ``HISTORY_TODAY_TTL`` seconds.
+
+Long ranges are reduced with Largest-Triangle-Three-Buckets on the close
+price, which keeps the visual shape (peaks, troughs) of the series while
+sending only the requested number of points.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+import requests
+
+import metrics
+from async_quotes import HEADERS
+from market_calendar import IST
+
+# Chart API with the period1/period2/interval parameters added per request
+HISTORY_URL = os.getenv("YAHOO_HISTORY_URL", "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}")
+HISTORY_DB = os.getenv("HISTORY_DB", os.path.join(tempfile.gettempdir(), "history.db"))
+TODAY_TTL = int(os.getenv("HISTORY_TODAY_TTL", "900"))
+REQUEST_TIMEOUT = 10
+
+MAX_DAYS = 3660  # About ten years per request
+DEFAULT_POINTS = 300
+MIN_POINTS = 3  # LTTB keeps the first and last point and one per bucket between
+MAX_POINTS = 2000
+
+RANGES = {'1m': 31, '3m': 92, '6m': 183, '1y': 366, '3y': 1096, '5y': 1827, '10y': 3653}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL NOT NULL, volume INTEGER,
+    PRIMARY KEY (symbol, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT NOT NULL,
+    first_day INTEGER NOT NULL,
+    last_day INTEGER NOT NULL,
+    PRIMARY KEY (symbol, first_day)
+) WITHOUT ROWID;
+"""
+
+
+class HistoryError(ValueError):
+    pass
+
+
+def gaps(covered, first_day, last_day):
+    # Day ranges within [first_day, last_day] not covered by the sorted,
+    # non-overlapping (first, last) ranges in covered
+    missing = []
+    cursor = first_day
+    for start, end in covered:
+        if end < cursor:
+            continue
+        if start > last_day:
+            break
+        if start > cursor:
+            missing.append((cursor, min(start - 1, last_day)))
+        cursor = max(cursor, end + 1)
+        if cursor > last_day:
+            break
+    if cursor <= last_day:
+        missing.append((cursor, last_day))
+    return missing
+
+
+def merge_ranges(ranges):
+    # Sorted ranges with overlapping and adjacent ones joined
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def clamp_points(points):
+    # A requested point count within MIN_POINTS..MAX_POINTS
+    return max(MIN_POINTS, min(int(points), MAX_POINTS))
+
+
+def lttb(xs, ys, threshold):
+    # Indexes of the points Largest-Triangle-Three-Buckets keeps
+    count = len(xs)
+    if threshold >= count or threshold < 3:
+        return list(range(count))
+    selected = [0]
+    bucket_size = (count - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third vertex of the triangle
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, count)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(count - 1)
+    return selected
+
+
+def parse_chart(data):
+    # [(day, open, high, low, close, volume)] from a chart API response
+    results = ((data or {}).get('chart') or {}).get('result')
+    if not results:
+        return []
+    result = results[0]
+    offset = (result.get('meta') or {}).get('gmtoffset', 0) or 0
+    quote = ((result.get('indicators') or {}).get('quote') or [{}])[0]
+    columns = [quote.get(field) or [] for field in ('open', 'high', 'low', 'close', 'volume')]
+    bars = []
+    for i, stamp in enumerate(result.get('timestamp') or []):
+        opened, high, low, close, volume = (column[i] if i < len(column) else None for column in columns)
+        if close is None:
+            continue
+        # Bars are stamped at the session open; the exchange's date is the day
+        day = datetime.fromtimestamp(stamp + offset, timezone.utc).date().toordinal()
+        bars.append((day, opened, high, low, close, volume))
+    return bars
+
+
+def _epoch(day):
+    return int(datetime.combine(date.fromordinal(day), datetime.min.time(), timezone.utc).timestamp())
+
+
+def ist_today():
+    # Bars are dated in exchange time, whatever the server's timezone
+    return datetime.now(IST).date()
+
+
+class HistoryCache:
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._local = threading.local()
+        self._today_fetched = {}  # symbol -> (day, monotonic time) of the last fetch of today's bar
+        self._symbol_locks = defaultdict(threading.Lock)
+        self._session = requests.Session()
+        self._session.headers.update(HEADERS)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def fetch(self, symbol, first_day, last_day):
+        url = HISTORY_URL.format(symbol=symbol)
+        params = {'period1': _epoch(first_day), 'period2': _epoch(last_day + 1), 'interval': '1d'}
+        with metrics.upstream('yahoo_history') as call:
+            response = self._session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            call.status(response.status_code)
+        if response.status_code == 404:
+            return []
+        response.raise_for_status()
+        return parse_chart(response.json())
+
+    def _missing(self, symbol, first_day, last_day, today):
+        covered = self._connect().execute(
+            "SELECT first_day, last_day FROM coverage WHERE symbol = ? ORDER BY first_day", (symbol,)).fetchall()
+        missing = gaps(covered, first_day, min(last_day, today - 1))
+        if last_day >= today:
+            fetched = self._today_fetched.get(symbol)
+            if fetched is None or fetched[0] != today or time.monotonic() - fetched[1] > TODAY_TTL:
+                missing.append((today, today))
+        return merge_ranges(missing)
+
+    def bars(self, symbol, first_day, last_day):
+        # Concurrent requests for a symbol wait for one fetch instead of repeating it
+        with self._symbol_locks[symbol]:
+            self._fill(symbol, first_day, last_day)
+        return self._connect().execute(
+            "SELECT day, open, high, low, close, volume FROM bars WHERE symbol = ? AND day BETWEEN ? AND ? ORDER BY day",
+            (symbol, first_day, last_day)).fetchall()
+
+    def _fill(self, symbol, first_day, last_day):
+        today = ist_today().toordinal()
+        for start, end in self._missing(symbol, first_day, last_day, today):
+            fetched = self.fetch(symbol, start, end)
+            # Only complete days count as covered; today's bar is still forming
+            complete_end = min(end, today - 1)
+            with self._connect() as conn:
+                conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 [(symbol, *bar) for bar in fetched if start <= bar[0] <= end])
+                if start <= complete_end:
+                    covered = conn.execute("SELECT first_day, last_day FROM coverage WHERE symbol = ?",
+                                           (symbol,)).fetchall()
+                    conn.execute("DELETE FROM coverage WHERE symbol = ?", (symbol,))
+                    conn.executemany("INSERT INTO coverage VALUES (?, ?, ?)",
+                                     [(symbol, s, e) for s, e in merge_ranges(covered + [(start, complete_end)])])
+            if end >= today:
+                self._today_fetched[symbol] = (today, time.monotonic())
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HistoryCache()
+    return _cache
+
+
+def parse_period(range_name=None, start=None, end=None):
+    # (first_day, last_day) ordinals from ?range= or ?start=&end= (ISO dates)
+    today = ist_today()
+    try:
+        last = date.fromisoformat(end) if end else today
+        first = date.fromisoformat(start) if start else None
+    except ValueError:
+        raise HistoryError("Dates must be YYYY-MM-DD")
+    if first is None:
+        days = RANGES.get(range_name or '1y')
+        if days is None:
+            raise HistoryError(f"Unsupported range: {range_name}")
+        first = last - timedelta(days=days)
+    last = min(last, today)
+    if first > last:
+        raise HistoryError("start must not be after end")
+    if (last - first).days > MAX_DAYS:
+        raise HistoryError(f"At most {MAX_DAYS} days per request")
+    return first.toordinal(), last.toordinal()
+
+
+def price_history(symbol, first_day, last_day, points=DEFAULT_POINTS):
+    bars = get_cache().bars(symbol, first_day, last_day)
+    rows = [bars[i] for i in lttb([bar[0] for bar in bars], [bar[4] for bar in bars], points)]
+    # Column arrays keep the payload small
+    return {
+        'symbol': symbol,
+        'start': date.fromordinal(first_day).isoformat(),
+        'end': date.fromordinal(last_day).isoformat(),
+        'source_points': len(bars),
+        'points': len(rows),
+        'date': [date.fromordinal(row[0]).isoformat() for row in rows],
+        'open': [row[1] for row in rows],
+        'high': [row[2] for row in rows],
+        'low': [row[3] for row in rows],
+        'close': [row[4] for row in rows],
+        'volume': [row[5] for row in rows],
+    }
\ No newline at end of file
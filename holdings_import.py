@@ -0,0 +1,171 @@
+"""Bulk import of holdings from CSV, JSON or NDJSON files.
+
+Rows are parsed as a stream, every distinct symbol is validated once (in
+parallel), and the whole import is committed with one ``update_holdings``
+call to the portfolio store, the same write path single lots take: on
+Firebase one multi-location update for every lot, then one conditional
+write of the aggregates of the imported asset class. The lots are folded
+with ``ledger.apply_lot`` into the aggregates that call reads, after the
+slow symbol lookups, so a holding added meanwhile is built on rather than
+overwritten; each row keeps its lot id if the fold has to run again.
+
+Recognised columns (case-insensitive): ``type`` (stock / mutual_fund),
+``symbol``/``ticker``/``scheme_code``, ``quantity``/``units``,
+``price``/``purchase_price``/``purchase_nav``, and optional ``side`` and
+``date``.
+"""
+import csv
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import ledger
+from server_timing import phase
+
+MAX_IMPORT_ROWS = 5000
+LOOKUP_WORKERS = 8
+
+KEY_COLUMNS = ('symbol', 'ticker', 'scheme_code', 'fund_id')
+QUANTITY_COLUMNS = ('quantity', 'units')
+PRICE_COLUMNS = ('price', 'purchase_price', 'purchase_nav')
+FUND_TYPES = ('mutual_fund', 'mutual_funds', 'mf', 'fund')
+
+
+class HoldingsImportError(ValueError):
+    pass
+
+
+def _first(row, columns):
+    for column in columns:
+        value = row.get(column)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _iter_records(file_storage):
+    filename = (file_storage.filename or '').lower()
+    text = io.TextIOWrapper(file_storage.stream, encoding='utf-8-sig')
+
+    if filename.endswith('.ndjson') or filename.endswith('.jsonl'):
+        for line in text:
+            if line.strip():
+                yield json.loads(line)
+    elif filename.endswith('.json'):
+        data = json.load(text)
+        if isinstance(data, dict):
+            # {"stocks": [...], "mutual_funds": [...]}
+            for asset_class, records in data.items():
+                for record in records:
+                    yield dict(record, type=record.get('type', asset_class))
+        else:
+            yield from data
+    else:
+        yield from csv.DictReader(text)
+
+
+def parse_rows(file_storage):
+    # Yields (line, row, error) with rows normalised to asset_class/key/lot
+    for line, record in enumerate(_iter_records(file_storage), start=1):
+        if line > MAX_IMPORT_ROWS:
+            raise HoldingsImportError(f"Import files are limited to {MAX_IMPORT_ROWS} rows")
+
+        record = {str(k).strip().lower(): (v.strip() if isinstance(v, str) else v)
+                  for k, v in record.items() if k is not None}
+        try:
+            asset_type = str(record.get('type') or 'stock').lower()
+            asset_class = 'mutual_funds' if asset_type in FUND_TYPES else 'stocks'
+
+            key = _first(record, KEY_COLUMNS)
+            if not key:
+                raise ValueError("missing symbol")
+            key = str(key).strip().upper()
+            if asset_class == 'stocks' and (key.endswith('.NS') or key.endswith('.BO')):
+                key = key[:-3]
+
+            lot = ledger.new_lot(record.get('side') or 'buy',
+                                 _first(record, QUANTITY_COLUMNS),
+                                 _first(record, PRICE_COLUMNS),
+                                 timestamp=record.get('date') or None)
+            yield line, {'asset_class': asset_class, 'key': key, 'lot': lot}, None
+        except (TypeError, ValueError) as e:
+            yield line, None, str(e)
+
+
+def validate_symbols(rows, lookup_stock, lookup_fund):
+    # Look up each distinct symbol once, concurrently
+    wanted = {(row['asset_class'], row['key']) for row in rows}
+
+    def lookup(item):
+        asset_class, key = item
+        try:
+            return item, (lookup_fund(key) if asset_class == 'mutual_funds' else lookup_stock(key))
+        except Exception as e:
+            print(f"Import lookup error for {key}: {str(e)}")
+            return item, None
+
+    if not wanted:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(LOOKUP_WORKERS, len(wanted))) as pool:
+        return dict(pool.map(lookup, wanted))
+
+
+def build_import_entries(rows, holdings, infos, lot_ids):
+    # Fold every lot into the current {(asset_class, key): aggregate or None}
+    # holdings, with lot_ids {line: lot_id}; returns (entries, imported, errors)
+    aggregates = {}
+    entries = []
+    imported = 0
+    errors = []
+
+    for line, row in rows:
+        asset_class, key = row['asset_class'], row['key']
+        info = infos.get((asset_class, key))
+        if not info:
+            errors.append((line, f"{key} not found"))
+            continue
+
+        current = aggregates.get((asset_class, key))
+        if current is None:
+            current = dict(holdings.get((asset_class, key)) or {})
+        try:
+            aggregate = ledger.apply_lot(current, row['lot'], asset_class)
+        except ledger.LedgerError as e:
+            errors.append((line, str(e)))
+            continue
+
+        aggregate.update({k: v for k, v in info.items() if v is not None})
+        aggregates[(asset_class, key)] = aggregate
+        entries.append((asset_class, key, lot_ids[line], row['lot'], aggregate))
+        imported += 1
+
+    return entries, imported, errors
+
+
+def import_holdings(store, user_id, token, file_storage, lookup_stock, lookup_fund):
+    rows = []
+    errors = []
+    for line, row, error in parse_rows(file_storage):
+        if error:
+            errors.append((line, error))
+        else:
+            rows.append((line, row))
+
+    infos = validate_symbols([row for _, row in rows], lookup_stock, lookup_fund)
+    wanted = sorted({(row['asset_class'], row['key']) for _, row in rows if infos.get((row['asset_class'], row['key']))})
+    lot_ids = {line: store.new_lot_id() for line, _ in rows}
+    result = {'imported': 0, 'errors': []}
+
+    def build(holdings):
+        # Runs again on fresher aggregates if another write got in first
+        entries, result['imported'], result['errors'] = build_import_entries(rows, holdings, infos, lot_ids)
+        return entries
+
+    if wanted:
+        # Every imported lot and aggregate lands in one conditional update
+        with phase('db'):
+            store.update_holdings(user_id, wanted, build, token)
+    else:
+        build({})
+    errors.extend(result['errors'])
+    return result['imported'], [f"Line {line}: {error}" for line, error in sorted(errors)]
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""Append-only transaction ledger for stocks and mutual funds.
+
+Every buy or sell is stored as a lot of the security in the portfolio store.
+The running aggregate for the security (quantity held, weighted average cost
+and realized P&L) is kept on its holding and is updated incrementally with
+each lot, so page views never replay the ledger. Lots are folded in through
+the store's conditional update, so concurrent writes to one holding cannot
+lose each other's changes.
+"""
+import math
+from datetime import datetime
+
+from server_timing import phase
+
+# Field names used by the holdings node of each asset class
+ASSET_FIELDS = {
+    'stocks': ('quantity', 'purchase_price'),
+    'mutual_funds': ('units', 'purchase_nav'),
+}
+
+SIDES = ('buy', 'sell')
+
+
+class LedgerError(ValueError):
+    pass
+
+
+def new_lot(side, quantity, price, timestamp=None):
+    side = (side or 'buy').strip().lower()
+    if side not in SIDES:
+        raise LedgerError(f"Unknown transaction type: {side}")
+    quantity = float(quantity)
+    price = float(price)
+    if not math.isfinite(quantity) or quantity <= 0:
+        raise LedgerError("Quantity must be a number greater than zero")
+    if not math.isfinite(price) or price < 0:
+        raise LedgerError("Price must be a number that is not negative")
+    return {
+        'side': side,
+        'quantity': quantity,
+        'price': price,
+        'timestamp': timestamp or datetime.now().isoformat()
+    }
+
+
+def apply_lot(aggregate, lot, asset_class):
+    # Fold a single lot into the running aggregate without touching history
+    quantity_field, cost_field = ASSET_FIELDS[asset_class]
+    aggregate = dict(aggregate or {})
+
+    held = float(aggregate.get(quantity_field, 0) or 0)
+    average_cost = float(aggregate.get(cost_field, 0) or 0)
+    realized_pnl = float(aggregate.get('realized_pnl', 0) or 0)
+
+    if lot['side'] == 'buy':
+        new_held = held + lot['quantity']
+        average_cost = (held * average_cost + lot['quantity'] * lot['price']) / new_held
+        held = new_held
+    else:
+        if lot['quantity'] > held + 1e-9:
+            raise LedgerError(f"Cannot sell {lot['quantity']:g}, only {held:g} held")
+        realized_pnl += lot['quantity'] * (lot['price'] - average_cost)
+        held = max(held - lot['quantity'], 0.0)
+
+    aggregate[quantity_field] = held
+    aggregate[cost_field] = average_cost
+    aggregate['realized_pnl'] = realized_pnl
+    aggregate['lot_count'] = int(aggregate.get('lot_count', 0) or 0) + 1
+    aggregate['last_updated'] = lot['timestamp']
+    return aggregate
+
+
+def record_lot(store, user_id, asset_class, key, lot, token, details=None):
+    lot_id = store.new_lot_id()
+
+    def build(current):
+        # Runs again on a fresher aggregate if another write got in first
+        aggregate = apply_lot(current[(asset_class, key)], lot, asset_class)
+        if details:
+            aggregate.update({k: v for k, v in details.items() if v is not None})
+        return [(asset_class, key, lot_id, lot, aggregate)]
+
+    with phase('db'):
+        entries = store.update_holdings(user_id, [(asset_class, key)], build, token)
+    return entries[0][4]
+
+
+def get_lots(store, user_id, asset_class, key, token):
+    lots = store.get_lots(user_id, asset_class, key, token)
+    return [dict(lot, id=lot_id) for lot_id, lot in lots.items()]
\ No newline at end of file
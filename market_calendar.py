@@ -0,0 +1,124 @@
+"""NSE/BSE trading calendar and the quote cache lifetimes it implies.
+
+Both exchanges share equity session hours and holidays. The calendar is read
+from ``MARKET_CALENDAR_FILE`` (default ``market_calendar.json`` next to this
+module): regular session times in IST, holidays, and special sessions such
+as Muhurat trading. Without the file only weekends are closed.
+
+Quote lifetimes follow the market:
+
+* Stock quotes live ``QUOTE_TTL_OPEN`` seconds while a session is open and
+  for ``QUOTE_CLOSE_SETTLE`` seconds after it, while closing prices settle.
+  A quote fetched outside that stays valid until the next session opens.
+* NAVs change once per trading day, when fund houses publish in the evening.
+  A NAV stays valid until the next trading day's publishing window opens at
+  ``NAV_PUBLISH_START``; inside the window it is refetched every
+  ``NAV_TTL_PUBLISHING`` seconds until midnight.
+"""
+import json
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+CALENDAR_FILE = os.getenv("MARKET_CALENDAR_FILE",
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), "market_calendar.json"))
+QUOTE_TTL_OPEN = int(os.getenv("QUOTE_TTL_OPEN", "60"))
+QUOTE_CLOSE_SETTLE = int(os.getenv("QUOTE_CLOSE_SETTLE", "1800"))
+NAV_PUBLISH_START = time.fromisoformat(os.getenv("NAV_PUBLISH_START", "19:00"))
+NAV_TTL_PUBLISHING = int(os.getenv("NAV_TTL_PUBLISHING", "1800"))
+
+# Longest run of closed days to look across for the next session
+MAX_CLOSED_DAYS = 30
+
+
+def _times(pair):
+    return time.fromisoformat(pair[0]), time.fromisoformat(pair[1])
+
+
+class MarketCalendar:
+    def __init__(self, session=("09:15", "15:30"), holidays=(), special_sessions=None):
+        self.session = _times(session)
+        self.holidays = {date.fromisoformat(day) for day in holidays}
+        self.special_sessions = {date.fromisoformat(day): _times(times)
+                                 for day, times in (special_sessions or {}).items()}
+
+    @classmethod
+    def load(cls, path=CALENDAR_FILE):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            print(f"Market calendar {path} not found; only weekends are treated as closed")
+            return cls()
+        return cls(session=(data['session']['open'], data['session']['close']),
+                   holidays=data.get('holidays') or {},
+                   special_sessions=data.get('special_sessions'))
+
+    def hours(self, day):
+        # (open, close) IST datetimes of the day's session, or None when closed
+        if day in self.special_sessions:
+            opens, closes = self.special_sessions[day]
+        elif day.weekday() >= 5 or day in self.holidays:
+            return None
+        else:
+            opens, closes = self.session
+        return datetime.combine(day, opens, IST), datetime.combine(day, closes, IST)
+
+    def is_trading_day(self, day):
+        return self.hours(day) is not None
+
+    def is_open(self, moment):
+        hours = self.hours(moment.astimezone(IST).date())
+        return hours is not None and hours[0] <= moment < hours[1]
+
+    def next_open(self, moment):
+        # First session opening after moment
+        day = moment.astimezone(IST).date()
+        for offset in range(MAX_CLOSED_DAYS + 1):
+            hours = self.hours(day + timedelta(days=offset))
+            if hours is not None and hours[0] > moment:
+                return hours[0]
+        return moment + timedelta(days=1)
+
+    def stock_expiry(self, fetched):
+        hours = self.hours(fetched.date())
+        if hours is not None and hours[0] <= fetched < hours[1] + timedelta(seconds=QUOTE_CLOSE_SETTLE):
+            return fetched + timedelta(seconds=QUOTE_TTL_OPEN)
+        return self.next_open(fetched)
+
+    def nav_expiry(self, fetched):
+        day = fetched.date()
+        publishing = datetime.combine(day, NAV_PUBLISH_START, IST)
+        if self.is_trading_day(day) and fetched >= publishing:
+            return min(fetched + timedelta(seconds=NAV_TTL_PUBLISHING),
+                       datetime.combine(day + timedelta(days=1), time(), IST))
+        for offset in range(MAX_CLOSED_DAYS + 1):
+            if self.is_trading_day(day + timedelta(days=offset)):
+                return datetime.combine(day + timedelta(days=offset), NAV_PUBLISH_START, IST)
+        return fetched + timedelta(days=1)
+
+
+_calendar = None
+
+
+def get_calendar():
+    global _calendar
+    if _calendar is None:
+        _calendar = MarketCalendar.load()
+    return _calendar
+
+
+@lru_cache(maxsize=8192)
+def expires_at(kind, fetched):
+    # When a 'stock' or 'nav' quote goes stale. fetched is naive local time,
+    # as the caches store it; batched entries share it, hence the memo
+    fetched = fetched.astimezone(IST)
+    if kind == 'nav':
+        return get_calendar().nav_expiry(fetched)
+    return get_calendar().stock_expiry(fetched)
+
+
+def is_fresh(kind, fetched, now=None):
+    return (now or datetime.now(IST)) < expires_at(kind, fetched)
\ No newline at end of file
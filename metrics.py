@@ -0,0 +1,272 @@
+"""Process metrics with a Prometheus text-format exposition.
+
+Counters and histograms are kept in memory per process. When ``METRICS_DIR``
+is set (the gunicorn config does this), every worker also writes its
+snapshot to a ``METRICS_DIR/metrics-<pid>-*.json`` file every few seconds. A scrape
+of ``/metrics`` on any worker merges all the files:
+- counters and histograms are summed, including those of workers that have
+  exited, so totals never go backwards;
+- gauges are summed over live workers only.
+Without ``METRICS_DIR`` (e.g. on Vercel) ``/metrics`` reports the current
+process only.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_DIR = os.getenv("METRICS_DIR")
+FLUSH_INTERVAL = 5  # Seconds between snapshot writes in multi-process mode
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# name -> (type, help, buckets)
+DEFINITIONS = {
+    'http_requests_total': ('counter', "Requests by route, method and status", None),
+    'http_request_duration_seconds': ('histogram', "Request latency by route", LATENCY_BUCKETS),
+    'quote_cache_requests_total': ('counter', "Quote cache lookups by cache and result (hit/miss)", None),
+    'quote_cache_evictions_total': ('counter', "Quote cache entries removed, after expiry or to stay under the size bound", None),
+    'quote_cache_entries': ('gauge', "Entries currently held in each quote cache", None),
+    'upstream_requests_total': ('counter', "Upstream calls by provider and outcome (ok, empty, rate_limited, http_error, error)", None),
+    'upstream_request_duration_seconds': ('histogram', "Upstream call latency by provider", LATENCY_BUCKETS),
+    'stock_lookup_fallback_total': ('counter', "get_stock_data() upstream lookups by the fallback depth that answered", None),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.gauge_callbacks = {}
+        self._flusher_pid = None
+        self._path = None
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        self._ensure_flusher()
+
+    def observe(self, name, value, **labels):
+        buckets = DEFINITIONS[name][2]
+        key = (name, _label_key(labels))
+        with self._lock:
+            entry = self.histograms.get(key)
+            if entry is None:
+                entry = self.histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+        self._ensure_flusher()
+
+    def gauge(self, name, callback):
+        # callback() returns [(labels, value)], evaluated at snapshot time
+        self.gauge_callbacks[name] = callback
+
+    def snapshot(self):
+        with self._lock:
+            counters = [[name, list(labels), value] for (name, labels), value in self.counters.items()]
+            histograms = [[name, list(labels), list(entry[0]), entry[1], entry[2]]
+                          for (name, labels), entry in self.histograms.items()]
+        gauges = []
+        for name, callback in self.gauge_callbacks.items():
+            for labels, value in callback():
+                gauges.append([name, list(_label_key(labels)), value])
+        return {'pid': os.getpid(), 'counters': counters, 'histograms': histograms, 'gauges': gauges}
+
+    # Multi-process support
+
+    def _ensure_flusher(self):
+        # One flush thread per worker, started after fork on first use
+        if not METRICS_DIR or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            # Unique per process so a recycled pid never overwrites an exited worker's totals
+            self._path = os.path.join(METRICS_DIR, f"metrics-{os.getpid()}-{time.time_ns()}.json")
+        threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Metrics flush error: {str(e)}")
+
+    def flush(self):
+        self._ensure_flusher()
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        tmp_path = f"{self._path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, self._path)
+
+    def collect(self):
+        # Snapshots of every process to merge: this one plus the other workers' files
+        if not METRICS_DIR:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(METRICS_DIR, "metrics-*.json")):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not _alive(snapshot['pid']):
+                snapshot['gauges'] = []
+            snapshots.append(snapshot)
+        return snapshots
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merge(snapshots):
+    counters = {}
+    gauges = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, value in snapshot['gauges']:
+            key = (name, tuple(map(tuple, labels)))
+            gauges[key] = gauges.get(key, 0) + value
+        for name, labels, buckets, total, count in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            entry = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+            entry[0] = [a + b for a, b in zip(entry[0], buckets)]
+            entry[1] += total
+            entry[2] += count
+    return counters, gauges, histograms
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = ('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+               for k, v in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def exposition(snapshots):
+    counters, gauges, histograms = merge(snapshots)
+    lines = []
+    for name, (metric_type, help_text, buckets) in DEFINITIONS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        if metric_type == 'histogram':
+            for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                # Buckets are recorded cumulatively (every observation <= bound)
+                for bound, bucket_count in zip(buckets, counts):
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {bucket_count}")
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        else:
+            values = counters if metric_type == 'counter' else gauges
+            for (metric, labels), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def inc(name, value=1, **labels):
+    registry.inc(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    registry.observe(name, value, **labels)
+
+
+class UpstreamCall:
+    def __init__(self):
+        self.outcome = 'ok'
+
+    def status(self, status_code):
+        if status_code == 429:
+            self.outcome = 'rate_limited'
+        elif status_code >= 400:
+            self.outcome = 'http_error'
+
+
+def record_upstream(provider, started, outcome):
+    observe('upstream_request_duration_seconds', time.perf_counter() - started, provider=provider)
+    inc('upstream_requests_total', provider=provider, outcome=outcome)
+
+
+@contextmanager
+def upstream(provider):
+    # Times one upstream call; the body may set call.outcome or call.status(code)
+    call = UpstreamCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call.outcome = 'error'
+        raise
+    finally:
+        record_upstream(provider, started, call.outcome)
+
+
+def render():
+    return exposition(registry.collect())
+
+
+def init_app(app):
+    from flask import g, request
+
+    def start_timer():
+        g._metrics_started = time.perf_counter()
+
+    def record_request(response):
+        started = g.get('_metrics_started')
+        if started is None:
+            return response
+        # Label by URL rule, not path, so the number of series stays bounded
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        method = request.method
+        status = response.status_code
+
+        def record():
+            observe('http_request_duration_seconds', time.perf_counter() - started, route=route, method=method)
+            inc('http_requests_total', route=route, method=method, status=status)
+
+        if response.is_streamed:
+            response.call_on_close(record)
+        else:
+            record()
+        return response
+
+    app.before_request(start_timer)
+    app.after_request(record_request)
\ No newline at end of file
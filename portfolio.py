@@ -0,0 +1,155 @@
+"""Portfolio valuation: pricing holdings and caching the result per page.
+
+Builds the stock and mutual fund rows each page renders from the quote caches
+and keeps them in the valuation cache until the user's holdings or any quote
+they used change. ``portfolio_etag`` derives the page validator from the
+same inputs.
+"""
+import hashlib
+import json
+import os
+
+from quotes import get_stock_data, get_fund_data, prefetch_quotes, quote_version, quote_versions
+from valuation_cache import ValuationCache, holdings_fingerprint
+
+# Computed page valuations, reused until holdings or a held quote change
+valuation_cache = ValuationCache()
+
+# Changes every ETag when a new build is deployed
+ETAG_SALT = os.getenv("APP_VERSION", os.getenv("VERCEL_GIT_COMMIT_SHA", ""))
+
+# Price one holding; with refresh=False the stored data is used as-is
+def price_stock(ticker, details, refresh=True):
+    try:
+        if refresh:
+            # Use the stored symbol if available
+            symbol_to_use = details.get('symbol', ticker)
+            
+            # Get current stock data
+            stock_info = get_stock_data(symbol_to_use)
+            version_key = symbol_to_use.strip().upper()
+            
+            row = {
+                'name': details.get('name', stock_info['name']),
+                'current_price': stock_info['current_price'],
+                'quantity': details.get('quantity', 0),
+                'purchase_price': details.get('purchase_price', 0),
+                'exchange': details.get('exchange', stock_info['exchange']),
+                'symbol': details.get('symbol', symbol_to_use)
+            }
+            return row, version_key, quote_versions.get(version_key)
+    except Exception as e:
+        # Use existing data if fetch fails
+        pass
+    
+    row = {
+        'name': details.get('name', ticker),
+        'current_price': details.get('current_price', 0),
+        'quantity': details.get('quantity', 0),
+        'purchase_price': details.get('purchase_price', 0),
+        'exchange': details.get('exchange', 'Unknown'),
+        'symbol': details.get('symbol', ticker)
+    }
+    return row, None, None
+
+# Price a user's stocks, refreshing at most max_stocks_to_update quotes
+def build_stock_data(user_stocks, max_stocks_to_update):
+    stock_data = {}
+    quotes_used = {}
+    stock_count = 0
+    
+    prefetch_quotes([details.get('symbol', ticker) for ticker, details in list(user_stocks.items())[:max_stocks_to_update]])
+    for ticker, details in user_stocks.items():
+        # Check if we should update this stock or use existing data
+        should_update = stock_count < max_stocks_to_update
+        row, version_key, version = price_stock(ticker, details, refresh=should_update)
+        stock_data[ticker] = row
+        if version_key:
+            stock_count += 1
+            quotes_used[version_key] = version
+    
+    return stock_data, quotes_used
+
+# Price a user's mutual funds with their latest NAV
+def build_fund_data(user_funds):
+    fund_data = {}
+    quotes_used = {}
+    prefetch_quotes(scheme_codes=list(user_funds))
+    for scheme_code, details in user_funds.items():
+        try:
+            fund_info = get_fund_data(scheme_code)
+            if fund_info:
+                quotes_used[f"MF:{scheme_code}"] = quote_versions.get(f"MF:{scheme_code}")
+                fund_data[scheme_code] = {
+                    'name': fund_info['name'],
+                    'current_nav': fund_info['current_nav'],
+                    'units': details.get('units', 0),
+                    'purchase_nav': details.get('purchase_nav', 0)
+                }
+            else:
+                fund_data[scheme_code] = details
+        except Exception as e:
+            fund_data[scheme_code] = {
+                'name': f"Fund {scheme_code}",
+                'current_nav': 0,
+                'units': details.get('units', 0),
+                'purchase_nav': details.get('purchase_nav', 0),
+                'error': str(e)
+            }
+    return fund_data, quotes_used
+
+def portfolio_totals(stock_data, fund_data):
+    stock_value = sum(float(d.get('quantity', 0) or 0) * float(d.get('current_price', 0) or d.get('purchase_price', 0) or 0)
+                      for d in stock_data.values())
+    fund_value = sum(float(d.get('units', 0) or 0) * float(d.get('current_nav', 0) or d.get('purchase_nav', 0) or 0)
+                     for d in fund_data.values())
+    return {
+        'stocks_value': stock_value,
+        'mutual_funds_value': fund_value,
+        'total_value': stock_value + fund_value
+    }
+
+def user_fingerprint(user_data):
+    return holdings_fingerprint(dict(user_data.get('stocks') or {}), dict(user_data.get('mutual_funds') or {}))
+
+# Compute (or reuse) the valuation a page renders
+def get_valuation(view, user_id, user_data):
+    user_stocks = dict(user_data.get('stocks') or {})
+    user_funds = dict(user_data.get('mutual_funds') or {})
+    fingerprint = user_fingerprint(user_data)
+    
+    cached = valuation_cache.get(user_id, view, fingerprint, quote_version)
+    if cached is not None:
+        return cached
+    
+    quotes_used = {}
+    if view == 'dashboard':
+        # For dashboard, use cached data more aggressively
+        stock_data, quotes_used = build_stock_data(user_stocks, 3)
+        fund_data = user_funds
+    elif view == 'stocks':
+        # We'll update at most 5 stocks per page load
+        stock_data, quotes_used = build_stock_data(user_stocks, 5)
+        fund_data = {}
+    else:
+        stock_data = {}
+        fund_data, quotes_used = build_fund_data(user_funds)
+    
+    valuation = {
+        'stocks': stock_data,
+        'mutual_funds': fund_data,
+        'totals': portfolio_totals(stock_data, fund_data),
+        'quotes': quotes_used
+    }
+    # Quotes that failed to cache have no version and can't be validated later
+    if all(version is not None for version in quotes_used.values()):
+        valuation_cache.put(user_id, view, fingerprint, quotes_used, valuation)
+    return valuation
+
+# Strong validator from the user, their holdings version and the versions of
+# the quotes used. The token is left out: pages are requested with it in the
+# URL, so browsers already cache each token's pages separately
+def portfolio_etag(view, user_id, fingerprint, quote_keys):
+    versions = sorted((key, quote_version(key)) for key in quote_keys)
+    payload = json.dumps([ETAG_SALT, view, user_id, fingerprint, versions])
+    return hashlib.sha256(payload.encode()).hexdigest()
\ No newline at end of file
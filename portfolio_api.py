@@ -0,0 +1,122 @@
+"""Sorting, filtering, cursor pagination and field selection for the JSON API.
+
+Holdings rows are the dicts produced by ``portfolio_export.holding_rows``.
+Cursors are opaque keyset cursors: they encode the sort key of the last row
+returned, so pages stay consistent even if holdings are added in between.
+"""
+import base64
+import json
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+SORTS = ('value', 'pnl', 'symbol')
+PRICE_FIELDS = ('current_price', 'current_value', 'unrealized_pnl')
+ALL_FIELDS = ('asset_class', 'key', 'name', 'symbol', 'quantity', 'average_cost',
+              'current_price', 'invested_value', 'current_value', 'unrealized_pnl',
+              'realized_pnl')
+
+
+class ApiError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ApiError("Invalid cursor")
+    # Every sort key is a non-empty list, so anything else was tampered with
+    if not isinstance(values, list) or not values:
+        raise ApiError("Invalid cursor")
+    return values
+
+
+def parse_fields(value):
+    if not value:
+        return list(ALL_FIELDS)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in ALL_FIELDS]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def needs_prices(fields, sort):
+    return sort in ('value', 'pnl') or any(field in PRICE_FIELDS for field in fields)
+
+
+def sort_key(row, sort):
+    # Ties are broken on (asset_class, key) so the order is total and cursors are unambiguous
+    if sort == 'value':
+        value = row['current_value'] if row['current_value'] is not None else row['invested_value']
+        return [value, row['asset_class'], row['key']]
+    if sort == 'pnl':
+        return [row['unrealized_pnl'] or 0, row['asset_class'], row['key']]
+    return [row['key'], row['asset_class']]
+
+
+def filter_rows(rows, asset_class=None, prefix=None, min_value=None):
+    for row in rows:
+        if asset_class and row['asset_class'] != asset_class:
+            continue
+        if prefix and not row['key'].startswith(prefix.upper()):
+            continue
+        if min_value is not None:
+            value = row['current_value'] if row['current_value'] is not None else row['invested_value']
+            if value < min_value:
+                continue
+        yield row
+
+
+def paginate(rows, sort='value', order='desc', cursor=None, limit=DEFAULT_LIMIT):
+    # Returns (page_rows, next_cursor)
+    if sort not in SORTS:
+        raise ApiError(f"Unsupported sort: {sort}")
+    if order not in ('asc', 'desc'):
+        raise ApiError(f"Unsupported order: {order}")
+    limit = max(1, min(int(limit), MAX_LIMIT))
+
+    descending = order == 'desc'
+    keyed = sorted(((sort_key(row, sort), row) for row in rows),
+                   key=lambda item: item[0], reverse=descending)
+
+    if cursor:
+        after = decode_cursor(cursor)
+        try:
+            if descending:
+                keyed = [item for item in keyed if item[0] < after]
+            else:
+                keyed = [item for item in keyed if item[0] > after]
+        except TypeError:
+            # Cursor from a different sort
+            raise ApiError("Invalid cursor")
+
+    page = keyed[:limit]
+    next_cursor = encode_cursor(page[-1][0]) if len(keyed) > limit else None
+    return [row for _, row in page], next_cursor
+
+
+def select_fields(row, fields):
+    return {field: row.get(field) for field in fields}
+
+
+def summarize(rows):
+    totals = {'invested_value': 0.0, 'current_value': 0.0, 'unrealized_pnl': 0.0,
+              'realized_pnl': 0.0, 'holdings': 0}
+    by_class = {}
+    for row in rows:
+        value = row['current_value'] if row['current_value'] is not None else row['invested_value']
+        for bucket in (totals, by_class.setdefault(row['asset_class'], {'current_value': 0.0, 'holdings': 0})):
+            bucket['current_value'] += value
+            bucket['holdings'] += 1
+        totals['invested_value'] += row['invested_value']
+        totals['unrealized_pnl'] += value - row['invested_value']
+        totals['realized_pnl'] += row['realized_pnl']
+    totals = {k: round(v, 2) if isinstance(v, float) else v for k, v in totals.items()}
+    totals['by_asset_class'] = {k: dict(v, current_value=round(v['current_value'], 2)) for k, v in by_class.items()}
+    return totals
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""Streaming CSV / NDJSON export of holdings and ledger transactions.
+
+Rows are produced by generators and serialised one at a time, so an export
+never holds more than a single security's lots in memory and the first bytes
+can be sent before the rest of the data has been read.
+"""
+import csv
+import io
+import json
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+HOLDING_COLUMNS = ['asset_class', 'key', 'name', 'symbol', 'quantity', 'average_cost',
+                   'current_price', 'invested_value', 'current_value', 'unrealized_pnl',
+                   'realized_pnl']
+TRANSACTION_COLUMNS = ['asset_class', 'key', 'lot_id', 'timestamp', 'side', 'quantity', 'price']
+
+
+def holding_rows(holdings, stock_price, fund_price):
+    # stock_price/fund_price return a current price or None for a holding
+    for asset_class, quantity_field, cost_field, price_for in (
+            ('stocks', 'quantity', 'purchase_price', stock_price),
+            ('mutual_funds', 'units', 'purchase_nav', fund_price)):
+        for key, details in (holdings.get(asset_class) or {}).items():
+            quantity = float(details.get(quantity_field, 0) or 0)
+            average_cost = float(details.get(cost_field, 0) or 0)
+            current_price = price_for(key, details)
+            invested_value = quantity * average_cost
+            current_value = quantity * current_price if current_price is not None else None
+            yield {
+                'asset_class': asset_class,
+                'key': key,
+                'name': details.get('name', key),
+                'symbol': details.get('symbol', key),
+                'quantity': quantity,
+                'average_cost': round(average_cost, 4),
+                'current_price': current_price,
+                'invested_value': round(invested_value, 2),
+                'current_value': round(current_value, 2) if current_value is not None else None,
+                'unrealized_pnl': round(current_value - invested_value, 2) if current_value is not None else None,
+                'realized_pnl': round(float(details.get('realized_pnl', 0) or 0), 2)
+            }
+
+
+def transaction_rows(store, user_id, token):
+    # One key listing per asset class, then one read per security
+    for asset_class in ('stocks', 'mutual_funds'):
+        keys = store.lot_keys(user_id, asset_class, token)
+        for key in sorted(keys):
+            lots = store.get_lots(user_id, asset_class, key, token)
+            for lot_id, lot in lots.items():
+                yield {
+                    'asset_class': asset_class,
+                    'key': key,
+                    'lot_id': lot_id,
+                    'timestamp': lot.get('timestamp'),
+                    'side': lot.get('side'),
+                    'quantity': lot.get('quantity'),
+                    'price': lot.get('price')
+                }
+
+
+def _drain(buffer):
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    return value
+
+
+def to_csv(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    # The header goes out before any row is read
+    yield _drain(buffer)
+    for row in rows:
+        writer.writerow(row)
+        yield _drain(buffer)
+
+
+def to_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+def serialize(rows, columns, export_format):
+    if export_format == 'csv':
+        return to_csv(rows, columns)
+    return to_ndjson(rows)
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""Fan-out of quote changes to Server-Sent Events subscribers.
+
+The quote caches publish to the hub whenever a cached price changes, whatever
+caused the refresh (a page view, an API call or the background refresher).
+Each SSE connection subscribes to the quote keys its user holds, so a single
+upstream refresh reaches every connected user holding that symbol. The
+refresher only runs while someone is subscribed and only re-requests quotes
+through the normal cached lookup, so it adds no upstream calls of its own
+while cached quotes are still fresh.
+
+Streams end every few minutes and the browser reconnects with the same token.
+``StreamHoldingsCache`` keeps the user and holdings behind a token across
+those reconnects, so a reconnect does not check the token or read the store
+again.
+"""
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+REFRESH_INTERVAL = 30  # Seconds between refresh passes over subscribed symbols
+QUEUE_SIZE = 256
+HOLDINGS_TTL = 300  # Seconds a stream token's holdings are reused
+MAX_HOLDINGS_ENTRIES = 2000
+
+ASSET_FIELDS = {
+    'stocks': ('quantity', 'purchase_price', 'current_price'),
+    'mutual_funds': ('units', 'purchase_nav', 'current_nav'),
+}
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def holding_quote_key(asset_class, key, details):
+    # Same keys as the quote caches: upper-cased symbol, "MF:" prefix for NAVs
+    if asset_class == 'mutual_funds':
+        return f"MF:{key}"
+    return str(details.get('symbol', key)).strip().upper()
+
+
+class Subscription:
+    def __init__(self, keys):
+        self.keys = set(keys)
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class PriceHub:
+    def __init__(self, refresh=None, refresh_interval=REFRESH_INTERVAL):
+        # refresh(key) re-reads one quote through the shared cache
+        self.refresh = refresh
+        self.refresh_interval = refresh_interval
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._refresher = None
+
+    def subscribe(self, keys):
+        subscription = Subscription(keys)
+        with self._lock:
+            for key in subscription.keys:
+                self._subscribers.setdefault(key, set()).add(subscription)
+            self._start_refresher()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for key in subscription.keys:
+                subscribers = self._subscribers.get(key)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[key]
+
+    def subscribed_keys(self):
+        with self._lock:
+            return list(self._subscribers)
+
+    def publish(self, key, price):
+        with self._lock:
+            subscribers = list(self._subscribers.get(key, ()))
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait((key, price))
+            except queue.Full:
+                # A stalled client only loses intermediate ticks
+                pass
+
+    def _start_refresher(self):
+        if self.refresh is None or (self._refresher and self._refresher.is_alive()):
+            return
+        self._refresher = threading.Thread(target=self._refresh_loop, name="price-refresher", daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            for key in self.subscribed_keys():
+                try:
+                    self.refresh(key)
+                except Exception as e:
+                    print(f"Price refresh error for {key}: {str(e)}")
+
+
+class StreamHoldingsCache:
+    """(user_id, holdings) per stream token, reused across reconnects.
+
+    Entries expire after ttl seconds, so writes made through another worker
+    show up within that time; writes made through this process invalidate
+    the user's entries at once.
+    """
+
+    def __init__(self, ttl=HOLDINGS_TTL, max_entries=MAX_HOLDINGS_ENTRIES, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[0] <= self.clock():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return entry[1], entry[2]
+
+    def put(self, token, user_id, holdings):
+        with self._lock:
+            self._entries[token] = (self.clock() + self.ttl, user_id, holdings)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            for token in [token for token, entry in self._entries.items() if entry[1] == user_id]:
+                del self._entries[token]
+
+
+class PortfolioValuation:
+    """Running valuation of one user's holdings, updated one quote at a time."""
+
+    def __init__(self, holdings, price_for):
+        # price_for(asset_class, key, details) returns a known price or None
+        self.positions = {}
+        self.rows = {}
+        for asset_class, (quantity_field, cost_field, _) in ASSET_FIELDS.items():
+            for key, details in (holdings.get(asset_class) or {}).items():
+                quote_key = holding_quote_key(asset_class, key, details)
+                quantity = float(details.get(quantity_field, 0) or 0)
+                cost = float(details.get(cost_field, 0) or 0)
+                self.positions.setdefault(quote_key, []).append((asset_class, key))
+                self.rows[(asset_class, key)] = {
+                    'asset_class': asset_class,
+                    'key': key,
+                    'quantity': quantity,
+                    'invested_value': quantity * cost,
+                    'current_price': None
+                }
+                self._set_price(self.rows[(asset_class, key)], price_for(asset_class, key, details) or cost)
+
+    def quote_keys(self):
+        return list(self.positions)
+
+    def _set_price(self, row, price):
+        row['current_price'] = price
+        row['current_value'] = round(row['quantity'] * price, 2)
+        row['unrealized_pnl'] = round(row['current_value'] - row['invested_value'], 2)
+
+    def update(self, quote_key, price):
+        # Returns the rows whose value changed
+        changed = []
+        if not price:
+            return changed
+        for position in self.positions.get(quote_key, ()):
+            row = self.rows[position]
+            if row['current_price'] != price:
+                self._set_price(row, price)
+                changed.append(dict(row))
+        return changed
+
+    def totals(self):
+        totals = {'stocks_value': 0.0, 'mutual_funds_value': 0.0}
+        for row in self.rows.values():
+            totals[f"{row['asset_class']}_value"] += row['current_value']
+        totals['total_value'] = totals['stocks_value'] + totals['mutual_funds_value']
+        return {k: round(v, 2) for k, v in totals.items()}
+
+    def snapshot(self):
+        return {'holdings': [dict(row) for row in self.rows.values()], 'totals': self.totals()}
+
+
+def portfolio_events(hub, valuation, max_seconds, heartbeat=15, retry_ms=5000):
+    """SSE body for one connection: a snapshot, then holding and total deltas.
+
+    The stream ends after max_seconds so a connection never pins a worker
+    indefinitely; EventSource reconnects on its own after retry_ms.
+    """
+    subscription = hub.subscribe(valuation.quote_keys())
+    try:
+        yield f"retry: {retry_ms}\n"
+        yield format_event('snapshot', valuation.snapshot())
+        deadline = time.time() + max_seconds
+        while time.time() < deadline:
+            message = subscription.get(timeout=min(heartbeat, max(deadline - time.time(), 0.1)))
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            changed = valuation.update(*message)
+            if changed:
+                yield format_event('holdings', changed)
+                yield format_event('totals', valuation.totals())
+    finally:
+        hub.unsubscribe(subscription)
\ No newline at end of file
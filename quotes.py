@@ -0,0 +1,497 @@
+"""Shared quote and NAV caches and the upstream lookups that fill them.
+
+Stock quotes are cached by upper-cased ticker and NAVs by scheme code, for as
+long as ``market_calendar`` says the price can't have moved. A ticker no
+source could price is remembered apart from the cache, for a fixed
+``FAILED_LOOKUP_TTL`` seconds, so it is neither retried on every view nor
+stuck at zero until the next session. Every
+cache write that changes a price bumps the quote's version (used to validate
+cached valuations and ETags) and is published to the live price hub.
+Lookups go through the async engine when httpx is available; the yfinance
+cascade is only a fallback and yfinance itself is imported on first use.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from datetime import datetime
+from functools import partial
+
+import requests
+
+import market_calendar
+import metrics
+from async_quotes import (BATCH_TIMEOUT, CHART_URL, OPTIONS_URL, MFAPI_URL, HEDGE, HEDGE_GRACE, REQUEST_TIMEOUT,
+                          best_so_far, exchange_symbols, get_engine, settle)
+from price_stream import PriceHub
+from server_timing import phase, record
+
+# Cache for stock data to reduce API calls
+stock_cache = {}
+nav_cache = {}
+CACHE_DURATION = 3600  # Fixed lifetime in seconds when MARKET_HOURS_TTL=0
+MARKET_HOURS_TTL = os.getenv("MARKET_HOURS_TTL", "1") != "0"
+
+# Entries per cache; past it expired quotes are removed, then the oldest
+# written, down to EVICT_TO of the bound so a sweep doesn't run on every write
+QUOTE_CACHE_MAX_ENTRIES = int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", "5000"))
+EVICT_TO = 0.9
+_evict_lock = threading.Lock()
+
+# Tickers every source failed on -> when the last lookup failed
+failed_lookups = {}
+FAILED_LOOKUP_TTL = int(os.getenv("FAILED_LOOKUP_TTL", "300"))
+
+# Concurrent upstream fetching (None without httpx, leaving the blocking lookups)
+quote_engine = get_engine()
+
+# Bumped whenever a cached price changes, keyed like the caches ("MF:" prefix for NAVs)
+quote_versions = {}
+
+# Fans cached price changes out to live price streams; the full profile lets
+# it refresh subscribed quotes in the background
+price_hub = PriceHub(refresh_interval=int(os.getenv("PRICE_REFRESH_SECONDS", "30")))
+
+# get_stock_data() upstream fallback order; the index is the recorded depth
+FALLBACK_SOURCES = ('engine', 'yfinance_nse', 'yfinance_bse', 'yahoo_chart', 'yahoo_options', 'none')
+
+_yfinance = None
+
+# Threads for hedged blocking lookups: one per exchange plus the chart API
+HEDGE_WORKERS = int(os.getenv("QUOTE_HEDGE_WORKERS", "16"))
+_hedge_pool = None
+
+def load_yfinance():
+    # The yfinance module, or None when it isn't installed or YFINANCE_FALLBACK=0
+    global _yfinance
+    if _yfinance is None and os.getenv("YFINANCE_FALLBACK", "1") == "0":
+        _yfinance = False
+    if _yfinance is None:
+        try:
+            import yfinance
+            _yfinance = yfinance
+        except ImportError:
+            _yfinance = False
+    return _yfinance or None
+
+def record_fallback(source):
+    metrics.inc('stock_lookup_fallback_total', depth=FALLBACK_SOURCES.index(source), source=source)
+
+def cache_entries():
+    return [({'cache': 'stock'}, len(stock_cache)), ({'cache': 'nav'}, len(nav_cache))]
+
+metrics.registry.gauge('quote_cache_entries', cache_entries)
+
+def is_fresh(cache, cache_time):
+    # Short-lived while the market trades, kept until the next open once closed
+    if not MARKET_HOURS_TTL:
+        return (datetime.now() - cache_time).total_seconds() < CACHE_DURATION
+    return market_calendar.is_fresh('nav' if cache is nav_cache else 'stock', cache_time)
+
+def recently_failed(ticker):
+    failed_at = failed_lookups.get(ticker)
+    return failed_at is not None and (datetime.now() - failed_at).total_seconds() < FAILED_LOOKUP_TTL
+
+def failed_quote(base_ticker):
+    # What callers get for a ticker no source could price
+    return {
+        'name': base_ticker,
+        'current_price': 0,
+        'exchange': 'Unknown',
+        'symbol': base_ticker
+    }
+
+def cache_state(cache, key):
+    # 'hit', 'expired' or 'miss', counted for the cache metrics
+    entry = cache.get(key)
+    if entry is None:
+        state = 'miss'
+    elif is_fresh(cache, entry[0]):
+        state = 'hit'
+    else:
+        state = 'expired'
+    metrics.inc('quote_cache_requests_total', cache='stock' if cache is stock_cache else 'nav',
+                result='hit' if state == 'hit' else 'miss')
+    return state
+
+def evict(cache):
+    # Versions are kept, so a re-fetched quote never reuses an old version
+    name = 'stock' if cache is stock_cache else 'nav'
+    with _evict_lock:
+        if len(cache) <= QUOTE_CACHE_MAX_ENTRIES:
+            return
+        expired = [key for key, entry in list(cache.items()) if not is_fresh(cache, entry[0])]
+        for key in expired:
+            cache.pop(key, None)
+        metrics.inc('quote_cache_evictions_total', len(expired), cache=name, reason='expired')
+        excess = len(cache) - int(QUOTE_CACHE_MAX_ENTRIES * EVICT_TO)
+        if excess > 0:
+            # Dicts keep insertion order and cache_quote re-inserts on write
+            for key in list(cache)[:excess]:
+                cache.pop(key, None)
+            metrics.inc('quote_cache_evictions_total', excess, cache=name, reason='capacity')
+
+def start_refreshers():
+    price_hub.refresh = refresh_quote
+
+def preload():
+    # Import what the first quote lookup would otherwise pay for
+    load_yfinance()
+
+def cache_quote(cache, key, version_key, current_time, result, price_field):
+    if cache is stock_cache:
+        failed_lookups.pop(key, None)
+    # Popped first so the entry moves to the end, where eviction takes it last
+    previous = cache.pop(key, None)
+    cache[key] = (current_time, result)
+    if previous is None or previous[1].get(price_field) != result.get(price_field):
+        quote_versions[version_key] = quote_versions.get(version_key, 0) + 1
+        price_hub.publish(version_key, result.get(price_field))
+    if len(cache) > QUOTE_CACHE_MAX_ENTRIES:
+        evict(cache)
+
+def quote_version(version_key):
+    # Current version of a cached quote, or None once it has expired
+    if version_key.startswith('MF:'):
+        cache, key = nav_cache, version_key[3:]
+    else:
+        cache, key = stock_cache, version_key
+    entry = cache.get(key)
+    if entry is None or not is_fresh(cache, entry[0]):
+        return None
+    return quote_versions.get(version_key)
+
+def yfinance_quote(yf, symbol, exchange):
+    # One exchange's quote through yfinance, or None
+    provider = f"yfinance_{exchange.lower()}"
+    started = time.perf_counter()
+    outcome = 'empty'
+    try:
+        # Use a more reliable method to get current price
+        stock = yf.Ticker(symbol)
+    
+        # Try multiple methods to get the price
+        price = None
+        name = None
+    
+        # Method 1: Try getting from recent history
+        try:
+            hist = stock.history(period="1d")
+            if not hist.empty and 'Close' in hist.columns:
+                price = float(hist['Close'].iloc[-1])
+        except Exception as e:
+            print(f"{exchange} history error: {str(e)}")
+    
+        # Method 2: Try getting from quote
+        if price is None:
+            try:
+                todays_data = stock.info
+                price = float(todays_data.get('regularMarketPrice', 0))
+                if price == 0:
+                    price = float(todays_data.get('previousClose', 0))
+            except Exception as e:
+                print(f"{exchange} quote error: {str(e)}")
+    
+        # Get company name
+        try:
+            info = stock.info
+            name = info.get('shortName', info.get('longName', symbol))
+        except Exception as e:
+            print(f"{exchange} name error: {str(e)}")
+            name = symbol
+    
+        if price and price > 0:
+            metrics.record_upstream(provider, started, 'ok')
+            return {
+                'name': name,
+                'current_price': price,
+                'exchange': exchange,
+                'symbol': symbol
+            }
+    except Exception as e:
+        outcome = 'error'
+        print(f"{exchange} overall error: {str(e)}")
+    metrics.record_upstream(provider, started, outcome)
+    return None
+
+def direct_chart_quote(base_ticker):
+    # The NSE quote straight from Yahoo's chart API, or None
+    try:
+        url = CHART_URL.format(symbol=f"{base_ticker}.NS")
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+        with metrics.upstream('yahoo_chart') as call:
+            response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            call.status(response.status_code)
+        if response.status_code == 200:
+            data = response.json()
+            if 'chart' in data and 'result' in data['chart'] and data['chart']['result']:
+                result = data['chart']['result'][0]
+                if 'meta' in result and 'regularMarketPrice' in result['meta']:
+                    price = float(result['meta']['regularMarketPrice'])
+                    name = base_ticker
+                    if 'shortName' in result['meta']:
+                        name = result['meta']['shortName']
+                    
+                    return {
+                        'name': name,
+                        'current_price': price,
+                        'exchange': 'NSE',
+                        'symbol': f"{base_ticker}.NS"
+                    }
+    except Exception as e:
+        print(f"Direct Yahoo API error: {str(e)}")
+    return None
+
+def direct_options_quote(base_ticker):
+    # The NSE quote from Yahoo's options endpoint, which may be less rate-limited, or None
+    try:
+        url = OPTIONS_URL.format(symbol=f"{base_ticker}.NS")
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+        with metrics.upstream('yahoo_options') as call:
+            response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            call.status(response.status_code)
+        if response.status_code == 200:
+            data = response.json()
+            if 'optionChain' in data and 'result' in data['optionChain'] and data['optionChain']['result']:
+                result = data['optionChain']['result'][0]
+                if 'quote' in result:
+                    quote = result['quote']
+                    price = float(quote.get('regularMarketPrice', 0))
+                    name = quote.get('shortName', quote.get('longName', base_ticker))
+                    
+                    if price and price > 0:
+                        return {
+                            'name': name,
+                            'current_price': price,
+                            'exchange': 'NSE',
+                            'symbol': f"{base_ticker}.NS"
+                        }
+    except Exception as e:
+        print(f"Alternative API error: {str(e)}")
+    return None
+
+def hedge_executor():
+    # Created per process, so a forked worker never inherits the parent's threads
+    global _hedge_pool
+    if _hedge_pool is None or _hedge_pool[0] != os.getpid():
+        _hedge_pool = (os.getpid(), ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="quote-hedge"))
+    return _hedge_pool[1]
+
+def hedge(lookups, timeout=BATCH_TIMEOUT):
+    # Runs [(source, lookup)] at once; returns (source, result) for the best
+    # valid result by rank, or (None, None). Waits at most timeout seconds in
+    # all, however slow yfinance is; losers finish in the background
+    futures = [hedge_executor().submit(lookup) for _, lookup in lookups]
+    pending = set(futures)
+    results = {}
+    overall = time.monotonic() + timeout
+    deadline = None
+    while pending:
+        remaining = (overall if deadline is None else min(deadline, overall)) - time.monotonic()
+        done, pending = wait(pending, timeout=max(0.0, remaining), return_when=FIRST_COMPLETED)
+        if not done:
+            break  # The grace period for a preferred source, or the overall deadline, ran out
+        for future in done:
+            results[futures.index(future)] = future.result()
+        decided, rank = settle(results, len(futures))
+        if decided:
+            break
+        if deadline is None and best_so_far(results) is not None:
+            deadline = time.monotonic() + HEDGE_GRACE
+    rank = best_so_far(results)
+    if rank is None:
+        return None, None
+    return lookups[rank][0], results[rank]
+
+# Function to get stock data with caching and rate limiting
+def get_stock_data(ticker):
+    # Cache hits and upstream lookups are timed as separate phases
+    started = time.perf_counter()
+    if cache_state(stock_cache, ticker.strip().upper()) == 'hit':
+        cached = get_cached_stock_data(ticker)
+        if cached is not None:
+            record('quotes_hit', started)
+            return cached
+    try:
+        return lookup_stock_data(ticker)
+    finally:
+        record('quotes_miss', started)
+
+def lookup_stock_data(ticker):
+    # Clean the ticker input
+    ticker = ticker.strip().upper()
+    
+    # Check if data is in cache and not expired
+    current_time = datetime.now()
+    if ticker in stock_cache:
+        cache_time, cache_data = stock_cache[ticker]
+        if is_fresh(stock_cache, cache_time):
+            return cache_data
+    
+    # Remove any existing suffixes
+    if ticker.endswith('.NS') or ticker.endswith('.BO'):
+        base_ticker = ticker[:-3]
+    else:
+        base_ticker = ticker
+    
+    if recently_failed(ticker):
+        return failed_quote(base_ticker)
+    
+    # The async engine hedges the exchanges and tries the options quote without
+    # sleeping; the yfinance lookups below are only the fallback, and skip the
+    # upstream sources the engine has already tried
+    tried = ()
+    if quote_engine is not None:
+        try:
+            result = quote_engine.fetch_stock(ticker)
+            tried = quote_engine.stock_sources
+        except FutureTimeoutError:
+            # Still in flight on the engine: asking the same endpoints again
+            # would only wait behind it
+            print(f"Quote engine timed out for {ticker}")
+            tried = quote_engine.stock_sources
+            result = None
+        except Exception as e:
+            print(f"Quote engine error: {str(e)}")
+            result = None
+        if result:
+            record_fallback('engine')
+            cache_quote(stock_cache, ticker, ticker, current_time, result, 'current_price')
+            return result
+    
+    # yfinance is imported on first use so the lean profile never loads it
+    yf = load_yfinance()
+    exchange_lookups = []
+    if yf is not None:
+        exchange_lookups = [(f"yfinance_{exchange.lower()}", partial(yfinance_quote, yf, symbol, exchange))
+                            for symbol, exchange in exchange_symbols(base_ticker)]
+    lookups = exchange_lookups
+    if 'yahoo_chart' not in tried:
+        lookups = lookups + [('yahoo_chart', partial(direct_chart_quote, base_ticker))]
+    
+    if HEDGE:
+        # Every exchange and the chart API at once, so no spacing between calls
+        source, result = hedge(lookups)
+    else:
+        source, result = None, None
+        for source, lookup in lookups:
+            # Add a small random delay to avoid rate limiting (0.5 to 2 seconds)
+            time.sleep(random.uniform(0.5, 2))
+            result = lookup()
+            if result:
+                break
+    if result:
+        record_fallback(source)
+        cache_quote(stock_cache, ticker, ticker, current_time, result, 'current_price')
+        return result
+    
+    # Try alternative API for Indian stocks
+    if 'yahoo_options' not in tried:
+        result = direct_options_quote(base_ticker)
+        if result:
+            record_fallback('yahoo_options')
+            cache_quote(stock_cache, ticker, ticker, current_time, result, 'current_price')
+            return result
+    
+    # If everything fails, return default values and hold off retrying for a
+    # while; the failure is not a price change, so nothing is versioned or published
+    record_fallback('none')
+    failed_lookups[ticker] = current_time
+    if len(failed_lookups) > QUOTE_CACHE_MAX_ENTRIES:
+        for failed in [t for t in list(failed_lookups) if not recently_failed(t)]:
+            failed_lookups.pop(failed, None)
+    return failed_quote(base_ticker)
+
+# Return cached stock data without calling any upstream API
+def get_cached_stock_data(ticker):
+    ticker = ticker.strip().upper()
+    if ticker in stock_cache:
+        cache_time, cache_data = stock_cache[ticker]
+        if is_fresh(stock_cache, cache_time):
+            return cache_data
+    return None
+
+# Function to get mutual fund NAV data with caching
+def get_fund_data(scheme_code):
+    with phase('nav'):
+        cache_state(nav_cache, scheme_code)
+        return lookup_fund_data(scheme_code)
+
+def lookup_fund_data(scheme_code):
+    current_time = datetime.now()
+    if scheme_code in nav_cache:
+        cache_time, cache_data = nav_cache[scheme_code]
+        if is_fresh(nav_cache, cache_time):
+            return cache_data
+    
+    if quote_engine is not None:
+        try:
+            result = quote_engine.fetch_nav(scheme_code)
+            if result:
+                cache_quote(nav_cache, scheme_code, f"MF:{scheme_code}", current_time, result, 'current_nav')
+            return result
+        except Exception as e:
+            print(f"Quote engine error: {str(e)}")
+    
+    with metrics.upstream('mfapi') as call:
+        response = requests.get(MFAPI_URL.format(code=scheme_code), timeout=REQUEST_TIMEOUT)
+        call.status(response.status_code)
+    if response.status_code != 200:
+        return None
+    fund_info = response.json()
+    if not fund_info.get('meta'):
+        return None
+    result = {
+        'name': fund_info['meta'].get('scheme_name', f"Fund {scheme_code}"),
+        'current_nav': float(fund_info.get('data', [{}])[0].get('nav', 0))
+    }
+    cache_quote(nav_cache, scheme_code, f"MF:{scheme_code}", current_time, result, 'current_nav')
+    return result
+
+# Re-read one quote through the cache (used by the live price refresher)
+def refresh_quote(version_key):
+    if version_key.startswith('MF:'):
+        return get_fund_data(version_key[3:])
+    return get_stock_data(version_key)
+
+# Fetch every uncached quote a page needs in one concurrent batch
+def prefetch_quotes(tickers=(), scheme_codes=()):
+    if quote_engine is None:
+        return
+    tickers = [t.strip().upper() for t in tickers
+               if get_cached_stock_data(t) is None and not recently_failed(t.strip().upper())]
+    scheme_codes = [c for c in scheme_codes
+                    if c not in nav_cache or not is_fresh(nav_cache, nav_cache[c][0])]
+    if not tickers and not scheme_codes:
+        return
+    try:
+        current_time = datetime.now()
+        if tickers:
+            with phase('quotes_miss'):
+                for ticker, result in quote_engine.fetch_stocks(tickers).items():
+                    cache_quote(stock_cache, ticker, ticker, current_time, result, 'current_price')
+        if scheme_codes:
+            with phase('nav'):
+                for scheme_code, result in quote_engine.fetch_navs(scheme_codes).items():
+                    cache_quote(nav_cache, scheme_code, f"MF:{scheme_code}", current_time, result, 'current_nav')
+    except Exception as e:
+        # Anything not prefetched is looked up one by one as before
+        print(f"Quote prefetch error: {str(e)}")
+
+def export_stock_price(ticker, details):
+    # Exports never wait on upstream APIs: use the quote cache or the stored price
+    cached = get_cached_stock_data(details.get('symbol', ticker))
+    if cached and cached['current_price']:
+        return cached['current_price']
+    return details.get('current_price') or None
+
+def export_fund_price(scheme_code, details):
+    cached = nav_cache.get(scheme_code)
+    if cached and is_fresh(nav_cache, cached[0]) and cached[1]['current_nav']:
+        return cached[1]['current_nav']
+    return details.get('current_nav') or None
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""URL rules for the views, kept apart so registering them imports nothing."""
+
+# (rule, endpoint, methods); each endpoint is the name of a function in views.py
+ROUTES = [
+    ('/', 'index', ['GET']),
+    ('/login', 'login', ['POST']),
+    ('/dashboard', 'dashboard', ['GET']),
+    ('/stocks', 'stocks', ['GET']),
+    ('/get_stock_info', 'get_stock_info', ['POST']),
+    ('/add_stock', 'add_stock', ['POST']),
+    ('/import_holdings', 'import_holdings', ['POST']),
+    ('/mutual_funds', 'mutual_funds', ['GET']),
+    ('/mutual-funds', 'mutual_funds', ['GET']),
+    ('/add_mutual_fund', 'add_mutual_fund', ['POST']),
+    ('/export', 'export_portfolio', ['GET']),
+    ('/api/portfolio', 'api_portfolio', ['GET']),
+    ('/api/portfolio/holdings', 'api_portfolio_holdings', ['GET']),
+    ('/api/portfolio/history', 'api_portfolio_history', ['GET']),
+    ('/api/history/<symbol>', 'price_history', ['GET']),
+    ('/logout', 'logout', ['GET']),
+    ('/api/fetch_stock_data', 'fetch_stock_data', ['POST']),
+    ('/fetch_stock_data', 'fetch_stock_data', ['GET']),
+    ('/health', 'health', ['GET']),
+    ('/metrics', 'prometheus_metrics', ['GET']),
+]
+
+# Long-lived price streams need a server; serverless invocations are time-boxed
+FULL_ROUTES = [
+    ('/api/stream/prices', 'price_stream', ['GET']),
+]
+
+LEAN_ROUTES = [
+    ('/debug', 'debug', ['GET']),
+]
\ No newline at end of file
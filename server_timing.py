@@ -0,0 +1,106 @@
+"""Per-request phase timings, reported as a Server-Timing header and a log line.
+
+Code on the request path wraps its work in ``phase(name)`` (or calls
+``record(name, started)``); durations and call counts accumulate on
+``flask.g`` and are attached to the response when it is finalized, so
+browser devtools show where a request spent its time. Every request also
+logs one JSON line with the same breakdown; for streamed responses it is
+written once the body has been sent. Outside a request (background
+refreshers, thread pools) timing calls do nothing.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from flask.signals import before_render_template, template_rendered
+
+# Phases in header order; anything else recorded is appended after these
+PHASES = ('auth', 'db', 'quotes_hit', 'quotes_miss', 'nav', 'render')
+
+logger = logging.getLogger("timing")
+
+
+def record(name, started):
+    # Adds the time since started (a time.perf_counter() value) to a phase
+    if not has_request_context():
+        return
+    timings = g.setdefault('_timings', {})
+    total, count = timings.get(name, (0.0, 0))
+    timings[name] = (total + time.perf_counter() - started, count + 1)
+
+
+@contextmanager
+def phase(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, started)
+
+
+def _ordered(timings):
+    names = [name for name in PHASES if name in timings]
+    return names + sorted(name for name in timings if name not in PHASES)
+
+
+def header_value(timings, total):
+    metrics = [f'{name};dur={timings[name][0] * 1000:.1f};desc="{timings[name][1]}x"'
+               for name in _ordered(timings)]
+    metrics.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(metrics)
+
+
+def log_line(method, path, status, timings, total):
+    return json.dumps({
+        'method': method,
+        'path': path,
+        'status': status,
+        'total_ms': round(total * 1000, 1),
+        'phases': {name: {'ms': round(timings[name][0] * 1000, 1), 'count': timings[name][1]}
+                   for name in _ordered(timings)}
+    })
+
+
+def _start_request():
+    g._timing_started = time.perf_counter()
+
+
+def _finish_request(response):
+    started = g.get('_timing_started')
+    if started is None:
+        return response
+    timings = g.setdefault('_timings', {})
+    response.headers['Server-Timing'] = header_value(timings, time.perf_counter() - started)
+
+    details = (request.method, request.path, response.status_code)
+    if response.is_streamed:
+        # The header only covers the work done so far; log once the body is out
+        response.call_on_close(lambda: logger.info(log_line(*details, timings, time.perf_counter() - started)))
+    else:
+        logger.info(log_line(*details, timings, time.perf_counter() - started))
+    return response
+
+
+def _render_started(sender, template, context, **extra):
+    if has_request_context():
+        g._render_started = time.perf_counter()
+
+
+def _render_finished(sender, template, context, **extra):
+    if has_request_context() and g.get('_render_started') is not None:
+        record('render', g.pop('_render_started'))
+
+
+def init_app(app):
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    before_render_template.connect(_render_started, app)
+    template_rendered.connect(_render_finished, app)
\ No newline at end of file
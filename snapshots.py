@@ -0,0 +1,243 @@
+"""Daily portfolio value snapshots as a compact append-only series.
+
+Each user gets one point per IST day, ``[value, invested, stocks_value,
+mutual_funds_value]``, keyed by the ISO date, with a trailing ``1`` once the
+point is final. Points are not recomputed from history: the store keeps the
+basis the last point was built from (quantity, invested amount and price per
+holding), and a new point is that one adjusted by the holdings whose quantity
+or price changed since. Holdings with no cached quote keep their last known
+price, so recording never waits on an upstream API.
+
+Dashboard visits only write a provisional point for today, at most every
+``SNAPSHOT_INTERVAL`` seconds per user and after the response has been sent.
+The full profile finalizes each trading day's point for every user from a
+background job once the close has settled and NAVs are published
+(``SNAPSHOT_FINALIZE_AT`` IST), so days nobody visited are recorded too.
+Final points are never rewritten. Each write is one basis read and one atomic
+write; the chart reads the whole series in one read.
+"""
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as time_of_day, timedelta
+
+from market_calendar import IST, MAX_CLOSED_DAYS, QUOTE_CLOSE_SETTLE, get_calendar
+from portfolio_export import holding_rows
+
+SNAPSHOT_INTERVAL = int(os.getenv("SNAPSHOT_INTERVAL", "300"))
+
+# Trading days are finalized after this IST time (and after the close has
+# settled), once fund houses have published the day's NAVs
+SNAPSHOT_FINALIZE_AT = time_of_day.fromisoformat(os.getenv("SNAPSHOT_FINALIZE_AT", "23:30"))
+# Longest sleep of the finalize job between checks, in seconds
+SNAPSHOT_FINALIZE_POLL = int(os.getenv("SNAPSHOT_FINALIZE_POLL", "600"))
+# Token the job reads and writes every user's data with: a database secret
+# for the Firebase backend, unused with SQLite
+SNAPSHOT_FINALIZE_TOKEN = os.getenv("FIREBASE_DATABASE_SECRET")
+# Shared by the workers of one server so a single process finalizes each day
+SNAPSHOT_LOCK_FILE = os.getenv("SNAPSHOT_LOCK_FILE",
+                               os.path.join(tempfile.gettempdir(), "flaskkanu-snapshots.lock"))
+
+FIELDS = ('value', 'invested', 'stocks_value', 'mutual_funds_value')
+
+# Index of each asset class's value in a point
+SPLIT = {'stocks': 2, 'mutual_funds': 3}
+
+_last_recorded = {}  # user_id -> monotonic time this process last recorded a point
+_last_recorded_lock = threading.Lock()
+
+_finalizer = None
+
+
+def today():
+    return datetime.now(IST).date().isoformat()
+
+
+def marks(holdings, stock_price, fund_price):
+    # {asset_class: {key: [quantity, invested, price or None]}} for the current holdings
+    current = {asset_class: {} for asset_class in SPLIT}
+    for row in holding_rows(holdings, stock_price, fund_price):
+        current[row['asset_class']][row['key']] = [row['quantity'], row['invested_value'], row['current_price']]
+    return current
+
+
+def advance(basis, current):
+    # (point, holdings basis) from the previous basis and the current marks;
+    # unchanged holdings cost nothing
+    point = list(basis.get('point') or [0.0] * len(FIELDS))
+    previous = basis.get('holdings') or {}
+    holdings = {}
+    for asset_class, split in SPLIT.items():
+        before = previous.get(asset_class) or {}
+        after = current.get(asset_class) or {}
+        holdings[asset_class] = {}
+        for key in before.keys() | after.keys():
+            old, new = before.get(key), after.get(key)
+            if new is not None:
+                quantity, invested, price = new
+                if price is None:
+                    # No quote cached: carry the last price, or value at cost
+                    price = old[2] if old else (invested / quantity if quantity else 0.0)
+                new = [quantity, invested, price]
+                holdings[asset_class][key] = new
+            if new == old:
+                continue
+            value_change = (new[0] * new[2] if new else 0.0) - (old[0] * old[2] if old else 0.0)
+            point[0] += value_change
+            point[1] += (new[1] if new else 0.0) - (old[1] if old else 0.0)
+            point[split] += value_change
+    # Empty classes are left out, as Firebase would drop them anyway
+    return point, {asset_class: keys for asset_class, keys in holdings.items() if keys}
+
+
+def due(user_id):
+    # Claims this user's next recording slot in this process
+    now = time.monotonic()
+    with _last_recorded_lock:
+        last = _last_recorded.get(user_id)
+        if last is not None and now - last < SNAPSHOT_INTERVAL:
+            return False
+        _last_recorded[user_id] = now
+        return True
+
+
+def record(store, user_id, token, holdings, stock_price, fund_price, day=None, final=False):
+    # The day's rounded point (today's by default), or None when a final point
+    # already covers it. The basis keeps full precision so rounding never
+    # accumulates across days.
+    day = day or today()
+    basis = store.get_snapshot_basis(user_id, token) or {}
+    last_day = basis.get('day') or ''
+    if last_day > day or (last_day == day and basis.get('final')):
+        return None
+    point, holdings_basis = advance(basis, marks(holdings, stock_price, fund_price))
+    rounded = [round(value, 2) for value in point]
+    if not final and last_day == day and holdings_basis == (basis.get('holdings') or {}):
+        return rounded
+    basis = {'day': day, 'point': point, 'holdings': holdings_basis, 'final': final}
+    store.write_snapshot(user_id, day, rounded + [1] if final else rounded, basis, token)
+    return rounded
+
+
+def series(store, user_id, token):
+    # Column arrays in date order; 'final' is False for provisional points
+    points = sorted((store.get_snapshots(user_id, token) or {}).items())
+    columns = {'date': [day for day, _ in points]}
+    for i, field in enumerate(FIELDS):
+        columns[field] = [point[i] for _, point in points]
+    columns['final'] = [len(point) > len(FIELDS) and bool(point[len(FIELDS)]) for _, point in points]
+    return columns
+
+
+def finalize_time(day):
+    # When the day's point can be made final, or None if the market is closed
+    hours = get_calendar().hours(day)
+    if hours is None:
+        return None
+    return max(hours[1] + timedelta(seconds=QUOTE_CLOSE_SETTLE),
+               datetime.combine(day, SNAPSHOT_FINALIZE_AT, IST))
+
+
+def finalizable_day(moment):
+    # The trading day to finalize at moment: the latest one whose finalize time
+    # has passed, until the next session opens and prices move on
+    day = moment.astimezone(IST).date()
+    for offset in range(MAX_CLOSED_DAYS + 1):
+        ready = finalize_time(day - timedelta(days=offset))
+        if ready is None or ready > moment:
+            continue
+        return ready.date() if moment < get_calendar().next_open(ready) else None
+    return None
+
+
+def next_finalize(moment):
+    # First finalize time after moment
+    day = moment.astimezone(IST).date()
+    for offset in range(MAX_CLOSED_DAYS + 1):
+        ready = finalize_time(day + timedelta(days=offset))
+        if ready is not None and ready > moment:
+            return ready
+    return moment + timedelta(days=1)
+
+
+def finalize_day(store, day, token):
+    # Final points for every user at the day's settled prices; returns how
+    # many were written
+    from quotes import export_fund_price, export_stock_price, prefetch_quotes
+    day = day.isoformat()
+    written = 0
+    for user_id in store.user_ids(token):
+        try:
+            holdings = store.load_user(user_id, token)
+            prefetch_quotes([details.get('symbol', ticker) for ticker, details in (holdings.get('stocks') or {}).items()],
+                            list(holdings.get('mutual_funds') or {}))
+            if record(store, user_id, token, holdings, export_stock_price, export_fund_price,
+                      day=day, final=True) is not None:
+                written += 1
+        except Exception as e:
+            print(f"Error finalizing snapshot for {user_id}: {str(e)}")
+    return written
+
+
+@contextmanager
+def claim(day, path=SNAPSHOT_LOCK_FILE):
+    # Yields True in the one process that should finalize day; the file
+    # remembers the last day finalized
+    try:
+        import fcntl
+    except ImportError:
+        yield True
+        return
+    day = day.isoformat()
+    with open(path, 'a+') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            f.seek(0)
+            if f.read().strip() >= day:
+                yield False
+                return
+            yield True
+            f.seek(0)
+            f.truncate()
+            f.write(day)
+            f.flush()
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _finalize_loop(get_store, token):
+    while True:
+        now = datetime.now(IST)
+        day = finalizable_day(now)
+        if day is not None:
+            store = get_store()
+            try:
+                if store is not None:
+                    with claim(day) as claimed:
+                        if claimed:
+                            print(f"Finalized {finalize_day(store, day, token)} snapshots for {day}")
+            except Exception as e:
+                print(f"Snapshot finalize error for {day}: {str(e)}")
+        # Poll too, so a day left unfinished by a dead worker is picked up
+        wait = (next_finalize(datetime.now(IST)) - datetime.now(IST)).total_seconds()
+        time.sleep(min(max(wait, 1), SNAPSHOT_FINALIZE_POLL))
+
+
+def start_finalizer():
+    # Runs in every worker of the full profile; claim() keeps it to one per day
+    global _finalizer
+    import storage
+    if storage.STORAGE_BACKEND == 'firebase' and not SNAPSHOT_FINALIZE_TOKEN:
+        print("FIREBASE_DATABASE_SECRET not set; daily snapshots stay provisional")
+        return
+    if _finalizer is not None and _finalizer.is_alive():
+        return
+    _finalizer = threading.Thread(target=_finalize_loop, args=(storage.get_store, SNAPSHOT_FINALIZE_TOKEN),
+                                  name="snapshot-finalizer", daemon=True)
+    _finalizer.start()
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""Content-hashed, precompressed static assets.
+
+Every file under the static folder gets a fingerprinted name with a digest
+of its contents (``css/style.css`` -> ``css/style.1a2b3c4d5e.css``), and
+``url_for('static', ...)`` emits those names. A fingerprinted URL never
+changes meaning, so it is served with a one-year ``immutable`` lifetime and
+browsers skip the request entirely on repeat visits; editing a file changes
+its URL.
+
+Text assets are compressed once per process with gzip and, when the
+``brotli`` package is installed, brotli, and the smallest variant the client
+accepts is sent. The manifest is built on first use (the full profile builds
+it, variants included, at startup). Requests for plain names still work with
+Flask's short-lived static caching.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+from flask import Response, current_app, request
+
+try:
+    import brotli
+except ImportError:
+    # Without brotli only gzip variants are served
+    brotli = None
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+DIGEST_LENGTH = 10
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+class Asset:
+    def __init__(self, filename, data):
+        self.digest = hashlib.sha256(data).hexdigest()[:DIGEST_LENGTH]
+        stem, extension = os.path.splitext(filename)
+        self.hashed_name = f"{stem}.{self.digest}{extension}"
+        self.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        self.variants = {'identity': data}
+        self._compressed = not self.mimetype.startswith(COMPRESSIBLE_TYPES)
+        self._lock = threading.Lock()
+
+    def compress(self):
+        # Adds the gzip/brotli variants that are smaller than the original
+        if self._compressed:
+            return
+        with self._lock:
+            if self._compressed:
+                return
+            data = self.variants['identity']
+            candidates = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                candidates['br'] = brotli.compress(data, quality=11)
+            for encoding, body in candidates.items():
+                if len(body) < len(data):
+                    self.variants[encoding] = body
+            self._compressed = True
+
+    def negotiate(self, accept_encodings):
+        # (encoding, body) of the smallest variant the client accepts
+        self.compress()
+        best = 'identity'
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accept_encodings[encoding] \
+                    and len(self.variants[encoding]) < len(self.variants[best]):
+                best = encoding
+        return best, self.variants[best]
+
+
+class AssetManifest:
+    def __init__(self, folder):
+        self.folder = folder
+        self._assets = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        by_name, by_hashed_name = {}, {}
+        for root, _, files in os.walk(self.folder):
+            for name in files:
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, self.folder).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    asset = Asset(filename, f.read())
+                by_name[filename] = asset
+                by_hashed_name[asset.hashed_name] = asset
+        return by_name, by_hashed_name
+
+    @property
+    def assets(self):
+        if self._assets is None:
+            with self._lock:
+                if self._assets is None:
+                    self._assets = self._build()
+        return self._assets
+
+    def preload(self):
+        for asset in self.assets[0].values():
+            asset.compress()
+
+    def url_name(self, filename):
+        asset = self.assets[0].get(filename)
+        return asset.hashed_name if asset is not None else filename
+
+    def find(self, hashed_name):
+        return self.assets[1].get(hashed_name)
+
+
+def serve(filename):
+    asset = current_app.extensions['static_assets'].find(filename)
+    if asset is None:
+        return current_app.send_static_file(filename)
+    encoding, body = asset.negotiate(request.accept_encodings)
+    response = Response(body, mimetype=asset.mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    response.set_etag(f"{asset.digest}-{encoding}")
+    return response.make_conditional(request)
+
+
+def init_app(app, preload=False):
+    manifest = AssetManifest(app.static_folder)
+    app.extensions['static_assets'] = manifest
+    app.view_functions['static'] = serve
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = manifest.url_name(values['filename'])
+
+    if preload:
+        manifest.preload()
+    return manifest
\ No newline at end of file
@@ -0,0 +1,353 @@
+"""Portfolio storage: holdings aggregates and ledger lots per user.
+
+Views and helpers talk to a ``PortfolioStore`` instead of issuing database
+calls themselves. ``STORAGE_BACKEND`` picks the implementation:
+
+* ``firebase`` (default): the Realtime Database through the ``firebase_app`` handle,
+  laid out as ``users/{user_id}/{asset_class}/{key}`` and
+  ``ledger/{user_id}/{asset_class}/{key}/{lot_id}``, with daily value
+  snapshots under ``snapshots/{user_id}``.
+* ``sqlite``: a local database file (``SQLITE_PATH``) for self-hosted
+  deployments and benchmarks, with the same data in indexed tables.
+
+Sign-in and token checks still go through Firebase Auth with either backend.
+"""
+import json
+import os
+import random
+import secrets
+import sqlite3
+import threading
+import time
+
+import metrics
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firebase")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "portfolio.db")
+
+# Conditional writes tried before giving up on a contended holding, with a
+# jittered, doubling pause (seconds) between them
+UPDATE_ATTEMPTS = int(os.getenv("STORAGE_UPDATE_ATTEMPTS", "8"))
+UPDATE_BACKOFF = float(os.getenv("STORAGE_UPDATE_BACKOFF", "0.02"))
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class ConcurrentUpdateError(RuntimeError):
+    pass
+
+
+class PortfolioStore:
+    def load_user(self, user_id, token):
+        # {asset_class: {key: aggregate}} for everything the user holds
+        raise NotImplementedError
+
+    def get_holding(self, user_id, asset_class, key, token):
+        raise NotImplementedError
+
+    def set_holding(self, user_id, asset_class, key, aggregate, token):
+        raise NotImplementedError
+
+    def new_lot_id(self):
+        raise NotImplementedError
+
+    def update_holdings(self, user_id, holdings, build, token):
+        # Read-modify-write of the (asset_class, key) holdings that no other
+        # writer can interleave with. build({(asset_class, key): aggregate or
+        # None}) returns the (asset_class, key, lot_id, lot, aggregate) lots to
+        # append; it may be called again with fresher aggregates, must give a
+        # lot the same id every time and may raise to abort. Returns the
+        # entries written.
+        raise NotImplementedError
+
+    def lot_keys(self, user_id, asset_class, token):
+        # Keys of the securities that have ledger lots, without the lots themselves
+        raise NotImplementedError
+
+    def get_lots(self, user_id, asset_class, key, token):
+        # {lot_id: lot} in the order the lots were written
+        raise NotImplementedError
+
+    def user_ids(self, token):
+        # Every user with holdings or snapshots
+        raise NotImplementedError
+
+    def get_snapshot_basis(self, user_id, token):
+        # The basis the latest snapshot point was computed from, or None
+        raise NotImplementedError
+
+    def write_snapshot(self, user_id, day, point, basis, token):
+        # Sets the day's point and replaces the basis in a single atomic write
+        raise NotImplementedError
+
+    def get_snapshots(self, user_id, token):
+        # {day: point} for every recorded day
+        raise NotImplementedError
+
+
+def _read_path(node, parts):
+    for part in parts:
+        node = node.get(part) if isinstance(node, dict) else None
+    return node
+
+
+def _write_path(node, parts, value):
+    # node with value set at parts below it (node itself when parts is empty)
+    if not parts:
+        return value
+    node = node if isinstance(node, dict) else {}
+    node[parts[0]] = _write_path(node.get(parts[0]), parts[1:], value)
+    return node
+
+
+class FirebaseStore(PortfolioStore):
+    def __init__(self, db):
+        self.db = db
+
+    def load_user(self, user_id, token):
+        with metrics.upstream('firebase'):
+            return self.db.child("users").child(user_id).get(token=token).val() or {}
+
+    def get_holding(self, user_id, asset_class, key, token):
+        with metrics.upstream('firebase'):
+            return self.db.child("users").child(user_id).child(asset_class).child(key).get(token=token).val()
+
+    def set_holding(self, user_id, asset_class, key, aggregate, token):
+        with metrics.upstream('firebase'):
+            self.db.child("users").child(user_id).child(asset_class).child(key).set(aggregate, token=token)
+
+    def new_lot_id(self):
+        return self.db.generate_key()
+
+    def update_holdings(self, user_id, holdings, build, token):
+        # The lots go in first, under ids that build keeps fixed, so writing
+        # them again is harmless. The aggregates follow in a conditional write:
+        # read with an ETag, PUT with if-match and rebuild from the fresh value
+        # when another write got there first. An update that is given up, or
+        # fails, deletes the lots it wrote, so the ledger never holds lots its
+        # aggregates don't count for long, and aggregates never count lots the
+        # ledger is missing.
+        depth, ref = self._guarded_node(user_id, holdings)
+        written = set()
+        try:
+            for attempt in range(UPDATE_ATTEMPTS):
+                if attempt:
+                    time.sleep(random.uniform(0, UPDATE_BACKOFF * 2 ** attempt))
+                with metrics.upstream('firebase'):
+                    node, etag = ref.get_with_etag(token=token)
+                current = {holding: _read_path(node, holding[depth:]) for holding in holdings}
+                entries = build(current)
+                lots = {f"{asset_class}/{key}/{lot_id}": lot for asset_class, key, lot_id, lot, _ in entries}
+                new_lots = {path: lot for path, lot in lots.items() if path not in written}
+                if new_lots:
+                    with metrics.upstream('firebase'):
+                        self.db.child("ledger").child(user_id).update(new_lots, token=token)
+                    written.update(new_lots)
+                if not entries:
+                    break
+                for asset_class, key, _, _, aggregate in entries:
+                    node = _write_path(node, (asset_class, key)[depth:], aggregate)
+                with metrics.upstream('firebase'):
+                    if ref.set_if_match(node, etag, token=token):
+                        break
+            else:
+                raise ConcurrentUpdateError("Holdings changed too often to update, please try again")
+        except BaseException:
+            self._remove_lots(user_id, written, token)
+            raise
+        # Lots an earlier attempt wrote that the final build dropped
+        self._remove_lots(user_id, written - set(lots), token)
+        return entries
+
+    def _guarded_node(self, user_id, holdings):
+        # (depth, reference) of the smallest node holding every aggregate: the
+        # holding itself, its asset class or the whole user
+        if len(holdings) == 1:
+            depth = 2
+        elif len({asset_class for asset_class, _ in holdings}) == 1:
+            depth = 1
+        else:
+            depth = 0
+        return depth, self.db.child("users").child(user_id).child(*holdings[0][:depth])
+
+    def _remove_lots(self, user_id, paths, token):
+        if not paths:
+            return
+        try:
+            with metrics.upstream('firebase'):
+                self.db.child("ledger").child(user_id).update({path: None for path in paths}, token=token)
+        except Exception as e:
+            print(f"Error removing lots of an abandoned update: {str(e)}")
+
+    def lot_keys(self, user_id, asset_class, token):
+        with metrics.upstream('firebase'):
+            return list(self.db.child("ledger").child(user_id).child(asset_class).shallow().get(token=token).val() or [])
+
+    def get_lots(self, user_id, asset_class, key, token):
+        with metrics.upstream('firebase'):
+            return self.db.child("ledger").child(user_id).child(asset_class).child(key).get(token=token).val() or {}
+
+    def user_ids(self, token):
+        with metrics.upstream('firebase'):
+            users = self.db.child("users").shallow().get(token=token).val() or {}
+            snapshotted = self.db.child("snapshots").shallow().get(token=token).val() or {}
+        return sorted(set(users) | set(snapshotted))
+
+    def get_snapshot_basis(self, user_id, token):
+        with metrics.upstream('firebase'):
+            return self.db.child("snapshots").child(user_id).child("basis").get(token=token).val()
+
+    def write_snapshot(self, user_id, day, point, basis, token):
+        updates = {
+            f"snapshots/{user_id}/series/{day}": point,
+            f"snapshots/{user_id}/basis": basis,
+        }
+        with metrics.upstream('firebase'):
+            self.db.update(updates, token=token)
+
+    def get_snapshots(self, user_id, token):
+        with metrics.upstream('firebase'):
+            return self.db.child("snapshots").child(user_id).child("series").get(token=token).val() or {}
+
+
+# The primary keys double as the indexes every query needs: loading a user is
+# a prefix scan on holdings, listing a user's securities or one security's
+# lots is a prefix scan on lots. Lot ids and snapshot days sort chronologically.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS holdings (
+    user_id TEXT NOT NULL,
+    asset_class TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, asset_class, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS lots (
+    user_id TEXT NOT NULL,
+    asset_class TEXT NOT NULL,
+    key TEXT NOT NULL,
+    lot_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, asset_class, key, lot_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    user_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshot_basis (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteStore(PortfolioStore):
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # One connection per thread; WAL lets readers run alongside a writer
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def load_user(self, user_id, token):
+        data = {}
+        rows = self._connect().execute(
+            "SELECT asset_class, key, data FROM holdings WHERE user_id = ?", (user_id,))
+        for asset_class, key, value in rows:
+            data.setdefault(asset_class, {})[key] = json.loads(value)
+        return data
+
+    def get_holding(self, user_id, asset_class, key, token):
+        row = self._connect().execute(
+            "SELECT data FROM holdings WHERE user_id = ? AND asset_class = ? AND key = ?",
+            (user_id, asset_class, key)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_holding(self, user_id, asset_class, key, aggregate, token):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO holdings VALUES (?, ?, ?, ?)",
+                         (user_id, asset_class, key, json.dumps(aggregate)))
+
+    def new_lot_id(self):
+        return f"{time.time_ns():016x}{secrets.token_hex(4)}"
+
+    def update_holdings(self, user_id, holdings, build, token):
+        # BEGIN IMMEDIATE takes the write lock before the read, so concurrent
+        # updates queue up behind each other instead of overwriting
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = {(asset_class, key): self.get_holding(user_id, asset_class, key, token)
+                       for asset_class, key in holdings}
+            entries = build(current)
+            for asset_class, key, lot_id, lot, aggregate in entries:
+                conn.execute("INSERT OR REPLACE INTO lots VALUES (?, ?, ?, ?, ?)",
+                             (user_id, asset_class, key, lot_id, json.dumps(lot)))
+                conn.execute("INSERT OR REPLACE INTO holdings VALUES (?, ?, ?, ?)",
+                             (user_id, asset_class, key, json.dumps(aggregate)))
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        return entries
+
+    def lot_keys(self, user_id, asset_class, token):
+        rows = self._connect().execute(
+            "SELECT DISTINCT key FROM lots WHERE user_id = ? AND asset_class = ?", (user_id, asset_class))
+        return [key for key, in rows]
+
+    def get_lots(self, user_id, asset_class, key, token):
+        rows = self._connect().execute(
+            "SELECT lot_id, data FROM lots WHERE user_id = ? AND asset_class = ? AND key = ? ORDER BY lot_id",
+            (user_id, asset_class, key))
+        return {lot_id: json.loads(value) for lot_id, value in rows}
+
+    def user_ids(self, token):
+        rows = self._connect().execute(
+            "SELECT user_id FROM holdings UNION SELECT user_id FROM snapshot_basis ORDER BY user_id")
+        return [user_id for user_id, in rows]
+
+    def get_snapshot_basis(self, user_id, token):
+        row = self._connect().execute("SELECT data FROM snapshot_basis WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def write_snapshot(self, user_id, day, point, basis, token):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)", (user_id, day, json.dumps(point)))
+            conn.execute("INSERT OR REPLACE INTO snapshot_basis VALUES (?, ?)", (user_id, json.dumps(basis)))
+
+    def get_snapshots(self, user_id, token):
+        rows = self._connect().execute(
+            "SELECT day, data FROM snapshots WHERE user_id = ? ORDER BY day", (user_id,))
+        return {day: json.loads(value) for day, value in rows}
+
+
+def get_store():
+    # None while the Firebase database is unavailable
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if STORAGE_BACKEND == 'sqlite':
+                    _store = SQLiteStore(SQLITE_PATH)
+                elif STORAGE_BACKEND == 'firebase':
+                    from firebase_app import get_db
+                    db = get_db()
+                    if db is None:
+                        return None
+                    _store = FirebaseStore(db)
+                else:
+                    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+    return _store
\ No newline at end of file
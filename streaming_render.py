@@ -0,0 +1,50 @@
+"""Holdings that price themselves while a template is being streamed.
+
+``LazyHoldings`` looks like the ``stocks`` dict the templates already iterate
+over, but ``items()`` yields rows whose quotes are already available first and
+then the remaining rows as their lookups finish on a small thread pool. Used
+with ``flask.stream_template`` the page layout and the ready rows reach the
+browser before the slow quotes have resolved.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+PRICE_WORKERS = 4
+
+
+class LazyHoldings:
+    def __init__(self, ready, pending, price, on_complete=None, max_workers=PRICE_WORKERS):
+        # ready/pending are lists of (key, details); price(key, details) -> (row, quote_key)
+        self.ready = ready
+        self.pending = pending
+        self.price = price
+        self.on_complete = on_complete
+        self.max_workers = max_workers
+
+    def __len__(self):
+        return len(self.ready) + len(self.pending)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def items(self):
+        rows = {}
+        quotes = {}
+
+        def collect(key, result):
+            row, quote_key, version = result
+            rows[key] = row
+            if quote_key:
+                quotes[quote_key] = version
+            return key, row
+
+        for key, details in self.ready:
+            yield collect(key, self.price(key, details))
+
+        if self.pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.pending))) as pool:
+                futures = {pool.submit(self.price, key, details): key for key, details in self.pending}
+                for future in as_completed(futures):
+                    yield collect(futures[future], future.result())
+
+        if self.on_complete:
+            self.on_complete(rows, quotes)
\ No newline at end of file
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# The app's modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def firebase_stub():
+    pytest.importorskip('cryptography')
+    from benchmarks.stubs import FirebaseStub
+    stub = FirebaseStub('test-project')
+    stub.start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def firebase_store(firebase_stub, monkeypatch):
+    import firebase_rest
+    import storage
+    firebase_stub.tree = {}
+    monkeypatch.setattr(storage, 'UPDATE_BACKOFF', 0)
+    return storage.FirebaseStore(firebase_rest.Database(firebase_stub.url))
\ No newline at end of file
@@ -0,0 +1,137 @@
+import gzip
+import zlib
+
+import pytest
+from flask import Flask, Response, stream_with_context
+
+import compression
+from compression import CompressionMiddleware, choose_encoding
+
+BODY = 'portfolio,' * 500
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route('/page')
+    def page():
+        response = Response(BODY, mimetype='text/html')
+        response.set_etag('v1')
+        return response
+
+    @app.route('/small')
+    def small():
+        return Response('ok', mimetype='text/plain')
+
+    @app.route('/image')
+    def image():
+        return Response(b'\x89PNG' * 1000, mimetype='image/png')
+
+    @app.route('/encoded')
+    def encoded():
+        return Response(gzip.compress(BODY.encode()), mimetype='text/css', headers={'Content-Encoding': 'gzip'})
+
+    @app.route('/varied')
+    def varied():
+        return Response(BODY, mimetype='text/html', headers={'Vary': 'Cookie'})
+
+    @app.route('/stream')
+    def stream():
+        return Response(stream_with_context(f"row {i}\n" for i in range(3)), mimetype='text/csv')
+
+    @app.route('/events')
+    def events():
+        return Response(iter(["data: 1\n\n"]), mimetype='text/event-stream')
+
+    @app.route('/not-modified')
+    def not_modified():
+        return Response(status=304)
+
+    app.wsgi_app = CompressionMiddleware(app.wsgi_app)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('', None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('gzip, deflate', 'gzip'),
+    ('gzip;q=0', None),
+    ('*', 'br'),
+    ('br, gzip', 'br'),
+    ('gzip;q=1.0, br;q=0.5', 'gzip'),
+    ('br;q=0.8, gzip;q=0.8', 'br'),
+    ('br;q=0, gzip;q=0.1', 'gzip'),
+])
+def test_choose_encoding(header, expected):
+    pytest.importorskip('brotli')
+    assert choose_encoding(header) == expected
+
+
+def test_choose_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    assert choose_encoding('br') is None
+    assert choose_encoding('br, gzip;q=0.5') == 'gzip'
+
+
+def test_gzip_response_weakens_the_etag(client):
+    response = client.get('/page', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.headers['ETag'] == 'W/"v1"'
+    assert int(response.headers['Content-Length']) == len(response.data)
+    assert gzip.decompress(response.data).decode() == BODY
+
+
+def test_brotli_is_preferred(client):
+    brotli = pytest.importorskip('brotli')
+    response = client.get('/page', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data).decode() == BODY
+
+
+def test_uncompressed_responses_still_vary(client):
+    response = client.get('/page')
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.headers['ETag'] == '"v1"'
+    # Below the minimum size the body is sent as is, for every client alike
+    response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Vary'] == 'Accept-Encoding'
+
+
+def test_existing_vary_is_extended(client):
+    response = client.get('/varied', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Vary'] == 'Cookie, Accept-Encoding'
+
+
+@pytest.mark.parametrize('path', ['/image', '/encoded', '/events', '/not-modified'])
+def test_skipped_responses_pass_through(client, path):
+    response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+    assert 'Vary' not in response.headers
+    if path == '/encoded':
+        # Already encoded by the app: left exactly as it was
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.data).decode() == BODY
+    else:
+        assert 'Content-Encoding' not in response.headers
+
+
+def test_head_requests_are_not_compressed(client):
+    response = client.head('/page', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_streamed_body_is_flushed_chunk_by_chunk(client):
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    # Each compressed chunk decodes to the row the app produced
+    rows = [decompressor.decompress(chunk).decode() for chunk in response.response]
+    response.close()
+    assert [row for row in rows if row] == ['row 0\n', 'row 1\n', 'row 2\n']
+    assert decompressor.eof
\ No newline at end of file
@@ -0,0 +1,198 @@
+import base64
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("cryptography")
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.x509.oid import NameOID
+
+import firebase_tokens
+from firebase_tokens import TokenError, TokenVerifier
+
+PROJECT_ID = 'test-project'
+NOW = 1_800_000_000
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def make_key():
+    # (private key, PEM certificate) like the ones Google publishes
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'test')])
+    issued = datetime.now(timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name)
+            .public_key(key.public_key()).serial_number(1)
+            .not_valid_before(issued - timedelta(days=1)).not_valid_after(issued + timedelta(days=1))
+            .sign(key, hashes.SHA256()))
+    return key, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def claims_for(uid='user-1', **overrides):
+    claims = {
+        'iss': f"https://securetoken.google.com/{PROJECT_ID}",
+        'aud': PROJECT_ID,
+        'sub': uid, 'user_id': uid,
+        'iat': NOW - 10, 'auth_time': NOW - 10, 'exp': NOW + 3600,
+    }
+    claims.update(overrides)
+    return {k: v for k, v in claims.items() if v is not None}
+
+
+def sign(key, claims, kid='key-1', alg='RS256'):
+    header = {'alg': alg, 'kid': kid, 'typ': 'JWT'}
+    signing_input = f"{_b64(json.dumps(header).encode())}.{_b64(json.dumps(claims).encode())}"
+    signature = key.sign(signing_input.encode(), padding.PKCS1v15(), hashes.SHA256())
+    return f"{signing_input}.{_b64(signature)}"
+
+
+class KeySource:
+    # Serves whichever certificates are current and counts the fetches
+    def __init__(self, certs, max_age=3600):
+        self.certs = certs
+        self.max_age = max_age
+        self.fetches = 0
+
+    def __call__(self):
+        self.fetches += 1
+        return dict(self.certs), self.max_age
+
+
+class Clock:
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope='module')
+def keys():
+    return make_key(), make_key()
+
+
+@pytest.fixture
+def setup(keys):
+    (key, pem), _ = keys
+    source = KeySource({'key-1': pem})
+    clock = Clock()
+    return TokenVerifier(PROJECT_ID, key_source=source, clock=clock), source, clock, key
+
+
+def test_valid_token_is_verified_and_cached(setup):
+    verifier, source, _, key = setup
+    token = sign(key, claims_for())
+    assert verifier.verify(token)['sub'] == 'user-1'
+    assert verifier.verify(token)['sub'] == 'user-1'
+    assert source.fetches == 1
+
+
+@pytest.mark.parametrize('alg', ['none', 'HS256', 'RS512'])
+def test_rejects_other_algorithms(setup, alg):
+    verifier, _, _, key = setup
+    with pytest.raises(TokenError, match='algorithm'):
+        verifier.verify(sign(key, claims_for(), alg=alg))
+
+
+def test_rejects_signature_from_another_key(setup, keys):
+    verifier, _, _, _ = setup
+    (_, _), (other_key, _) = keys
+    with pytest.raises(TokenError, match='signature'):
+        verifier.verify(sign(other_key, claims_for()))
+
+
+def test_rejects_malformed_token(setup):
+    verifier, _, _, _ = setup
+    with pytest.raises(TokenError, match='Malformed'):
+        verifier.verify('not-a-jwt')
+
+
+@pytest.mark.parametrize('overrides, message', [
+    ({'aud': 'other-project'}, 'audience'),
+    ({'iss': 'https://securetoken.google.com/other-project'}, 'issuer'),
+    ({'sub': None}, 'subject'),
+    ({'exp': NOW}, 'expired'),
+    ({'iat': NOW + 3600}, 'future'),
+    ({'auth_time': NOW + 3600}, 'future'),
+])
+def test_rejects_bad_claims(setup, overrides, message):
+    verifier, _, _, key = setup
+    with pytest.raises(TokenError, match=message):
+        verifier.verify(sign(key, claims_for(**overrides)))
+
+
+def test_allows_clock_skew_on_issue_time(setup):
+    verifier, _, _, key = setup
+    verifier.verify(sign(key, claims_for(iat=NOW + firebase_tokens.CLOCK_SKEW - 1)))
+
+
+def test_cached_claims_expire_with_the_token(setup):
+    verifier, _, clock, key = setup
+    token = sign(key, claims_for(exp=NOW + 100))
+    verifier.verify(token)
+    clock.now = NOW + 100
+    with pytest.raises(TokenError, match='expired'):
+        verifier.verify(token)
+
+
+def test_unknown_kid_forces_a_key_refresh(setup, keys):
+    verifier, source, clock, key = setup
+    _, (new_key, new_pem) = keys
+    verifier.verify(sign(key, claims_for()))
+    # Keys rotate before the cached copy expires
+    clock.now = NOW + firebase_tokens.MIN_FORCED_REFRESH
+    source.certs = {'key-1': source.certs['key-1'], 'key-2': new_pem}
+    assert verifier.verify(sign(new_key, claims_for(uid='user-2'), kid='key-2'))['sub'] == 'user-2'
+    assert source.fetches == 2
+
+
+def test_forced_refreshes_are_rate_limited(setup):
+    verifier, source, clock, key = setup
+    verifier.verify(sign(key, claims_for()))
+    with pytest.raises(TokenError, match='unknown key'):
+        verifier.verify(sign(key, claims_for(uid='a'), kid='missing'))
+    assert source.fetches == 1
+    clock.now = NOW + firebase_tokens.MIN_FORCED_REFRESH
+    for uid in ('b', 'c', 'd'):
+        with pytest.raises(TokenError, match='unknown key'):
+            verifier.verify(sign(key, claims_for(uid=uid), kid='missing'))
+    assert source.fetches == 2
+
+
+def test_keys_are_refetched_after_max_age(setup):
+    verifier, source, clock, key = setup
+    source.max_age = 600
+    verifier.verify(sign(key, claims_for()))
+    clock.now = NOW + 600
+    verifier.verify(sign(key, claims_for(uid='user-2')))
+    assert source.fetches == 2
+
+
+def test_claims_cache_updates_hold_the_lock(setup, monkeypatch):
+    # A prune iterates the cache; another thread adding to it meanwhile would
+    # raise "dictionary changed size during iteration"
+    verifier, _, _, key = setup
+    monkeypatch.setattr(firebase_tokens, 'MAX_CACHED_TOKENS', 2)
+    for uid in ('a', 'b'):
+        verifier.verify(sign(key, claims_for(uid=uid)))
+    token = sign(key, claims_for(uid='c'))
+    done = threading.Event()
+
+    def verify():
+        verifier.verify(token)
+        done.set()
+
+    with verifier._lock:
+        thread = threading.Thread(target=verify)
+        thread.start()
+        assert not done.wait(0.2)
+    thread.join(5)
+    assert done.is_set()
+    assert token in verifier._claims
+    assert len(verifier._claims) <= 2
\ No newline at end of file
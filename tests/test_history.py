@@ -0,0 +1,118 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+import history
+from history import HistoryError
+
+
+def test_lttb_keeps_everything_when_not_reducing():
+    assert history.lttb([0, 1, 2], [5, 6, 7], 10) == [0, 1, 2]
+    assert history.lttb([], [], 10) == []
+
+
+def test_lttb_keeps_the_ends_and_the_extremes():
+    xs = list(range(1000))
+    ys = [0.0] * 1000
+    ys[500], ys[700] = 10.0, -5.0
+    keep = history.lttb(xs, ys, 20)
+    assert len(keep) == 20
+    assert keep[0] == 0 and keep[-1] == 999
+    assert 500 in keep and 700 in keep
+    assert keep == sorted(keep)
+
+
+def test_lttb_minimum_threshold_reduces_to_three_points():
+    keep = history.lttb(list(range(100)), [x % 7 for x in range(100)], 3)
+    assert len(keep) == 3 and keep[0] == 0 and keep[-1] == 99
+
+
+@pytest.mark.parametrize('requested, expected', [(-5, 3), (0, 3), (1, 3), (3, 3), (300, 300), (10 ** 6, history.MAX_POINTS)])
+def test_clamp_points(requested, expected):
+    assert history.clamp_points(requested) == expected
+
+
+def test_gaps_between_and_around_covered_ranges():
+    assert history.gaps([], 1, 10) == [(1, 10)]
+    assert history.gaps([(3, 4), (7, 8)], 1, 10) == [(1, 2), (5, 6), (9, 10)]
+    assert history.gaps([(1, 10)], 3, 5) == []
+    assert history.gaps([(0, 2), (20, 30)], 1, 10) == [(3, 10)]
+    assert history.gaps([(5, 10)], 6, 8) == []
+
+
+def test_merge_ranges_joins_overlapping_and_adjacent():
+    assert history.merge_ranges([(9, 10), (1, 3), (4, 6)]) == [(1, 6), (9, 10)]
+    assert history.merge_ranges([(1, 5), (2, 3)]) == [(1, 5)]
+    assert history.merge_ranges([]) == []
+
+
+def chart(timestamps, closes, offset=19800):
+    return {'chart': {'result': [{
+        'meta': {'gmtoffset': offset},
+        'timestamp': timestamps,
+        'indicators': {'quote': [{'open': closes, 'high': closes, 'low': closes, 'close': closes,
+                                  'volume': [100] * len(closes)}]},
+    }]}}
+
+
+def test_parse_chart_dates_bars_in_exchange_time():
+    # 03:45 UTC and 22:00 UTC are 09:15 and 03:30 the next day in IST
+    first = int(datetime(2026, 1, 5, 3, 45, tzinfo=timezone.utc).timestamp())
+    second = int(datetime(2026, 1, 5, 22, 0, tzinfo=timezone.utc).timestamp())
+    bars = history.parse_chart(chart([first, second], [10.0, 11.0]))
+    assert [date.fromordinal(bar[0]) for bar in bars] == [date(2026, 1, 5), date(2026, 1, 6)]
+    assert bars[0][1:] == (10.0, 10.0, 10.0, 10.0, 100)
+
+
+def test_parse_chart_skips_bars_without_a_close():
+    stamps = [1767584700, 1767671100]
+    assert len(history.parse_chart(chart(stamps, [None, 11.0]))) == 1
+
+
+@pytest.mark.parametrize('data', [None, {}, {'chart': {'result': None}}, {'chart': {'result': []}}])
+def test_parse_chart_empty_results(data):
+    assert history.parse_chart(data) == []
+
+
+@pytest.fixture
+def today(monkeypatch):
+    monkeypatch.setattr(history, 'ist_today', lambda: date(2026, 10, 19))
+    return date(2026, 10, 19)
+
+
+def test_parse_period_ranges_end_today(today):
+    first, last = history.parse_period('1m')
+    assert date.fromordinal(last) == today
+    assert date.fromordinal(first) == date(2026, 9, 18)
+    assert history.parse_period() == history.parse_period('1y')
+
+
+def test_parse_period_explicit_dates_are_clipped_to_today(today):
+    first, last = history.parse_period(start='2026-10-01', end='2027-01-01')
+    assert (date.fromordinal(first), date.fromordinal(last)) == (date(2026, 10, 1), today)
+    first, last = history.parse_period('3m', end='2026-06-30')
+    assert date.fromordinal(first) == date(2026, 3, 30)
+
+
+@pytest.mark.parametrize('kwargs, message', [
+    ({'range_name': '2w'}, 'Unsupported range'),
+    ({'start': '2026-13-01'}, 'YYYY-MM-DD'),
+    ({'start': '2026-05-01', 'end': '2026-01-01'}, 'after end'),
+    ({'start': '2000-01-01'}, 'At most'),
+])
+def test_parse_period_errors(today, kwargs, message):
+    with pytest.raises(HistoryError, match=message):
+        history.parse_period(**kwargs)
+
+
+def test_ist_today_is_the_exchange_date():
+    assert history.ist_today() == datetime.now(history.IST).date()
+
+
+@pytest.mark.parametrize('symbol, valid', [
+    ('TCS', True), ('TCS.NS', True), ('M&M.BO', True), ('BAJAJ-AUTO', True), ('^NSEI', True),
+    ('NS^EI', False), ('^NSEI.NS', False), ('^', False), ('TCS.XX', False), ('../ETC', False),
+])
+def test_history_symbol_pattern(symbol, valid):
+    views = pytest.importorskip('views')
+    assert bool(views.HISTORY_SYMBOL.match(symbol)) is valid
\ No newline at end of file
@@ -0,0 +1,144 @@
+import io
+import json
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import holdings_import
+import storage
+
+
+def upload(text, filename='holdings.csv'):
+    return FileStorage(io.BytesIO(text.encode('utf-8')), filename)
+
+
+def parse(text, filename='holdings.csv'):
+    return list(holdings_import.parse_rows(upload(text, filename)))
+
+
+def test_parse_csv_normalises_columns_and_symbols():
+    rows = parse("\ufeffType,Ticker,Units,Purchase_Price,Side,Date\n"
+                 "stock, tcs.ns ,2,100,buy,2026-01-02\n"
+                 "mf,120503,10.5,25,,\n")
+    (line1, stock, error1), (line2, fund, error2) = rows
+    assert (line1, error1, line2, error2) == (1, None, 2, None)
+    assert stock['asset_class'] == 'stocks' and stock['key'] == 'TCS'
+    assert stock['lot'] == {'side': 'buy', 'quantity': 2.0, 'price': 100.0, 'timestamp': '2026-01-02'}
+    assert fund['asset_class'] == 'mutual_funds' and fund['key'] == '120503'
+    assert fund['lot']['quantity'] == 10.5 and fund['lot']['side'] == 'buy'
+
+
+def test_parse_reports_bad_rows_by_line():
+    rows = parse("symbol,quantity,price\n,1,1\nINFY,abc,1\nINFY,-1,1\nINFY,1,nan\nINFY,1,1\n")
+    errors = {line: error for line, _, error in rows if error}
+    assert errors[1] == 'missing symbol'
+    assert 'could not convert' in errors[2]
+    assert 'Quantity' in errors[3]
+    assert 'Price' in errors[4]
+    assert rows[4][1]['key'] == 'INFY'
+
+
+def test_parse_json_grouped_by_asset_class():
+    data = {'stocks': [{'symbol': 'TCS', 'quantity': 1, 'price': 10}],
+            'mutual_funds': [{'scheme_code': 120503, 'units': 2, 'purchase_nav': 5}]}
+    rows = parse(json.dumps(data), 'holdings.json')
+    assert [(row['asset_class'], row['key']) for _, row, _ in rows] == [('stocks', 'TCS'), ('mutual_funds', '120503')]
+
+
+def test_parse_ndjson_skips_blank_lines():
+    rows = parse('{"symbol": "TCS", "quantity": 1, "price": 10}\n\n{"symbol": "INFY", "quantity": 2, "price": 5}\n',
+                 'holdings.ndjson')
+    assert [row['key'] for _, row, _ in rows] == ['TCS', 'INFY']
+
+
+def test_parse_limits_row_count(monkeypatch):
+    monkeypatch.setattr(holdings_import, 'MAX_IMPORT_ROWS', 2)
+    with pytest.raises(holdings_import.HoldingsImportError):
+        parse("symbol,quantity,price\nA,1,1\nB,1,1\nC,1,1\n")
+
+
+def test_validate_symbols_looks_each_symbol_up_once():
+    calls = []
+
+    def lookup_stock(key):
+        calls.append(key)
+        if key == 'BAD':
+            raise RuntimeError('upstream down')
+        return {'name': key}
+
+    rows = [{'asset_class': 'stocks', 'key': key} for key in ('TCS', 'TCS', 'BAD')]
+    rows.append({'asset_class': 'mutual_funds', 'key': '1'})
+    infos = holdings_import.validate_symbols(rows, lookup_stock, lambda key: {'name': 'Fund'})
+    assert sorted(calls) == ['BAD', 'TCS']
+    assert infos == {('stocks', 'TCS'): {'name': 'TCS'}, ('stocks', 'BAD'): None, ('mutual_funds', '1'): {'name': 'Fund'}}
+
+
+def rows_of(text):
+    return [(line, row) for line, row, error in parse(text) if not error]
+
+
+def test_build_import_entries_folds_lots_into_current_aggregates():
+    rows = rows_of("symbol,quantity,price,side\nTCS,2,100,buy\nTCS,1,130,sell\nZZZ,1,1,buy\nINFY,5,1,sell\n")
+    infos = {('stocks', 'TCS'): {'name': 'TCS Ltd', 'symbol': 'TCS.NS', 'exchange': None},
+             ('stocks', 'INFY'): {'name': 'Infosys'}}
+    current = {('stocks', 'TCS'): {'quantity': 2, 'purchase_price': 100, 'lot_count': 1}}
+    lot_ids = {1: 'lot-1', 2: 'lot-2', 3: 'lot-3', 4: 'lot-4'}
+
+    entries, imported, errors = holdings_import.build_import_entries(rows, current, infos, lot_ids)
+
+    assert imported == 2
+    assert errors == [(3, 'ZZZ not found'), (4, 'Cannot sell 5, only 0 held')]
+    assert [entry[:3] for entry in entries] == [('stocks', 'TCS', 'lot-1'), ('stocks', 'TCS', 'lot-2')]
+    final = entries[-1][4]
+    assert final['quantity'] == 3 and final['purchase_price'] == 100
+    assert final['realized_pnl'] == 30 and final['lot_count'] == 3
+    assert final['name'] == 'TCS Ltd' and 'exchange' not in final
+    assert current == {('stocks', 'TCS'): {'quantity': 2, 'purchase_price': 100, 'lot_count': 1}}
+
+
+CSV = ("type,symbol,quantity,price\n"
+       "stock,TCS,2,100\nstock,INFY,3,10\nmf,120503,4,1\nstock,ZZZ,1,1\nstock,TCS,0,1\n")
+
+
+def run_import(store):
+    return holdings_import.import_holdings(
+        store, 'u1', None, upload(CSV),
+        lambda key: None if key == 'ZZZ' else {'name': key}, lambda key: {'name': 'Fund'})
+
+
+def test_import_writes_lots_and_aggregates(tmp_path):
+    store = storage.SQLiteStore(str(tmp_path / 'portfolio.db'))
+    imported, errors = run_import(store)
+    assert imported == 3
+    assert errors == ['Line 4: ZZZ not found', 'Line 5: Quantity must be a number greater than zero']
+    assert store.get_holding('u1', 'stocks', 'TCS', None)['quantity'] == 2
+    assert store.get_holding('u1', 'mutual_funds', '120503', None)['units'] == 4
+    assert len(store.get_lots('u1', 'stocks', 'INFY', None)) == 1
+
+
+def test_import_firebase_payload(firebase_store, firebase_stub):
+    firebase_stub.tree = {'users': {'u1': {'stocks': {'TCS': {'quantity': 1, 'purchase_price': 50, 'lot_count': 1}}}}}
+    imported, _ = run_import(firebase_store)
+    assert imported == 3
+    users = firebase_stub.tree['users']['u1']
+    assert users['stocks']['TCS']['quantity'] == 3 and users['stocks']['TCS']['purchase_price'] == 250 / 3
+    assert users['stocks']['INFY']['name'] == 'INFY'
+    assert users['mutual_funds']['120503']['units'] == 4
+    ledger_tree = firebase_stub.tree['ledger']['u1']
+    assert {key: len(lots) for key, lots in ledger_tree['stocks'].items()} == {'TCS': 1, 'INFY': 1}
+    assert len(ledger_tree['mutual_funds']['120503']) == 1
+
+
+def test_import_keeps_lots_added_during_lookups(firebase_store):
+    import ledger
+
+    def lookup_stock(key):
+        # Another request buys the same stock while the import looks symbols up
+        ledger.record_lot(firebase_store, 'u1', 'stocks', key, ledger.new_lot('buy', 1, 100), None)
+        return {'name': key}
+
+    imported, _ = holdings_import.import_holdings(
+        firebase_store, 'u1', None, upload("symbol,quantity,price\nTCS,2,100\n"), lookup_stock, None)
+    assert imported == 1
+    assert firebase_store.get_holding('u1', 'stocks', 'TCS', None)['quantity'] == 3
+    assert len(firebase_store.get_lots('u1', 'stocks', 'TCS', None)) == 2
\ No newline at end of file
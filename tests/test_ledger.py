@@ -0,0 +1,190 @@
+import itertools
+import threading
+
+import pytest
+
+import ledger
+import storage
+from ledger import LedgerError
+
+
+def test_new_lot_normalises_side_and_numbers():
+    lot = ledger.new_lot(' SELL ', '2.5', '10', timestamp='2026-01-02T10:00:00')
+    assert lot == {'side': 'sell', 'quantity': 2.5, 'price': 10.0, 'timestamp': '2026-01-02T10:00:00'}
+    assert ledger.new_lot(None, 1, 1)['side'] == 'buy'
+    assert ledger.new_lot('buy', 1, 1)['timestamp']
+
+
+@pytest.mark.parametrize('side, quantity, price, message', [
+    ('short', 1, 1, 'Unknown transaction type'),
+    ('buy', 0, 1, 'Quantity'),
+    ('buy', -1, 1, 'Quantity'),
+    ('buy', 'nan', 1, 'Quantity'),
+    ('buy', 'inf', 1, 'Quantity'),
+    ('buy', 1, -0.01, 'Price'),
+    ('buy', 1, 'nan', 'Price'),
+    ('buy', 1, '-inf', 'Price'),
+])
+def test_new_lot_rejects_invalid_values(side, quantity, price, message):
+    with pytest.raises(LedgerError, match=message):
+        ledger.new_lot(side, quantity, price)
+
+
+def test_new_lot_rejects_non_numbers():
+    with pytest.raises(ValueError):
+        ledger.new_lot('buy', 'ten', 1)
+
+
+def lot(side, quantity, price):
+    return ledger.new_lot(side, quantity, price, timestamp='2026-01-02T10:00:00')
+
+
+def test_apply_lot_averages_buys_and_realizes_sells():
+    aggregate = ledger.apply_lot(None, lot('buy', 10, 100), 'stocks')
+    aggregate = ledger.apply_lot(aggregate, lot('buy', 10, 200), 'stocks')
+    assert aggregate['quantity'] == 20
+    assert aggregate['purchase_price'] == 150
+    aggregate = ledger.apply_lot(aggregate, lot('sell', 5, 170), 'stocks')
+    assert aggregate['quantity'] == 15
+    assert aggregate['purchase_price'] == 150
+    assert aggregate['realized_pnl'] == 100
+    assert aggregate['lot_count'] == 3
+    assert aggregate['last_updated'] == '2026-01-02T10:00:00'
+
+
+def test_apply_lot_uses_fund_fields_and_keeps_details():
+    aggregate = ledger.apply_lot({'name': 'Fund', 'units': 2, 'purchase_nav': 10}, lot('buy', 2, 20), 'mutual_funds')
+    assert aggregate['units'] == 4
+    assert aggregate['purchase_nav'] == 15
+    assert aggregate['name'] == 'Fund'
+
+
+def test_apply_lot_rejects_selling_more_than_held():
+    with pytest.raises(LedgerError, match='only 1 held'):
+        ledger.apply_lot({'quantity': 1}, lot('sell', 2, 10), 'stocks')
+    aggregate = ledger.apply_lot({'quantity': 1, 'purchase_price': 5}, lot('sell', 1, 10), 'stocks')
+    assert aggregate['quantity'] == 0
+
+
+def test_apply_lot_does_not_modify_its_input():
+    current = {'quantity': 1, 'purchase_price': 5}
+    ledger.apply_lot(current, lot('buy', 1, 10), 'stocks')
+    assert current == {'quantity': 1, 'purchase_price': 5}
+
+
+def record_concurrently(store, count=8):
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def buy():
+        barrier.wait()
+        try:
+            ledger.record_lot(store, 'u1', 'stocks', 'TCS', lot('buy', 1, 100), None, details={'name': 'TCS'})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=buy) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    return storage.SQLiteStore(str(tmp_path / 'portfolio.db'))
+
+
+def test_sqlite_record_lot_writes_lot_and_aggregate(sqlite_store):
+    aggregate = ledger.record_lot(sqlite_store, 'u1', 'stocks', 'TCS', lot('buy', 2, 100), None, details={'name': 'TCS'})
+    assert aggregate['quantity'] == 2 and aggregate['name'] == 'TCS'
+    assert sqlite_store.get_holding('u1', 'stocks', 'TCS', None) == aggregate
+    assert list(sqlite_store.get_lots('u1', 'stocks', 'TCS', None).values()) == [lot('buy', 2, 100)]
+
+
+def test_sqlite_concurrent_lots_are_all_counted(sqlite_store):
+    assert record_concurrently(sqlite_store) == []
+    assert sqlite_store.get_holding('u1', 'stocks', 'TCS', None)['quantity'] == 8
+    assert len(sqlite_store.get_lots('u1', 'stocks', 'TCS', None)) == 8
+
+
+def test_sqlite_failed_build_writes_nothing(sqlite_store):
+    ledger.record_lot(sqlite_store, 'u1', 'stocks', 'TCS', lot('buy', 1, 100), None)
+    with pytest.raises(LedgerError):
+        ledger.record_lot(sqlite_store, 'u1', 'stocks', 'TCS', lot('sell', 5, 100), None)
+    assert sqlite_store.get_holding('u1', 'stocks', 'TCS', None)['quantity'] == 1
+    assert len(sqlite_store.get_lots('u1', 'stocks', 'TCS', None)) == 1
+
+
+def test_firebase_concurrent_lots_are_all_counted(firebase_store, monkeypatch):
+    monkeypatch.setattr(storage, 'UPDATE_ATTEMPTS', 50)
+    assert record_concurrently(firebase_store) == []
+    assert firebase_store.get_holding('u1', 'stocks', 'TCS', None)['quantity'] == 8
+    assert len(firebase_store.get_lots('u1', 'stocks', 'TCS', None)) == 8
+
+
+def test_firebase_etag_conflict_rebuilds_on_the_fresh_aggregate(firebase_store):
+    ledger.record_lot(firebase_store, 'u1', 'stocks', 'TCS', lot('buy', 1, 100), None)
+    calls = []
+
+    def build(current):
+        calls.append(current[('stocks', 'TCS')]['quantity'])
+        if len(calls) == 1:
+            # Another request records a lot between this read and its write
+            ledger.record_lot(firebase_store, 'u1', 'stocks', 'TCS', lot('buy', 1, 100), None)
+        return [('stocks', 'TCS', 'lot-a', lot('buy', 1, 100),
+                 ledger.apply_lot(current[('stocks', 'TCS')], lot('buy', 1, 100), 'stocks'))]
+
+    firebase_store.update_holdings('u1', [('stocks', 'TCS')], build, None)
+    assert calls == [1, 2]
+    assert firebase_store.get_holding('u1', 'stocks', 'TCS', None)['quantity'] == 3
+    assert len(firebase_store.get_lots('u1', 'stocks', 'TCS', None)) == 3
+
+
+def test_firebase_gives_up_and_removes_its_lots(firebase_store, monkeypatch):
+    monkeypatch.setattr(storage, 'UPDATE_ATTEMPTS', 3)
+    ledger.record_lot(firebase_store, 'u1', 'stocks', 'TCS', lot('buy', 1, 100), None)
+    edits = itertools.count()
+
+    def build(current):
+        # Every attempt loses the race
+        firebase_store.set_holding('u1', 'stocks', 'TCS', dict(current[('stocks', 'TCS')], edit=next(edits)), None)
+        return [('stocks', 'TCS', 'lot-a', lot('buy', 1, 100),
+                 ledger.apply_lot(current[('stocks', 'TCS')], lot('buy', 1, 100), 'stocks'))]
+
+    with pytest.raises(storage.ConcurrentUpdateError):
+        firebase_store.update_holdings('u1', [('stocks', 'TCS')], build, None)
+    assert firebase_store.get_holding('u1', 'stocks', 'TCS', None)['quantity'] == 1
+    assert 'lot-a' not in firebase_store.get_lots('u1', 'stocks', 'TCS', None)
+
+
+def test_firebase_failed_rebuild_removes_its_lots(firebase_store):
+    ledger.record_lot(firebase_store, 'u1', 'stocks', 'TCS', lot('buy', 2, 100), None)
+    sell = lot('sell', 2, 100)
+
+    def build(current):
+        if not build.raced:
+            build.raced = True
+            ledger.record_lot(firebase_store, 'u1', 'stocks', 'TCS', lot('sell', 1, 100), None)
+        return [('stocks', 'TCS', 'lot-a', sell, ledger.apply_lot(current[('stocks', 'TCS')], sell, 'stocks'))]
+
+    build.raced = False
+    with pytest.raises(LedgerError):
+        firebase_store.update_holdings('u1', [('stocks', 'TCS')], build, None)
+    assert firebase_store.get_holding('u1', 'stocks', 'TCS', None)['quantity'] == 1
+    assert 'lot-a' not in firebase_store.get_lots('u1', 'stocks', 'TCS', None)
+
+
+def test_firebase_failed_lot_write_leaves_the_aggregate_alone(firebase_store, monkeypatch):
+    import firebase_rest
+    ledger.record_lot(firebase_store, 'u1', 'stocks', 'TCS', lot('buy', 1, 100), None)
+
+    def failing_update(self, data, token=None):
+        raise firebase_rest.FirebaseError('ledger write failed')
+
+    monkeypatch.setattr(firebase_rest.Reference, 'update', failing_update)
+    with pytest.raises(firebase_rest.FirebaseError):
+        ledger.record_lot(firebase_store, 'u1', 'stocks', 'TCS', lot('buy', 1, 100), None)
+    monkeypatch.undo()
+    assert firebase_store.get_holding('u1', 'stocks', 'TCS', None)['quantity'] == 1
\ No newline at end of file
@@ -0,0 +1,112 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import market_calendar
+from market_calendar import IST, MarketCalendar
+
+# Friday 2026-10-16 and Monday 2026-10-19 are trading days, Tuesday
+# 2026-10-20 is a holiday, and Sunday 2026-11-08 has a Muhurat session
+CALENDAR = MarketCalendar(session=("09:15", "15:30"), holidays=['2026-10-20'],
+                          special_sessions={'2026-11-08': ["18:00", "19:00"]})
+
+
+def at(moment):
+    return datetime.fromisoformat(moment).replace(tzinfo=IST)
+
+
+@pytest.fixture
+def calendar(monkeypatch):
+    monkeypatch.setattr(market_calendar, '_calendar', CALENDAR)
+    market_calendar.expires_at.cache_clear()
+    yield CALENDAR
+    market_calendar.expires_at.cache_clear()
+
+
+def test_hours_on_trading_closed_and_special_days():
+    assert CALENDAR.hours(at('2026-10-16T00:00:00').date()) == (at('2026-10-16T09:15:00'), at('2026-10-16T15:30:00'))
+    assert CALENDAR.hours(at('2026-10-17T00:00:00').date()) is None
+    assert CALENDAR.hours(at('2026-10-20T00:00:00').date()) is None
+    assert CALENDAR.hours(at('2026-11-08T00:00:00').date()) == (at('2026-11-08T18:00:00'), at('2026-11-08T19:00:00'))
+
+
+def test_is_open_includes_the_open_and_excludes_the_close():
+    assert not CALENDAR.is_open(at('2026-10-16T09:14:59'))
+    assert CALENDAR.is_open(at('2026-10-16T09:15:00'))
+    assert CALENDAR.is_open(at('2026-10-16T15:29:59'))
+    assert not CALENDAR.is_open(at('2026-10-16T15:30:00'))
+    assert CALENDAR.is_open(at('2026-11-08T18:30:00'))
+
+
+@pytest.mark.parametrize('fetched, expires', [
+    # During the session and just before the close: the open-market TTL
+    ('2026-10-16T11:00:00', '2026-10-16T11:01:00'),
+    ('2026-10-16T15:29:30', '2026-10-16T15:30:30'),
+    # Just after the close, closing prices are still settling
+    ('2026-10-16T15:31:00', '2026-10-16T15:32:00'),
+    ('2026-10-16T15:59:59', '2026-10-16T16:00:59'),
+    # Once settled, a Friday quote lasts the weekend
+    ('2026-10-16T16:00:00', '2026-10-19T09:15:00'),
+    ('2026-10-16T22:00:00', '2026-10-19T09:15:00'),
+    ('2026-10-18T12:00:00', '2026-10-19T09:15:00'),
+    # Before the open, the quote lasts until the bell
+    ('2026-10-19T07:00:00', '2026-10-19T09:15:00'),
+    # On a holiday eve it lasts until the session after the holiday
+    ('2026-10-19T20:00:00', '2026-10-21T09:15:00'),
+    ('2026-10-20T12:00:00', '2026-10-21T09:15:00'),
+    # Saturday night runs up to the Sunday Muhurat session
+    ('2026-11-07T21:00:00', '2026-11-08T18:00:00'),
+])
+def test_stock_expiry(fetched, expires):
+    assert CALENDAR.stock_expiry(at(fetched)) == at(expires)
+
+
+@pytest.mark.parametrize('fetched, expires', [
+    # Before the day's publishing window, the NAV is good until it opens
+    ('2026-10-16T10:00:00', '2026-10-16T19:00:00'),
+    # Inside the window it is refetched, but never past midnight
+    ('2026-10-16T19:00:00', '2026-10-16T19:30:00'),
+    ('2026-10-16T23:50:00', '2026-10-17T00:00:00'),
+    # Friday night and the weekend wait for Monday's window
+    ('2026-10-17T00:00:00', '2026-10-19T19:00:00'),
+    ('2026-10-18T21:00:00', '2026-10-19T19:00:00'),
+    # Nothing is published on a holiday
+    ('2026-10-20T20:00:00', '2026-10-21T19:00:00'),
+])
+def test_nav_expiry(fetched, expires):
+    assert CALENDAR.nav_expiry(at(fetched)) == at(expires)
+
+
+def test_expires_at_converts_to_ist(calendar):
+    # 09:59 UTC is 15:29 IST, a minute before the close
+    fetched = datetime(2026, 10, 16, 9, 59, tzinfo=timezone.utc)
+    assert market_calendar.expires_at('stock', fetched) == at('2026-10-16T15:30:00')
+    # 18:29 UTC on Friday is 23:59 IST, still inside the publishing window
+    assert market_calendar.expires_at('nav', datetime(2026, 10, 16, 18, 29, tzinfo=timezone.utc)) == at('2026-10-17T00:00:00')
+    # 18:30 UTC is already Saturday in IST
+    assert market_calendar.expires_at('nav', datetime(2026, 10, 16, 18, 30, tzinfo=timezone.utc)) == at('2026-10-19T19:00:00')
+
+
+def test_is_fresh_around_the_close(calendar):
+    fetched = at('2026-10-16T15:29:00')
+    assert market_calendar.is_fresh('stock', fetched, now=fetched + timedelta(seconds=59))
+    assert not market_calendar.is_fresh('stock', fetched, now=fetched + timedelta(seconds=60))
+    friday_night = at('2026-10-16T21:00:00')
+    assert market_calendar.is_fresh('stock', friday_night, now=at('2026-10-19T09:14:59'))
+    assert not market_calendar.is_fresh('stock', friday_night, now=at('2026-10-19T09:15:00'))
+
+
+def test_load_reads_the_calendar_file(tmp_path):
+    path = tmp_path / 'calendar.json'
+    path.write_text(json.dumps({'session': {'open': '09:15', 'close': '15:30'},
+                                'holidays': {'2026-10-20': 'Diwali Balipratipada'}}))
+    calendar = MarketCalendar.load(str(path))
+    assert not calendar.is_trading_day(at('2026-10-20T00:00:00').date())
+    assert calendar.is_trading_day(at('2026-10-21T00:00:00').date())
+
+
+def test_missing_calendar_file_closes_only_weekends(tmp_path):
+    calendar = MarketCalendar.load(str(tmp_path / 'missing.json'))
+    assert calendar.is_trading_day(at('2026-10-20T00:00:00').date())
+    assert not calendar.is_trading_day(at('2026-10-17T00:00:00').date())
\ No newline at end of file
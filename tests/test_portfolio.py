@@ -0,0 +1,13 @@
+import portfolio
+
+
+def test_etag_follows_user_holdings_and_quote_versions(monkeypatch):
+    versions = {'INFY.NS': 1}
+    monkeypatch.setattr(portfolio, 'quote_version', versions.get)
+    etag = portfolio.portfolio_etag('dashboard', 'u1', 'f1', ['INFY.NS'])
+    assert etag == portfolio.portfolio_etag('dashboard', 'u1', 'f1', ['INFY.NS'])
+    assert etag != portfolio.portfolio_etag('dashboard', 'u2', 'f1', ['INFY.NS'])
+    assert etag != portfolio.portfolio_etag('stocks', 'u1', 'f1', ['INFY.NS'])
+    assert etag != portfolio.portfolio_etag('dashboard', 'u1', 'f2', ['INFY.NS'])
+    versions['INFY.NS'] = 2
+    assert etag != portfolio.portfolio_etag('dashboard', 'u1', 'f1', ['INFY.NS'])
\ No newline at end of file
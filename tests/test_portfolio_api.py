@@ -0,0 +1,123 @@
+import base64
+import json
+
+import pytest
+
+import portfolio_api
+from portfolio_api import ApiError
+
+
+def row(key, value, asset_class='stocks'):
+    return {'asset_class': asset_class, 'key': key, 'name': key, 'symbol': key, 'quantity': 1.0,
+            'average_cost': value, 'current_price': value, 'invested_value': value,
+            'current_value': value, 'unrealized_pnl': 0.0, 'realized_pnl': 0.0}
+
+
+ROWS = [row('INFY', 500.0), row('TCS', 300.0), row('WIPRO', 300.0), row('120503', 300.0, 'mutual_funds'),
+        row('HDFC', 100.0)]
+
+
+def pages(sort='value', order='desc', limit=2):
+    cursor, seen = None, []
+    while True:
+        page, cursor = portfolio_api.paginate(ROWS, sort, order, cursor, limit)
+        seen.append([r['key'] for r in page])
+        if cursor is None:
+            return seen
+
+
+def test_cursor_round_trip():
+    values = [300.0, 'stocks', 'TCS']
+    assert portfolio_api.decode_cursor(portfolio_api.encode_cursor(values)) == values
+    # Unpadded and URL-safe
+    assert '=' not in portfolio_api.encode_cursor(values)
+
+
+def test_pages_cover_every_row_once_in_order():
+    # Equal values are ordered by (asset_class, key), mutual funds first
+    assert pages() == [['INFY', 'WIPRO'], ['TCS', '120503'], ['HDFC']]
+    assert pages(order='asc', limit=3) == [['HDFC', '120503', 'TCS'], ['WIPRO', 'INFY']]
+    assert pages(sort='symbol', order='asc', limit=5) == [['120503', 'HDFC', 'INFY', 'TCS', 'WIPRO']]
+
+
+def test_last_page_has_no_cursor():
+    page, cursor = portfolio_api.paginate(ROWS, limit=5)
+    assert len(page) == 5 and cursor is None
+    page, cursor = portfolio_api.paginate([], limit=5)
+    assert page == [] and cursor is None
+
+
+def test_cursor_past_the_end_returns_an_empty_page():
+    cursor = portfolio_api.encode_cursor([0.0, 'stocks', 'A'])
+    assert portfolio_api.paginate(ROWS, cursor=cursor) == ([], None)
+
+
+@pytest.mark.parametrize('limit, size', [(0, 1), (-3, 1), (1, 1), (4, 4), (10 ** 6, 5)])
+def test_limit_is_clamped(limit, size):
+    page, _ = portfolio_api.paginate(ROWS, limit=limit)
+    assert len(page) == size
+
+
+def test_limit_is_clamped_to_the_maximum(monkeypatch):
+    monkeypatch.setattr(portfolio_api, 'MAX_LIMIT', 3)
+    page, cursor = portfolio_api.paginate(ROWS, limit=10)
+    assert len(page) == 3 and cursor is not None
+
+
+def tampered(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+@pytest.mark.parametrize('cursor', [
+    'not base64!',
+    '!!!!',
+    base64.urlsafe_b64encode(b'\xff\xfe').decode(),
+    tampered({'value': 1}),
+    tampered('INFY'),
+    tampered([]),
+    tampered(None),
+])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ApiError):
+        portfolio_api.paginate(ROWS, cursor=cursor)
+    # Rejected even when there are no rows to compare it with
+    with pytest.raises(ApiError):
+        portfolio_api.paginate([], cursor=cursor)
+
+
+def test_cursor_from_another_sort_is_invalid():
+    _, cursor = portfolio_api.paginate(ROWS, sort='symbol', order='asc', limit=2)
+    with pytest.raises(ApiError):
+        portfolio_api.paginate(ROWS, sort='value', cursor=cursor)
+
+
+@pytest.mark.parametrize('sort, order', [('price', 'desc'), ('value', 'up')])
+def test_unsupported_sort_or_order(sort, order):
+    with pytest.raises(ApiError):
+        portfolio_api.paginate(ROWS, sort, order)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    import factory
+    import views
+    monkeypatch.setattr(views, 'get_user_id', lambda auth, token: 'u1')
+    monkeypatch.setattr(views, 'get_auth', lambda: None)
+    monkeypatch.setattr(views, 'api_holding_rows', lambda user_id, token, with_prices=True: list(ROWS))
+    return factory.create_app('lean').test_client()
+
+
+def test_holdings_endpoint_pages_with_cursors(client):
+    headers = {'Authorization': 'Bearer token'}
+    first = client.get('/api/portfolio/holdings?limit=3&fields=key', headers=headers).get_json()
+    assert [r['key'] for r in first['holdings']] == ['INFY', 'WIPRO', 'TCS']
+    second = client.get(f"/api/portfolio/holdings?limit=3&fields=key&cursor={first['next_cursor']}",
+                        headers=headers).get_json()
+    assert second == {'holdings': [{'key': '120503'}, {'key': 'HDFC'}], 'next_cursor': None}
+
+
+@pytest.mark.parametrize('query', ['cursor=garbage!', f"cursor={tampered({'value': 1})}", 'sort=price'])
+def test_holdings_endpoint_rejects_bad_requests(client, query):
+    response = client.get(f"/api/portfolio/holdings?{query}", headers={'Authorization': 'Bearer token'})
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
\ No newline at end of file
@@ -0,0 +1,98 @@
+import json
+
+import price_stream
+from price_stream import PortfolioValuation, PriceHub, StreamHoldingsCache
+
+
+def test_publish_reaches_every_subscriber_of_the_key():
+    hub = PriceHub()
+    first, second = hub.subscribe(['INFY.NS', 'MF:120503']), hub.subscribe(['INFY.NS'])
+    hub.publish('INFY.NS', 1500.0)
+    hub.publish('MF:120503', 55.5)
+    hub.publish('TCS.NS', 3000.0)
+    assert first.get(timeout=0) == ('INFY.NS', 1500.0)
+    assert first.get(timeout=0) == ('MF:120503', 55.5)
+    assert first.get(timeout=0) is None
+    assert second.get(timeout=0) == ('INFY.NS', 1500.0)
+    assert second.get(timeout=0) is None
+
+
+def test_unsubscribe_stops_delivery_and_drops_empty_keys():
+    hub = PriceHub()
+    first, second = hub.subscribe(['INFY.NS', 'TCS.NS']), hub.subscribe(['INFY.NS'])
+    hub.unsubscribe(first)
+    assert sorted(hub.subscribed_keys()) == ['INFY.NS']
+    hub.publish('INFY.NS', 1500.0)
+    assert first.get(timeout=0) is None
+    assert second.get(timeout=0) == ('INFY.NS', 1500.0)
+    hub.unsubscribe(second)
+    assert hub.subscribed_keys() == []
+    # Unsubscribing twice is harmless
+    hub.unsubscribe(second)
+
+
+def test_a_full_queue_only_loses_ticks(monkeypatch):
+    monkeypatch.setattr(price_stream, 'QUEUE_SIZE', 2)
+    hub = PriceHub()
+    subscription = hub.subscribe(['INFY.NS'])
+    for price in (1.0, 2.0, 3.0):
+        hub.publish('INFY.NS', price)
+    assert subscription.get(timeout=0) == ('INFY.NS', 1.0)
+    assert subscription.get(timeout=0) == ('INFY.NS', 2.0)
+    assert subscription.get(timeout=0) is None
+
+
+def test_refresher_starts_only_with_a_refresh_function():
+    hub = PriceHub()
+    hub.subscribe(['INFY.NS'])
+    assert hub._refresher is None
+    hub = PriceHub(refresh=lambda key: None, refresh_interval=3600)
+    hub.subscribe(['INFY.NS'])
+    refresher = hub._refresher
+    assert refresher.daemon and refresher.is_alive()
+    hub.subscribe(['TCS.NS'])
+    assert hub._refresher is refresher
+
+
+def test_portfolio_events_stream_snapshot_then_deltas():
+    hub = PriceHub()
+    holdings = {'stocks': {'INFY': {'symbol': 'INFY.NS', 'quantity': 2, 'purchase_price': 100.0}}}
+    valuation = PortfolioValuation(holdings, lambda asset_class, key, details: 110.0)
+    events = price_stream.portfolio_events(hub, valuation, max_seconds=5, heartbeat=1)
+    assert next(events) == "retry: 5000\n"
+    assert json.loads(next(events).split('data: ')[1])['totals']['total_value'] == 220.0
+    hub.publish('INFY.NS', 120.0)
+    assert json.loads(next(events).split('data: ')[1])[0]['current_value'] == 240.0
+    assert next(events).startswith('event: totals')
+    events.close()
+    assert hub.subscribed_keys() == []
+
+
+def test_stream_holdings_are_reused_until_they_expire():
+    now = [0.0]
+    cache = StreamHoldingsCache(ttl=300, clock=lambda: now[0])
+    cache.put('token-a', 'u1', {'stocks': {}})
+    assert cache.get('token-a') == ('u1', {'stocks': {}})
+    assert cache.get('token-b') is None
+    now[0] = 300.0
+    assert cache.get('token-a') is None
+
+
+def test_stream_holdings_invalidate_every_token_of_the_user():
+    cache = StreamHoldingsCache()
+    cache.put('token-a', 'u1', {})
+    cache.put('token-b', 'u1', {})
+    cache.put('token-c', 'u2', {})
+    cache.invalidate('u1')
+    assert cache.get('token-a') is None and cache.get('token-b') is None
+    assert cache.get('token-c') == ('u2', {})
+
+
+def test_stream_holdings_evict_the_least_recently_used():
+    cache = StreamHoldingsCache(max_entries=2)
+    cache.put('token-a', 'u1', {})
+    cache.put('token-b', 'u2', {})
+    cache.get('token-a')
+    cache.put('token-c', 'u3', {})
+    assert cache.get('token-b') is None
+    assert cache.get('token-a') == ('u1', {}) and cache.get('token-c') == ('u3', {})
\ No newline at end of file
@@ -0,0 +1,51 @@
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+import quotes
+
+
+class Engine:
+    stock_sources = ('yahoo_chart', 'yahoo_options')
+
+    def __init__(self, outcome):
+        self.outcome = outcome
+
+    def fetch_stock(self, ticker):
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    # The blocking sources each lookup reached, with yfinance unavailable
+    calls = []
+    monkeypatch.setattr(quotes, 'load_yfinance', lambda: None)
+    monkeypatch.setattr(quotes, 'direct_chart_quote', lambda base: calls.append('yahoo_chart'))
+    monkeypatch.setattr(quotes, 'direct_options_quote', lambda base: calls.append('yahoo_options'))
+    monkeypatch.setattr(quotes, 'stock_cache', {})
+    monkeypatch.setattr(quotes, 'failed_lookups', {})
+    return calls
+
+
+@pytest.mark.parametrize('engine, expected', [
+    (None, ['yahoo_chart', 'yahoo_options']),
+    # A miss or a timeout means the engine already asked both endpoints
+    (Engine(None), []),
+    (Engine(FutureTimeoutError()), []),
+    # A broken engine tried nothing
+    (Engine(RuntimeError('loop closed')), ['yahoo_chart', 'yahoo_options']),
+])
+def test_fallback_skips_sources_the_engine_tried(upstream, monkeypatch, engine, expected):
+    monkeypatch.setattr(quotes, 'quote_engine', engine)
+    assert quotes.lookup_stock_data('INFY.NS')['current_price'] == 0
+    assert upstream == expected
+
+
+def test_engine_quote_is_cached(upstream, monkeypatch):
+    quote = {'name': 'Infosys', 'current_price': 1500.0, 'exchange': 'NSE', 'symbol': 'INFY.NS'}
+    monkeypatch.setattr(quotes, 'quote_engine', Engine(quote))
+    assert quotes.lookup_stock_data('infy.ns') == quote
+    assert quotes.get_cached_stock_data('INFY.NS') == quote
+    assert upstream == []
\ No newline at end of file
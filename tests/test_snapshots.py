@@ -0,0 +1,118 @@
+from datetime import date, datetime
+
+import pytest
+
+import market_calendar
+import snapshots
+import storage
+from market_calendar import IST
+
+HOLDINGS = {'stocks': {'INFY': {'symbol': 'INFY.NS', 'quantity': 10, 'purchase_price': 100.0}},
+            'mutual_funds': {'120503': {'units': 4, 'purchase_nav': 50.0}}}
+
+
+def prices(stock, fund):
+    return (lambda key, details: stock), (lambda key, details: fund)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return storage.SQLiteStore(str(tmp_path / 'portfolio.db'))
+
+
+@pytest.fixture
+def calendar(monkeypatch):
+    # Monday 2026-10-19 is a holiday; sessions close at 15:30 IST
+    calendar = market_calendar.MarketCalendar(holidays=['2026-10-19'])
+    monkeypatch.setattr(market_calendar, '_calendar', calendar)
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_FINALIZE_AT', datetime.strptime('23:30', '%H:%M').time())
+    return calendar
+
+
+def at(moment):
+    return datetime.fromisoformat(moment).replace(tzinfo=IST)
+
+
+def test_visits_write_provisional_points(store):
+    point = snapshots.record(store, 'u1', None, HOLDINGS, *prices(120.0, 60.0), day='2026-10-16')
+    assert point == [1440.0, 1200.0, 1200.0, 240.0]
+    assert snapshots.record(store, 'u1', None, HOLDINGS, *prices(130.0, 60.0), day='2026-10-16') == [1540.0, 1200.0, 1300.0, 240.0]
+    series = snapshots.series(store, 'u1', None)
+    assert series['date'] == ['2026-10-16'] and series['value'] == [1540.0] and series['final'] == [False]
+
+
+def test_final_points_are_never_rewritten(store):
+    snapshots.record(store, 'u1', None, HOLDINGS, *prices(120.0, 60.0), day='2026-10-16')
+    assert snapshots.record(store, 'u1', None, HOLDINGS, *prices(125.0, 61.0), day='2026-10-16', final=True) == [1494.0, 1200.0, 1250.0, 244.0]
+    # Later visits and repeated finalize runs leave the day alone
+    assert snapshots.record(store, 'u1', None, HOLDINGS, *prices(200.0, 60.0), day='2026-10-16') is None
+    assert snapshots.record(store, 'u1', None, HOLDINGS, *prices(200.0, 60.0), day='2026-10-16', final=True) is None
+    # The next day's visit is provisional again and builds on the final basis
+    assert snapshots.record(store, 'u1', None, HOLDINGS, *prices(126.0, 61.0), day='2026-10-17') == [1504.0, 1200.0, 1260.0, 244.0]
+    series = snapshots.series(store, 'u1', None)
+    assert series['date'] == ['2026-10-16', '2026-10-17']
+    assert series['value'] == [1494.0, 1504.0] and series['final'] == [True, False]
+
+
+def test_finalizing_an_earlier_day_after_a_later_visit_is_skipped(store):
+    snapshots.record(store, 'u1', None, HOLDINGS, *prices(120.0, 60.0), day='2026-10-17')
+    assert snapshots.record(store, 'u1', None, HOLDINGS, *prices(120.0, 60.0), day='2026-10-16', final=True) is None
+    assert snapshots.series(store, 'u1', None)['date'] == ['2026-10-17']
+
+
+def test_finalize_day_covers_users_who_never_visited(store):
+    store.set_holding('u1', 'stocks', 'INFY', HOLDINGS['stocks']['INFY'], None)
+    store.set_holding('u2', 'mutual_funds', '120503', dict(HOLDINGS['mutual_funds']['120503'], current_nav=55.0), None)
+    assert snapshots.finalize_day(store, date(2026, 10, 16), None) == 2
+    assert snapshots.series(store, 'u1', None) == {'date': ['2026-10-16'], 'value': [1000.0], 'invested': [1000.0],
+                                                   'stocks_value': [1000.0], 'mutual_funds_value': [0.0], 'final': [True]}
+    assert snapshots.series(store, 'u2', None)['value'] == [220.0]
+    # Another run for the same day writes nothing
+    assert snapshots.finalize_day(store, date(2026, 10, 16), None) == 0
+
+
+def test_finalize_time_waits_for_the_settled_close_and_navs(calendar, monkeypatch):
+    assert snapshots.finalize_time(date(2026, 10, 16)) == at('2026-10-16T23:30:00')
+    assert snapshots.finalize_time(date(2026, 10, 17)) is None  # Saturday
+    assert snapshots.finalize_time(date(2026, 10, 19)) is None  # holiday
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_FINALIZE_AT', datetime.strptime('15:00', '%H:%M').time())
+    assert snapshots.finalize_time(date(2026, 10, 16)) == at('2026-10-16T16:00:00')
+
+
+@pytest.mark.parametrize('moment, expected', [
+    ('2026-10-16T23:29:00', None),
+    ('2026-10-16T23:30:00', date(2026, 10, 16)),
+    # Friday's point can still be finalized over the weekend and the holiday
+    ('2026-10-18T12:00:00', date(2026, 10, 16)),
+    ('2026-10-20T09:14:00', date(2026, 10, 16)),
+    # Once Tuesday's session opens, prices have moved on
+    ('2026-10-20T09:15:00', None),
+    ('2026-10-20T23:45:00', date(2026, 10, 20)),
+])
+def test_finalizable_day(calendar, moment, expected):
+    assert snapshots.finalizable_day(at(moment)) == expected
+
+
+def test_next_finalize_skips_closed_days(calendar):
+    assert snapshots.next_finalize(at('2026-10-16T12:00:00')) == at('2026-10-16T23:30:00')
+    assert snapshots.next_finalize(at('2026-10-16T23:30:00')) == at('2026-10-20T23:30:00')
+
+
+def test_claim_lets_one_process_finalize_each_day(tmp_path):
+    pytest.importorskip('fcntl')
+    path = str(tmp_path / 'snapshots.lock')
+    with snapshots.claim(date(2026, 10, 16), path) as claimed:
+        assert claimed
+        # Held while the day is being finalized
+        with snapshots.claim(date(2026, 10, 16), path) as again:
+            assert not again
+    with snapshots.claim(date(2026, 10, 16), path) as claimed:
+        assert not claimed
+    with snapshots.claim(date(2026, 10, 20), path) as claimed:
+        assert claimed
+
+
+def test_firebase_user_ids(firebase_store):
+    firebase_store.set_holding('u1', 'stocks', 'INFY', HOLDINGS['stocks']['INFY'], None)
+    firebase_store.write_snapshot('u2', '2026-10-16', [0.0] * 4, {'day': '2026-10-16'}, None)
+    assert firebase_store.user_ids(None) == ['u1', 'u2']
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""Request-scoped loaders for the signed-in user and their Firebase data.
+
+Everything a page renders comes from a single ``load_user`` read of the
+portfolio store; the result is kept on ``flask.g`` so the view, templates and
+helpers share it instead of each reading the store themselves.
+"""
+from flask import g
+
+import metrics
+from firebase_tokens import get_verifier
+from server_timing import phase
+
+
+def get_user_id(auth, token):
+    # Verify the token once per request
+    cached = g.get('auth_user')
+    if cached and cached[0] == token:
+        return cached[1]
+
+    with phase('auth'):
+        verifier = get_verifier()
+        if verifier:
+            # Checked locally against cached signing keys, no network round-trip
+            user_id = verifier.verify(token)['sub']
+        else:
+            with metrics.upstream('firebase'):
+                user = auth.get_account_info(token)
+            user_id = user['users'][0]['localId']
+    g.auth_user = (token, user_id)
+    return user_id
+
+
+def load_user_data(store, user_id, token):
+    # Fetch all of the user's holdings in one round-trip
+    cached = g.get('user_data')
+    if cached and cached[0] == user_id:
+        return cached[1]
+
+    data = {}
+    if store:
+        with phase('db'):
+            data = store.load_user(user_id, token) or {}
+    data = dict(data)
+    g.user_data = (user_id, data)
+    return data
+
+
+def get_section(store, user_id, token, section):
+    return dict(load_user_data(store, user_id, token).get(section) or {})
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""Per-user cache of computed portfolio valuations.
+
+An entry holds whatever a view computed (holdings with the prices used and
+totals) together with the fingerprint of the holdings it was built from and
+the version of every quote it used. It is served only while both still
+match, so a write to the user's holdings or a changed (or expired) cached
+price for any held symbol makes the entry miss and the view re-prices.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+MAX_ENTRIES = 2000
+
+
+def holdings_fingerprint(*sections):
+    payload = json.dumps(sections, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class ValuationCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, view, fingerprint, quote_version):
+        # quote_version(key) returns the current version of a cached quote, or None if expired
+        with self._lock:
+            entry = self._entries.get((user_id, view))
+            if entry is None:
+                return None
+            self._entries.move_to_end((user_id, view))
+
+        if entry['fingerprint'] != fingerprint:
+            return None
+        for key, version in entry['quotes'].items():
+            if quote_version(key) != version:
+                return None
+        return entry['value']
+
+    def peek_quotes(self, user_id, view, fingerprint):
+        # The quote keys a cached valuation depends on, without validating them
+        with self._lock:
+            entry = self._entries.get((user_id, view))
+        if entry is None or entry['fingerprint'] != fingerprint:
+            return None
+        return list(entry['quotes'])
+
+    def put(self, user_id, view, fingerprint, quotes, value):
+        with self._lock:
+            self._entries[(user_id, view)] = {
+                'fingerprint': fingerprint,
+                'quotes': dict(quotes),
+                'value': value
+            }
+            self._entries.move_to_end((user_id, view))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
\ No newline at end of file
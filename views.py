@@ -0,0 +1,618 @@
+"""Page, form and JSON API views.
+
+Views are plain functions. ``routes`` maps them to URLs and the app factory
+registers them (eagerly for the full profile, lazily for the lean one), so
+endpoint names are the function names the templates pass to ``url_for``.
+"""
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+
+from flask import (render_template, stream_template, request, redirect, url_for, jsonify, flash,
+                   Response, stream_with_context, make_response, session, current_app)
+
+import firebase_app
+import history
+import holdings_import
+import ledger
+import metrics
+import portfolio_api
+import portfolio_export
+import snapshots
+from async_quotes import exchange_symbols
+from firebase_app import get_auth
+from portfolio import (valuation_cache, get_valuation, portfolio_etag, portfolio_totals, price_stock,
+                       user_fingerprint)
+from price_stream import PortfolioValuation, StreamHoldingsCache, portfolio_events
+from quotes import (get_stock_data, get_cached_stock_data, get_fund_data, export_stock_price,
+                    export_fund_price, prefetch_quotes, price_hub)
+from storage import get_store
+from streaming_render import LazyHoldings
+from user_data import get_user_id, load_user_data
+
+# Stock pages with at least this many holdings are streamed while quotes resolve
+STREAM_MIN_HOLDINGS = int(os.getenv("STREAM_MIN_HOLDINGS", "10"))
+
+# A live price stream holds one request thread for its whole life, but an
+# idle one only waits on its queue. Streams are closed after this long and the
+# browser reconnects, which reuses the token's cached holdings
+STREAM_MAX_SECONDS = int(os.getenv("PRICE_STREAM_MAX_SECONDS", "300"))
+
+# Streams one process serves at once; further ones get a 503 and retry later,
+# leaving the remaining threads for page and API requests. gunicorn.conf.py
+# sets this to half of each worker's threads
+STREAM_MAX_CONNECTIONS = int(os.getenv("PRICE_STREAM_MAX_CONNECTIONS", "8"))
+STREAM_RETRY_SECONDS = 10
+stream_slots = threading.BoundedSemaphore(STREAM_MAX_CONNECTIONS)
+stream_holdings = StreamHoldingsCache(ttl=int(os.getenv("PRICE_STREAM_HOLDINGS_TTL", "300")))
+
+# Exchange tickers, optionally suffixed, or ^-prefixed indices such as ^NSEI
+HISTORY_SYMBOL = re.compile(r'^([A-Z0-9&\-]{1,20}(\.(NS|BO))?|\^[A-Z0-9]{1,20})$')
+
+# Record today's portfolio value snapshot once the response has been sent
+def holdings_changed(user_id):
+    # Drops everything this process derived from the user's previous holdings
+    valuation_cache.invalidate(user_id)
+    stream_holdings.invalidate(user_id)
+
+def schedule_snapshot(response, store, user_id, token, user_data):
+    if store is None or not snapshots.due(user_id):
+        return
+    def record():
+        try:
+            snapshots.record(store, user_id, token, user_data, export_stock_price, export_fund_price)
+        except Exception as e:
+            print(f"Error recording snapshot for {user_id}: {str(e)}")
+    response.call_on_close(record)
+
+# Render a portfolio page, answering If-None-Match before any pricing or rendering
+def render_portfolio_page(view, user_id, token, render, snapshot=False):
+    store = get_store()
+    user_data = load_user_data(store, user_id, token)
+    fingerprint = user_fingerprint(user_data)
+    
+    # Pages carrying flashed messages are one-off and never revalidated
+    cacheable = not session.get('_flashes')
+    if cacheable:
+        quote_keys = valuation_cache.peek_quotes(user_id, view, fingerprint)
+        if quote_keys is not None:
+            etag = portfolio_etag(view, user_id, fingerprint, quote_keys)
+            # Weak comparison: compressed responses carry the W/ form of the tag
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                if snapshot:
+                    schedule_snapshot(response, store, user_id, token, user_data)
+                return response
+    
+    valuation = get_valuation(view, user_id, user_data)
+    response = make_response(render(valuation))
+    if cacheable:
+        response.set_etag(portfolio_etag(view, user_id, fingerprint, valuation['quotes']))
+        response.headers['Cache-Control'] = 'private, no-cache'
+    if snapshot:
+        schedule_snapshot(response, store, user_id, token, user_data)
+    return response
+
+# Stream the stocks page: layout and already-priced rows first, slow quotes as they resolve
+def stream_stocks_page(user_id, user_data, token, max_stocks_to_update=5):
+    user_stocks = dict(user_data.get('stocks') or {})
+    fingerprint = user_fingerprint(user_data)
+    
+    ready = []
+    pending = []
+    refresh = {}
+    for ticker, details in user_stocks.items():
+        if get_cached_stock_data(details.get('symbol', ticker)):
+            refresh[ticker] = True
+            ready.append((ticker, details))
+        elif len(pending) < max_stocks_to_update:
+            refresh[ticker] = True
+            pending.append((ticker, details))
+        else:
+            refresh[ticker] = False
+            ready.append((ticker, details))
+    
+    def on_complete(stock_data, quotes_used):
+        valuation = {
+            'stocks': stock_data,
+            'mutual_funds': {},
+            'totals': portfolio_totals(stock_data, {}),
+            'quotes': quotes_used
+        }
+        if all(version is not None for version in quotes_used.values()):
+            valuation_cache.put(user_id, 'stocks', fingerprint, quotes_used, valuation)
+    
+    holdings = LazyHoldings(ready, pending,
+                            lambda ticker, details: price_stock(ticker, details, refresh=refresh[ticker]),
+                            on_complete=on_complete)
+    return Response(stream_template('stocks.html', stocks=holdings, token=token))
+
+def index():
+    return render_template('login.html')
+
+def login():
+    if get_auth() is None:
+        return "Firebase authentication not available", 503
+    
+    email = request.form.get('email')
+    password = request.form.get('password')
+    try:
+        user = get_auth().sign_in_with_email_and_password(email, password)
+        user_id = user['localId']
+        id_token = user['idToken']
+        # Return token to client for future requests
+        return redirect(url_for('dashboard', token=id_token))
+    except Exception as e:
+        try:
+            error_message = json.loads(e.args[1])['error']['message']
+        except (IndexError, KeyError, TypeError, ValueError):
+            error_message = "Please check your credentials."
+        flash(f"Login failed: {error_message}")
+        return redirect(url_for('index'))
+
+def dashboard():
+    token = request.args.get('token')
+    if not token:
+        return redirect(url_for('index'))
+    
+    try:
+        # Verify the token
+        user_id = get_user_id(get_auth(), token)
+        
+        # Holdings and prices come from the valuation cache when nothing changed
+        return render_portfolio_page('dashboard', user_id, token, lambda valuation: render_template(
+            'dashboard.html',
+            stocks=valuation['stocks'],
+            mutual_funds=valuation['mutual_funds'],
+            token=token), snapshot=True)
+    except Exception as e:
+        return redirect(url_for('index'))
+
+def stocks():
+    token = request.args.get('token')
+    if not token:
+        return redirect(url_for('index'))
+    
+    try:
+        # Verify the token
+        user_id = get_user_id(get_auth(), token)
+        
+        # Large portfolios without a cached valuation are streamed row by row
+        user_data = load_user_data(get_store(), user_id, token)
+        stream_mode = request.args.get('stream')
+        streaming = stream_mode == '1' or (stream_mode != '0' and len(user_data.get('stocks') or {}) >= STREAM_MIN_HOLDINGS)
+        if streaming and valuation_cache.peek_quotes(user_id, 'stocks', user_fingerprint(user_data)) is None:
+            return stream_stocks_page(user_id, user_data, token)
+        
+        return render_portfolio_page('stocks', user_id, token, lambda valuation: render_template(
+            'stocks.html', stocks=valuation['stocks'], token=token))
+    except Exception as e:
+        return redirect(url_for('index'))
+
+def get_stock_info():
+    ticker = request.form.get('ticker')
+    if not ticker:
+        return jsonify({'error': 'No ticker provided'})
+    
+    try:
+        stock_info = get_stock_data(ticker)
+        return jsonify(stock_info)
+    except Exception as e:
+        current_app.logger.exception("Stock info lookup failed for %s", ticker)
+        return jsonify({'error': f"Failed to fetch stock information: {str(e)}"})
+
+def add_stock():
+    token = request.form.get('token')
+    if not token:
+        return redirect(url_for('index'))
+    
+    try:
+        # Verify the token
+        user_id = get_user_id(get_auth(), token)
+        
+        ticker = request.form.get('ticker')
+        symbol = request.form.get('symbol')  # Get the full symbol including exchange suffix
+        side = request.form.get('side', 'buy')
+        lot = ledger.new_lot(side, request.form.get('quantity'), request.form.get('purchase_price'))
+        
+        # Use the base ticker (without .NS or .BO) as the key
+        base_ticker = ticker.strip().upper()
+        if base_ticker.endswith('.NS') or base_ticker.endswith('.BO'):
+            base_ticker = base_ticker[:-3]
+        
+        if lot['side'] == 'sell':
+            # Sells only need an existing position, no price lookup
+            aggregate = ledger.record_lot(get_store(), user_id, "stocks", base_ticker, lot, token)
+            holdings_changed(user_id)
+            flash(f"Sold {lot['quantity']:g} shares of {aggregate.get('name', base_ticker)}")
+            return redirect(url_for('stocks', token=token))
+        
+        # Use the symbol if provided, otherwise use ticker
+        stock_ticker = symbol if symbol else ticker
+        
+        # Get stock info using the helper function
+        stock_info = get_stock_data(stock_ticker)
+        
+        if stock_info['current_price'] == 0:
+            flash(f"Error: Could not find stock information for {ticker}")
+            return redirect(url_for('stocks', token=token))
+        
+        # Append the lot and update the running aggregate in Firebase
+        details = {
+            'name': stock_info['name'],
+            'exchange': stock_info['exchange'],
+            'symbol': stock_info['symbol']
+        }
+        ledger.record_lot(get_store(), user_id, "stocks", base_ticker, lot, token, details=details)
+        holdings_changed(user_id)
+        
+        flash(f"Stock {stock_info['name']} added successfully!")
+        return redirect(url_for('stocks', token=token))
+    except Exception as e:
+        flash(f"Error adding stock: {str(e)}")
+        return redirect(url_for('stocks', token=token))
+
+def lookup_import_stock(ticker):
+    stock_info = get_stock_data(ticker)
+    if stock_info['current_price'] == 0:
+        return None
+    return {
+        'name': stock_info['name'],
+        'exchange': stock_info['exchange'],
+        'symbol': stock_info['symbol']
+    }
+
+def lookup_import_fund(scheme_code):
+    fund_info = get_fund_data(scheme_code)
+    if not fund_info:
+        return None
+    return {'name': fund_info['name']}
+
+def import_holdings():
+    token = request.form.get('token')
+    if not token:
+        return redirect(url_for('index'))
+    
+    wants_json = request.accept_mimetypes.best == 'application/json'
+    try:
+        # Verify the token
+        user_id = get_user_id(get_auth(), token)
+        
+        holdings_file = request.files.get('holdings_file')
+        if not holdings_file or not holdings_file.filename:
+            raise holdings_import.HoldingsImportError("No holdings file provided")
+        
+        imported, errors = holdings_import.import_holdings(
+            get_store(), user_id, token, holdings_file,
+            lookup_import_stock, lookup_import_fund)
+        holdings_changed(user_id)
+        
+        if wants_json:
+            return jsonify({'success': True, 'imported': imported, 'errors': errors})
+        flash(f"Imported {imported} transactions")
+        for error in errors[:10]:
+            flash(error)
+        if len(errors) > 10:
+            flash(f"...and {len(errors) - 10} more rows were skipped")
+        return redirect(url_for('dashboard', token=token))
+    except Exception as e:
+        if wants_json:
+            return jsonify({'error': f"Import failed: {str(e)}"}), 400
+        flash(f"Error importing holdings: {str(e)}")
+        return redirect(url_for('dashboard', token=token))
+
+def mutual_funds():
+    token = request.args.get('token')
+    if not token:
+        return redirect(url_for('index'))
+    
+    try:
+        # Verify the token
+        user_id = get_user_id(get_auth(), token)
+        
+        return render_portfolio_page('mutual_funds', user_id, token, lambda valuation: render_template(
+            'mutual_funds.html', funds=valuation['mutual_funds'], token=token))
+    except Exception as e:
+        return redirect(url_for('index'))
+
+def add_mutual_fund():
+    token = request.form.get('token')
+    if not token:
+        return redirect(url_for('index'))
+    
+    try:
+        # Verify the token
+        user_id = get_user_id(get_auth(), token)
+        
+        scheme_code = request.form.get('scheme_code')
+        side = request.form.get('side', 'buy')
+        lot = ledger.new_lot(side, request.form.get('units'), request.form.get('purchase_nav'))
+        
+        if lot['side'] == 'sell':
+            ledger.record_lot(get_store(), user_id, "mutual_funds", scheme_code, lot, token)
+            holdings_changed(user_id)
+            return redirect(url_for('mutual_funds', token=token))
+        
+        # Verify mutual fund exists
+        fund_info = get_fund_data(scheme_code)
+        if fund_info:
+            # Append the lot and update the running aggregate in Firebase
+            ledger.record_lot(get_store(), user_id, "mutual_funds", scheme_code, lot, token, details={'name': fund_info['name']})
+            holdings_changed(user_id)
+            
+            return redirect(url_for('mutual_funds', token=token))
+        else:
+            flash(f"Error: Mutual fund scheme code {scheme_code} not found")
+            return redirect(url_for('mutual_funds', token=token))
+    except Exception as e:
+        flash(f"Error adding mutual fund: {str(e)}")
+        return redirect(url_for('mutual_funds', token=token))
+
+def export_portfolio():
+    token = request.args.get('token')
+    if not token:
+        return redirect(url_for('index'))
+    
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in portfolio_export.FORMATS:
+        return jsonify({'error': f"Unsupported export format: {export_format}"}), 400
+    dataset = request.args.get('data', 'holdings').lower()
+    if dataset not in ('holdings', 'transactions'):
+        return jsonify({'error': f"Unsupported export data: {dataset}"}), 400
+    
+    try:
+        # Verify the token
+        user_id = get_user_id(get_auth(), token)
+    except Exception as e:
+        return redirect(url_for('index'))
+    
+    if dataset == 'transactions':
+        rows = portfolio_export.transaction_rows(get_store(), user_id, token)
+        columns = portfolio_export.TRANSACTION_COLUMNS
+    else:
+        def holding_rows():
+            # Read lazily so the response starts before Firebase answers
+            holdings = load_user_data(get_store(), user_id, token)
+            yield from portfolio_export.holding_rows(holdings, export_stock_price, export_fund_price)
+        rows = holding_rows()
+        columns = portfolio_export.HOLDING_COLUMNS
+    
+    body = portfolio_export.serialize(rows, columns, export_format)
+    filename = f"{dataset}-{datetime.now().strftime('%Y%m%d')}.{export_format}"
+    return Response(stream_with_context(body),
+                    mimetype=portfolio_export.FORMATS[export_format],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+def request_token():
+    # API clients send "Authorization: Bearer <token>", pages pass ?token=
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        return auth_header[7:].strip()
+    return request.args.get('token')
+
+def api_holding_rows(user_id, token, with_prices=True):
+    holdings = load_user_data(get_store(), user_id, token)
+    if not with_prices:
+        # Nothing requested depends on prices, so skip the quote lookups
+        no_price = lambda key, details: None
+        return portfolio_export.holding_rows(holdings, no_price, no_price)
+    # One concurrent batch for whatever this process hasn't cached yet, so a
+    # cold worker doesn't fall back to stored prices or sort by cost
+    prefetch_quotes([details.get('symbol', ticker) for ticker, details in (holdings.get('stocks') or {}).items()],
+                    list(holdings.get('mutual_funds') or {}))
+    return portfolio_export.holding_rows(holdings, export_stock_price, export_fund_price)
+
+def api_portfolio():
+    token = request_token()
+    if not token:
+        return jsonify({'error': 'Authentication required'}), 401
+    try:
+        user_id = get_user_id(get_auth(), token)
+    except Exception as e:
+        return jsonify({'error': 'Authentication failed'}), 401
+    
+    try:
+        return jsonify({'totals': portfolio_api.summarize(api_holding_rows(user_id, token))})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def api_portfolio_holdings():
+    token = request_token()
+    if not token:
+        return jsonify({'error': 'Authentication required'}), 401
+    try:
+        user_id = get_user_id(get_auth(), token)
+    except Exception as e:
+        return jsonify({'error': 'Authentication failed'}), 401
+    
+    try:
+        sort = request.args.get('sort', 'value')
+        order = request.args.get('order', 'asc' if sort == 'symbol' else 'desc')
+        fields = portfolio_api.parse_fields(request.args.get('fields'))
+        asset_class = request.args.get('type')
+        if asset_class not in (None, 'stocks', 'mutual_funds'):
+            raise portfolio_api.ApiError(f"Unsupported type: {asset_class}")
+        min_value = request.args.get('min_value', type=float)
+        
+        rows = api_holding_rows(user_id, token, with_prices=portfolio_api.needs_prices(fields, sort))
+        rows = portfolio_api.filter_rows(rows, asset_class, request.args.get('q'), min_value)
+        page, next_cursor = portfolio_api.paginate(
+            rows, sort, order,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', portfolio_api.DEFAULT_LIMIT, type=int))
+        
+        return jsonify({
+            'holdings': [portfolio_api.select_fields(row, fields) for row in page],
+            'next_cursor': next_cursor
+        })
+    except portfolio_api.ApiError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def api_portfolio_history():
+    token = request_token()
+    if not token:
+        return jsonify({'error': 'Authentication required'}), 401
+    try:
+        user_id = get_user_id(get_auth(), token)
+    except Exception as e:
+        return jsonify({'error': 'Authentication failed'}), 401
+    
+    try:
+        payload = snapshots.series(get_store(), user_id, token)
+        points = request.args.get('points', type=int)
+        if points is not None:
+            # Downsample on total value, keeping each kept day's full point
+            keep = history.lttb(list(range(len(payload['date']))), payload['value'], history.clamp_points(points))
+            payload = {field: [column[i] for i in keep] for field, column in payload.items()}
+        return jsonify(payload)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def price_history(symbol):
+    token = request_token()
+    if not token:
+        return jsonify({'error': 'Authentication required'}), 401
+    try:
+        get_user_id(get_auth(), token)
+    except Exception as e:
+        return jsonify({'error': 'Authentication failed'}), 401
+    
+    symbol = symbol.strip().upper()
+    if not HISTORY_SYMBOL.match(symbol):
+        return jsonify({'error': f"Invalid symbol: {symbol}"}), 400
+    if '.' not in symbol and not symbol.startswith('^'):
+        # Bare tickers are looked up on the preferred exchange; indices such
+        # as ^NSEI have no exchange suffix
+        symbol = exchange_symbols(symbol)[0][0]
+    try:
+        first_day, last_day = history.parse_period(
+            request.args.get('range'), request.args.get('start'), request.args.get('end'))
+        points = history.clamp_points(request.args.get('points', history.DEFAULT_POINTS, type=int))
+        payload = history.price_history(symbol, first_day, last_day, points)
+    except history.HistoryError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error fetching history for {symbol}: {str(e)}")
+        return jsonify({'error': f"Failed to fetch history for {symbol}"}), 502
+    
+    response = jsonify(payload)
+    # Past bars never change; today's is refreshed every few minutes
+    response.headers['Cache-Control'] = 'private, max-age=300'
+    return response
+
+def price_stream():
+    token = request_token()
+    if not token:
+        return jsonify({'error': 'Authentication required'}), 401
+    cached = stream_holdings.get(token)
+    if cached is None:
+        try:
+            user_id = get_user_id(get_auth(), token)
+            holdings = load_user_data(get_store(), user_id, token)
+        except Exception as e:
+            return jsonify({'error': 'Authentication failed'}), 401
+        stream_holdings.put(token, user_id, holdings)
+    else:
+        user_id, holdings = cached
+    
+    def cached_price(asset_class, key, details):
+        if asset_class == 'mutual_funds':
+            return export_fund_price(key, details)
+        return export_stock_price(key, details)
+    
+    if not stream_slots.acquire(blocking=False):
+        return Response(f"retry: {STREAM_RETRY_SECONDS * 1000}\n\n", status=503, mimetype='text/event-stream',
+                        headers={'Retry-After': str(STREAM_RETRY_SECONDS), 'Cache-Control': 'no-cache'})
+    try:
+        valuation = PortfolioValuation(holdings, cached_price)
+        response = Response(stream_with_context(portfolio_events(price_hub, valuation, STREAM_MAX_SECONDS)),
+                            mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    except Exception:
+        stream_slots.release()
+        raise
+    # The slot is freed once the server has closed the stream, however it ended
+    response.call_on_close(stream_slots.release)
+    return response
+
+def logout():
+    return redirect(url_for('index'))
+
+def fetch_stock_data():
+    ticker = request.values.get('ticker', '').strip()
+    if not ticker:
+        return jsonify({'error': 'No ticker provided'}), 400
+    
+    try:
+        # Check if we've made too many API calls recently (basic rate limiting)
+        current_time = datetime.now()
+        last_api_call = getattr(current_app, 'last_api_call', None)
+        
+        # If we made an API call in the last 3 seconds, return a rate limit message
+        if last_api_call and (current_time - last_api_call).total_seconds() < 3:
+            return jsonify({
+                'error': 'Rate limit exceeded. Please try again in a few seconds.'
+            }), 429
+        
+        # Update the last API call time
+        current_app.last_api_call = current_time
+        
+        # Get stock data
+        stock_data = get_stock_data(ticker)
+        
+        if stock_data['current_price'] == 0:
+            return jsonify({
+                'error': f"Could not fetch data for {ticker}. Please verify the ticker symbol."
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': stock_data
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def health():
+    return jsonify({
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "environment": os.environ.get("VERCEL_ENV", "unknown"),
+        "profile": current_app.config['PROFILE'],
+        "firebase_available": firebase_app.db is not None,
+        "template_folder": current_app.template_folder,
+        "static_folder": current_app.static_folder
+    })
+
+def prometheus_metrics():
+    # Scrapers send METRICS_TOKEN as a bearer token when one is configured
+    expected = os.getenv("METRICS_TOKEN")
+    if expected and not hmac.compare_digest(request_token() or '', expected):
+        return jsonify({'error': 'Authentication required'}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def debug():
+    modules = sorted([m for m in sys.modules.keys()])
+    
+    # Check if template folder exists
+    template_folder_exists = os.path.exists(current_app.template_folder) if current_app.template_folder else False
+    template_folder_contents = os.listdir(current_app.template_folder) if template_folder_exists else []
+    
+    return jsonify({
+        "python_version": sys.version,
+        "cwd": os.getcwd(),
+        "files_in_cwd": os.listdir("."),
+        "template_folder": current_app.template_folder,
+        "template_folder_exists": template_folder_exists,
+        "template_folder_contents": template_folder_contents,
+        "sys_path": sys.path,
+        "loaded_modules": modules[:50],  # First 50 modules to avoid response size limits
+        "environment": {k: v for k, v in os.environ.items() if not k.startswith("AWS_")}
+    })
\ No newline at end of file